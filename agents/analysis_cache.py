@@ -0,0 +1,201 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+ANALYSIS_CACHE_BACKEND = os.getenv("ANALYSIS_CACHE_BACKEND", "memory").strip().lower()
+ANALYSIS_CACHE_TTL = float(os.getenv("ANALYSIS_CACHE_TTL", "86400"))
+ANALYSIS_CACHE_MAX_ENTRIES = max(1, int(os.getenv("ANALYSIS_CACHE_MAX_ENTRIES", "512")))
+ANALYSIS_CACHE_PATH = os.getenv("ANALYSIS_CACHE_PATH", "./analysis_cache.db")
+
+CACHE_LAYERS = ("posture", "interpretation")
+
+
+class MemoryCache:
+    def __init__(self, max_entries: int, ttl_seconds: float | None) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and time.time() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class SQLiteCache:
+    def __init__(self, path: str, layer: str, max_entries: int, ttl_seconds: float | None) -> None:
+        self.layer = layer
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "layer TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, PRIMARY KEY (layer, key))"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS ix_cache_entries_layer_accessed ON cache_entries (layer, accessed_at)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, stored_at FROM cache_entries WHERE layer = ? AND key = ?",
+                (self.layer, key),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            value, stored_at = row
+            if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM cache_entries WHERE layer = ? AND key = ?", (self.layer, key))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE layer = ? AND key = ?",
+                (now, self.layer, key),
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(value)
+
+    def set(self, key: str, value: Any) -> None:
+        now = time.time()
+        payload = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (layer, key, value, stored_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (self.layer, key, payload, now, now),
+            )
+            if self.ttl_seconds is not None:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE layer = ? AND stored_at < ?",
+                    (self.layer, now - self.ttl_seconds),
+                )
+            evicted = self._conn.execute(
+                "DELETE FROM cache_entries WHERE layer = ? AND key IN ("
+                "SELECT key FROM cache_entries WHERE layer = ? ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.layer, self.layer, self.max_entries),
+            ).rowcount
+            self.evictions += max(0, evicted)
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE layer = ?", (self.layer,))
+            self._conn.commit()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            entries = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE layer = ?", (self.layer,)
+            ).fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class AnalysisCache:
+    def __init__(self, backend: str, ttl_seconds: float, max_entries: int, path: str) -> None:
+        self.backend = backend
+        self.enabled = backend != "off"
+        ttl = ttl_seconds if ttl_seconds > 0 else None
+        if backend == "sqlite":
+            self._layers = {layer: SQLiteCache(path, layer, max_entries, ttl) for layer in CACHE_LAYERS}
+        else:
+            self._layers = {layer: MemoryCache(max_entries, ttl) for layer in CACHE_LAYERS}
+
+    def get(self, layer: str, key: str) -> Any | None:
+        if not self.enabled:
+            return None
+        return self._layers[layer].get(key)
+
+    def set(self, layer: str, key: str, value: Any) -> None:
+        if self.enabled:
+            self._layers[layer].set(key, value)
+
+    def clear(self) -> None:
+        for cache in self._layers.values():
+            cache.clear()
+
+    def stats(self) -> dict[str, object]:
+        return {
+            "backend": self.backend,
+            "layers": {layer: cache.stats() for layer, cache in self._layers.items()},
+        }
+
+
+_analysis_cache: AnalysisCache | None = None
+_analysis_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache:
+    global _analysis_cache
+    if _analysis_cache is None:
+        with _analysis_cache_lock:
+            if _analysis_cache is None:
+                _analysis_cache = AnalysisCache(
+                    backend=ANALYSIS_CACHE_BACKEND,
+                    ttl_seconds=ANALYSIS_CACHE_TTL,
+                    max_entries=ANALYSIS_CACHE_MAX_ENTRIES,
+                    path=ANALYSIS_CACHE_PATH,
+                )
+    return _analysis_cache
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+from dataclasses import dataclass
+from typing import Any
+
+from tools.exercise_catalog import format_exercises, get_catalog
+
+
+PLAN_CONTEXT_TOKEN_BUDGET = max(200, int(os.getenv("PLAN_CONTEXT_TOKEN_BUDGET", "2000")))
+PLAN_TOOL_RESULT_TOKEN_BUDGET = max(100, int(os.getenv("PLAN_TOOL_RESULT_TOKEN_BUDGET", "1500")))
+PLAN_CATALOG_MAX_EXERCISES = max(5, int(os.getenv("PLAN_CATALOG_MAX_EXERCISES", "15")))
+
+# Only these profile fields matter for prescription; identifiers such as name, phone and CPF never
+# reach the model.
+PRESCRIPTION_PROFILE_FIELDS = ("age", "goal", "medical_notes", "latest_detected_deviations")
+
+# Share of the budget each free-text part may use before the catalog is filled in.
+PROFILE_BUDGET_SHARE = 0.25
+CLINICAL_BUDGET_SHARE = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is a good approximation for the GPT tokenizers on pt/en prose.
+    return math.ceil(len(text or "") / 4)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max(0, max_tokens * 4 - 12)].rstrip() + " [truncated]"
+
+
+@dataclass(frozen=True)
+class PrescriptionContext:
+    profile_text: str
+    clinical_analysis: str
+    catalog_text: str
+    catalog_exercises: int
+    estimated_tokens: int
+    token_budget: int
+
+
+def _compact_profile(student_profile: dict[str, Any], max_tokens: int) -> str:
+    profile = {
+        key: student_profile[key]
+        for key in PRESCRIPTION_PROFILE_FIELDS
+        if student_profile.get(key) not in (None, "", [])
+    }
+    text = json.dumps(profile, ensure_ascii=False, separators=(",", ":"))
+    if estimate_tokens(text) > max_tokens:
+        # Free-text notes are the only fields that can grow without bound.
+        for key in ("medical_notes", "goal"):
+            if key in profile:
+                profile[key] = fit_to_budget(str(profile[key]), max_tokens // 3)
+        text = json.dumps(profile, ensure_ascii=False, separators=(",", ":"))
+    return text
+
+
+def build_prescription_context(
+    student_profile: dict[str, Any],
+    clinical_analysis: str,
+    token_budget: int = PLAN_CONTEXT_TOKEN_BUDGET,
+    include_catalog: bool = True,
+) -> PrescriptionContext:
+    profile_text = _compact_profile(student_profile, int(token_budget * PROFILE_BUDGET_SHARE))
+    clinical_text = fit_to_budget(clinical_analysis.strip(), int(token_budget * CLINICAL_BUDGET_SHARE))
+    used = estimate_tokens(profile_text) + estimate_tokens(clinical_text)
+
+    catalog_lines: list[str] = []
+    if include_catalog:
+        deviations = [str(item) for item in student_profile.get("latest_detected_deviations") or []]
+        exercises = get_catalog().query(
+            deviations + [clinical_text],
+            medical_notes=str(student_profile.get("medical_notes", "")),
+            limit=PLAN_CATALOG_MAX_EXERCISES,
+        )
+        for exercise in exercises:
+            line = format_exercises([exercise])
+            line_tokens = estimate_tokens(line) + 1
+            if used + line_tokens > token_budget:
+                break
+            catalog_lines.append(line)
+            used += line_tokens
+
+    return PrescriptionContext(
+        profile_text=profile_text,
+        clinical_analysis=clinical_text,
+        catalog_text="\n".join(catalog_lines),
+        catalog_exercises=len(catalog_lines),
+        estimated_tokens=used,
+        token_budget=token_budget,
+    )
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+
+# Severity bands per metric as (mild, moderate, severe) lower bounds. Mild starts where the reference
+# ranges in prompts/postural_analysis_message.txt stop calling a value normal.
+DEFAULT_THRESHOLDS: dict[str, tuple[float, float, float]] = {
+    "shoulder_tilt_deg": (3.0, 5.0, 8.0),
+    "pelvic_tilt_deg": (3.0, 5.0, 8.0),
+    "head_tilt_deg": (5.0, 8.0, 12.0),
+    "head_protraction_deg": (15.0, 20.0, 30.0),
+    "trunk_inclination_deg": (5.0, 8.0, 12.0),
+    "shoulder_rotation_cm": (2.0, 4.0, 6.0),
+    "pelvic_rotation_cm": (2.0, 4.0, 6.0),
+}
+
+SEVERITIES = ("mild", "moderate", "severe")
+SEVERITY_LABELS = {
+    "en": {"mild": "Mild", "moderate": "Moderate", "severe": "Severe"},
+    "pt": {"mild": "leve", "moderate": "moderada", "severe": "acentuada"},
+}
+
+# Labels reuse the wording the exercise catalog indexes on, so rule output maps straight onto catalog tags.
+DEVIATION_LABELS: dict[str, dict[str, str]] = {
+    "shoulder_tilt_deg": {"en": "Shoulder Tilt", "pt": "Inclinação dos ombros"},
+    "pelvic_tilt_deg": {"en": "Pelvic Tilt", "pt": "Inclinação pélvica"},
+    "head_tilt_deg": {"en": "Head Tilt", "pt": "Inclinação lateral da cabeça"},
+    "head_protraction_deg": {"en": "Forward Head Posture", "pt": "Protração de cabeça"},
+    "trunk_inclination_deg": {"en": "Trunk Inclination", "pt": "Inclinação do tronco"},
+    "shoulder_rotation_cm": {"en": "Shoulder Rotation", "pt": "Rotação dos ombros"},
+    "pelvic_rotation_cm": {"en": "Pelvic Rotation", "pt": "Rotação pélvica"},
+}
+
+IMPLICATIONS: dict[str, dict[str, str]] = {
+    "shoulder_tilt_deg": {
+        "en": "an imbalance between the upper trapezius and levator scapulae on each side",
+        "pt": "desequilíbrio entre trapézio superior e levantador da escápula de cada lado",
+    },
+    "pelvic_tilt_deg": {
+        "en": "asymmetric activity of the quadratus lumborum and hip abductors",
+        "pt": "atividade assimétrica do quadrado lombar e dos abdutores do quadril",
+    },
+    "head_tilt_deg": {
+        "en": "asymmetric tone of the upper trapezius and scalenes",
+        "pt": "tônus assimétrico do trapézio superior e dos escalenos",
+    },
+    "head_protraction_deg": {
+        "en": "shortened suboccipitals with weak deep cervical flexors",
+        "pt": "encurtamento dos suboccipitais com fraqueza dos flexores cervicais profundos",
+    },
+    "trunk_inclination_deg": {
+        "en": "reduced trunk extensor endurance and core control",
+        "pt": "baixa resistência dos extensores do tronco e do controle do core",
+    },
+    "shoulder_rotation_cm": {
+        "en": "asymmetric length of the pectorals and scapular stabilizers",
+        "pt": "comprimento assimétrico dos peitorais e estabilizadores da escápula",
+    },
+    "pelvic_rotation_cm": {
+        "en": "asymmetric activity of the hip rotators and obliques",
+        "pt": "atividade assimétrica dos rotadores do quadril e dos oblíquos",
+    },
+}
+
+NO_DEVIATIONS = {"en": "No significant deviations detected", "pt": "Nenhum desvio significativo detectado"}
+
+DEVIATION_RULES_PATH = os.getenv("DEVIATION_RULES_PATH", "").strip()
+
+
+@dataclass(frozen=True)
+class DeviationGrade:
+    metric: str
+    value: float
+    severity: str
+    threshold: float
+    label: str
+
+
+def load_thresholds(path: str = DEVIATION_RULES_PATH) -> dict[str, tuple[float, float, float]]:
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    if not path:
+        return thresholds
+
+    overrides = json.loads(Path(path).read_text(encoding="utf-8"))
+    for metric, bands in overrides.items():
+        if metric not in DEVIATION_LABELS:
+            raise ValueError(f"Unknown deviation metric in {path}: {metric}")
+        if len(bands) != len(SEVERITIES) or list(bands) != sorted(bands):
+            raise ValueError(f"Thresholds for {metric} must be three ascending numbers.")
+        thresholds[metric] = tuple(float(value) for value in bands)
+    return thresholds
+
+
+THRESHOLDS = load_thresholds()
+
+
+def _label(metric: str, severity: str, language: str) -> str:
+    language = "pt" if language == "pt" else "en"
+    name = DEVIATION_LABELS[metric][language]
+    grade = SEVERITY_LABELS[language][severity]
+    return f"{name} ({grade})" if language == "pt" else f"{grade} {name}"
+
+
+def classify_deviations(angles: dict[str, float | None], language: str = "en") -> list[DeviationGrade]:
+    grades: list[DeviationGrade] = []
+    for metric, value in angles.items():
+        bands = THRESHOLDS.get(metric)
+        if bands is None or value is None:
+            continue
+        magnitude = abs(float(value))
+        level = sum(magnitude > band for band in bands)
+        if level == 0:
+            continue
+        severity = SEVERITIES[level - 1]
+        grades.append(
+            DeviationGrade(
+                metric=metric,
+                value=float(value),
+                severity=severity,
+                threshold=bands[level - 1],
+                label=_label(metric, severity, language),
+            )
+        )
+    # Most pronounced first, relative to where each metric stops being normal.
+    grades.sort(key=lambda grade: -abs(grade.value) / THRESHOLDS[grade.metric][0])
+    return grades
+
+
+def detected_deviation_labels(grades: list[DeviationGrade], language: str = "en") -> list[str]:
+    if not grades:
+        return [NO_DEVIATIONS["pt" if language == "pt" else "en"]]
+    return [grade.label for grade in grades]
+
+
+def serialize_grades(grades: list[DeviationGrade]) -> list[dict[str, Any]]:
+    return [asdict(grade) for grade in grades]
+
+
+def rule_based_narrative(grades: list[DeviationGrade], detected_view: str | None, language: str = "en") -> str:
+    language = "pt" if language == "pt" else "en"
+    if not grades:
+        if language == "pt":
+            return "Todas as métricas medidas estão dentro das faixas de referência; não há desvios posturais relevantes."
+        return "All measured metrics are within the reference ranges; no relevant postural deviations were found."
+
+    findings = "; ".join(
+        f"{grade.label.lower() if language == 'en' else grade.label}, "
+        f"{'sugerindo' if language == 'pt' else 'suggesting'} {IMPLICATIONS[grade.metric][language]}"
+        for grade in grades
+    )
+    if language == "pt":
+        view = "frontal" if detected_view == "frontal" else "de perfil"
+        return f"Triagem por regras (vista {view}): {findings}."
+    view = "frontal" if detected_view == "frontal" else "profile"
+    return f"Rule-based screening ({view} view): {findings}."
+
+
+def rule_based_analysis(
+    angles: dict[str, float | None], detected_view: str | None, language: str = "en"
+) -> dict[str, Any]:
+    grades = classify_deviations(angles, language)
+    return {
+        "detected_deviations": detected_deviation_labels(grades, language),
+        "clinical_analysis": rule_based_narrative(grades, detected_view, language),
+        "deviation_grades": serialize_grades(grades),
+        "analysis_source": "rules",
+    }
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import os
+import threading
+
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient, DefaultHttpxClient, OpenAI
+
+
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+OPENAI_CONNECT_TIMEOUT = float(os.getenv("OPENAI_CONNECT_TIMEOUT", "10"))
+OPENAI_MAX_CONNECTIONS = max(1, int(os.getenv("OPENAI_MAX_CONNECTIONS", "20")))
+OPENAI_MAX_KEEPALIVE_CONNECTIONS = max(1, int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "10")))
+OPENAI_MAX_RETRIES = max(0, int(os.getenv("OPENAI_MAX_RETRIES", "2")))
+
+_client: OpenAI | None = None
+_async_client: AsyncOpenAI | None = None
+_client_lock = threading.Lock()
+
+
+def _api_key() -> str:
+    api_key = os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        raise RuntimeError("OPENAI_API_KEY is not configured.")
+    return api_key
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(OPENAI_TIMEOUT, connect=OPENAI_CONNECT_TIMEOUT)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+    )
+
+
+def get_openai_client() -> OpenAI:
+    global _client
+    api_key = _api_key()
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = OpenAI(
+                    api_key=api_key,
+                    timeout=_timeout(),
+                    max_retries=OPENAI_MAX_RETRIES,
+                    http_client=DefaultHttpxClient(limits=_limits(), timeout=_timeout()),
+                )
+    return _client
+
+
+def get_async_openai_client() -> AsyncOpenAI:
+    global _async_client
+    api_key = _api_key()
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                _async_client = AsyncOpenAI(
+                    api_key=api_key,
+                    timeout=_timeout(),
+                    max_retries=OPENAI_MAX_RETRIES,
+                    http_client=DefaultAsyncHttpxClient(limits=_limits(), timeout=_timeout()),
+                )
+    return _async_client
+
+
+async def close_openai_clients() -> None:
+    global _client, _async_client
+    with _client_lock:
+        client, async_client = _client, _async_client
+        _client = None
+        _async_client = None
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.close()
@@ -1,17 +1,61 @@
 ﻿from __future__ import annotations
 
+import asyncio
+import hashlib
 import json
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Any
 
-from openai import OpenAI
+import numpy as np
 
-from tools.posture_tools import extract_landmarks_and_angles
+from agents.analysis_cache import MemoryCache, get_analysis_cache
+from agents.deviation_rules import (
+    classify_deviations,
+    detected_deviation_labels,
+    rule_based_analysis,
+    serialize_grades,
+)
+from agents.llm_client import get_async_openai_client, get_openai_client
+from tools.pose_sequence import SEQUENCE_RESULT_KEYS, sequence_settings_signature
+from tools.posture_tools import (
+    extract_landmarks_and_angles_from_image,
+    image_fingerprint,
+    pose_settings_signature,
+    prepare_image,
+)
+from tools.telemetry import llm_requests, record_llm_usage, span
 
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
 PROMPT_FILE = ROOT_DIR / "prompts" / "postural_analysis_message.txt"
+ANALYSIS_MODEL = "gpt-5-mini"
+
+# Near-identical measurements produce equivalent interpretations, so completions are memoized on
+# the angles snapped to these bucket widths.
+ANALYSIS_MEMO_ENABLED = os.getenv("ANALYSIS_MEMO_ENABLED", "1") == "1"
+ANALYSIS_MEMO_DEG_BUCKET = float(os.getenv("ANALYSIS_MEMO_DEG_BUCKET", "1.0"))
+ANALYSIS_MEMO_CM_BUCKET = float(os.getenv("ANALYSIS_MEMO_CM_BUCKET", "0.5"))
+ANALYSIS_MEMO_MAX_ENTRIES = max(1, int(os.getenv("ANALYSIS_MEMO_MAX_ENTRIES", "1024")))
+
+# "llm" lets the model grade deviations and write the narrative, "hybrid" grades them with the local
+# rules and asks the model only for the narrative, "rules" never calls the model.
+ANALYSIS_MODE = os.getenv("ANALYSIS_MODE", "llm").strip().lower()
+if ANALYSIS_MODE not in {"llm", "hybrid", "rules"}:
+    ANALYSIS_MODE = "llm"
+# Above this many concurrent interpretation calls, new analyses fall back to the rules (0 = no limit).
+LLM_MAX_INFLIGHT = max(0, int(os.getenv("LLM_MAX_INFLIGHT", "0")))
+
+POSTURE_PROCESS_WORKERS = max(1, int(os.getenv("POSTURE_PROCESS_WORKERS", str(os.cpu_count() or 1))))
+
+_analysis_memo = MemoryCache(max_entries=ANALYSIS_MEMO_MAX_ENTRIES, ttl_seconds=None)
+
+_llm_lock = threading.Lock()
+_llm_inflight = 0
+_analysis_sources = {"llm": 0, "hybrid": 0, "rules": 0, "fallbacks": 0}
 
 
 def _angles_text_summary(angles: dict[str, float], language: str) -> str:
@@ -50,42 +94,314 @@ def _load_system_prompt(language: str) -> str:
     return template.format(output_language=output_language)
 
 
-def _openai_json_analysis(angles: dict[str, float], language: str) -> dict[str, Any]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not configured.")
-
-    client = OpenAI(api_key=api_key)
+def _analysis_messages(
+    angles: dict[str, float], language: str, rule_deviations: list[str] | None = None
+) -> list[dict[str, str]]:
     angles_summary = _angles_text_summary(angles, language)
     system_prompt = _load_system_prompt(language)
+    graded_section = ""
+    if rule_deviations is not None:
+        graded_section = (
+            "\n\nThe deviations below were already graded from these values. Return them unchanged as "
+            "detected_deviations and explain them in clinical_analysis.\n"
+            f"Graded deviations: {json.dumps(rule_deviations, ensure_ascii=False)}"
+        )
+    return [
+        {
+            "role": "system",
+            "content": system_prompt,
+        },
+        {
+            "role": "user",
+            "content": (
+                "Analyze these posture angles and return the JSON object.\n\n"
+                f"Postural angles:\n{angles_summary}"
+                f"{graded_section}"
+            ),
+        },
+    ]
 
-    response = client.chat.completions.create(
-        model="gpt-5-mini",
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": system_prompt,
-            },
-            {
-                "role": "user",
-                "content": (
-                    "Analyze these posture angles and return the JSON object.\n\n"
-                    f"Postural angles:\n{angles_summary}"
-                ),
-            },
-        ],
-    )
+
+def _openai_json_analysis(
+    angles: dict[str, float], language: str, rule_deviations: list[str] | None = None
+) -> dict[str, Any]:
+    client = get_openai_client()
+    with span("llm.analysis"):
+        response = client.chat.completions.create(
+            model=ANALYSIS_MODEL,
+            response_format={"type": "json_object"},
+            messages=_analysis_messages(angles, language, rule_deviations),
+        )
+    llm_requests.inc(agent="analysis")
+    record_llm_usage("analysis", response.usage)
 
     content = response.choices[0].message.content or "{}"
     parsed = json.loads(content)
     return parsed
 
 
-def run_postural_pipeline(image_bytes: bytes, language: str = "en") -> dict[str, Any]:
-    posture_data = extract_landmarks_and_angles(image_bytes)
-    llm_result = _openai_json_analysis(posture_data["angles"], language)
+async def _openai_json_analysis_async(
+    angles: dict[str, float], language: str, rule_deviations: list[str] | None = None
+) -> dict[str, Any]:
+    client = get_async_openai_client()
+    with span("llm.analysis"):
+        response = await client.chat.completions.create(
+            model=ANALYSIS_MODEL,
+            response_format={"type": "json_object"},
+            messages=_analysis_messages(angles, language, rule_deviations),
+        )
+    llm_requests.inc(agent="analysis")
+    record_llm_usage("analysis", response.usage)
+
+    content = response.choices[0].message.content or "{}"
+    parsed = json.loads(content)
+    return parsed
+
+
+def _quantize(key: str, value: float) -> float:
+    bucket = ANALYSIS_MEMO_CM_BUCKET if key.endswith("_cm") else ANALYSIS_MEMO_DEG_BUCKET
+    if bucket <= 0:
+        return float(value)
+    return round(round(float(value) / bucket) * bucket, 4)
+
+
+def _angle_signature(
+    angles: dict[str, float], detected_view: str | None, language: str, rule_deviations: list[str] | None = None
+) -> str:
+    quantized = ",".join(
+        f"{key}={_quantize(key, value)}" for key, value in sorted(angles.items()) if value is not None
+    )
+    graded = "" if rule_deviations is None else "|" + ",".join(rule_deviations)
+    return f"{detected_view}|{language}|{ANALYSIS_MODEL}|{quantized}{graded}"
+
+
+def _memoized_json_analysis(
+    angles: dict[str, float],
+    detected_view: str | None,
+    language: str,
+    bypass: bool = False,
+    rule_deviations: list[str] | None = None,
+) -> dict[str, Any]:
+    if bypass or not ANALYSIS_MEMO_ENABLED:
+        return _openai_json_analysis(angles, language, rule_deviations)
+
+    signature = _angle_signature(angles, detected_view, language, rule_deviations)
+    memoized = _analysis_memo.get(signature)
+    if memoized is not None:
+        return memoized
+
+    result = _openai_json_analysis(angles, language, rule_deviations)
+    _analysis_memo.set(signature, result)
+    return result
+
+
+async def _memoized_json_analysis_async(
+    angles: dict[str, float],
+    detected_view: str | None,
+    language: str,
+    bypass: bool = False,
+    rule_deviations: list[str] | None = None,
+) -> dict[str, Any]:
+    if bypass or not ANALYSIS_MEMO_ENABLED:
+        return await _openai_json_analysis_async(angles, language, rule_deviations)
+
+    signature = _angle_signature(angles, detected_view, language, rule_deviations)
+    memoized = _analysis_memo.get(signature)
+    if memoized is not None:
+        return memoized
+
+    result = await _openai_json_analysis_async(angles, language, rule_deviations)
+    _analysis_memo.set(signature, result)
+    return result
+
+
+def analysis_memo_stats() -> dict[str, object]:
+    return {
+        "enabled": ANALYSIS_MEMO_ENABLED,
+        "deg_bucket": ANALYSIS_MEMO_DEG_BUCKET,
+        "cm_bucket": ANALYSIS_MEMO_CM_BUCKET,
+        **_analysis_memo.stats(),
+    }
+
+
+def _decode_posture_image(image_bytes: bytes, use_cache: bool) -> tuple[np.ndarray, str, dict[str, Any] | None]:
+    with span("decode"):
+        image = prepare_image(image_bytes)
+        posture_key = f"{image_fingerprint(image)}|{pose_settings_signature()}"
+    posture_data = get_analysis_cache().get("posture", posture_key) if use_cache else None
+    return image, posture_key, posture_data
+
+
+def run_posture_stage(image_bytes: bytes, use_cache: bool = True) -> tuple[str, dict[str, Any], bool]:
+    image, posture_key, posture_data = _decode_posture_image(image_bytes, use_cache)
+    if posture_data is not None:
+        return posture_key, posture_data, True
+
+    with span("inference"):
+        posture_data = extract_landmarks_and_angles_from_image(image)
+    get_analysis_cache().set("posture", posture_key, posture_data)
+    return posture_key, posture_data, False
+
+
+# Batch variant of run_posture_stage. The cache key, lookup and store stay in this process, so batch results
+# land in the cache /analyze reads and the spans reach /metrics; only the MediaPipe pass goes to the process
+# pool. Decoding runs on a thread, as OpenCV releases the GIL, since the key is the decoded image's fingerprint.
+async def run_posture_stage_pooled(image_bytes: bytes, use_cache: bool = True) -> tuple[str, dict[str, Any], bool]:
+    image, posture_key, posture_data = await asyncio.to_thread(_decode_posture_image, image_bytes, use_cache)
+    if posture_data is not None:
+        return posture_key, posture_data, True
+
+    loop = asyncio.get_running_loop()
+    with span("inference"):
+        posture_data = await loop.run_in_executor(
+            get_posture_process_pool(), extract_landmarks_and_angles_from_image, image
+        )
+    await asyncio.to_thread(get_analysis_cache().set, "posture", posture_key, posture_data)
+    return posture_key, posture_data, False
+
 
+# Sequences are keyed on their uploaded bytes, since their posture data is built frame by frame.
+def sequence_posture_key(uploads: list[bytes]) -> str:
+    digest = hashlib.sha256()
+    for upload in uploads:
+        digest.update(len(upload).to_bytes(8, "big"))
+        digest.update(upload)
+    return f"sequence:{digest.hexdigest()}|{pose_settings_signature()}|{sequence_settings_signature()}"
+
+
+def analysis_mode_stats() -> dict[str, object]:
+    with _llm_lock:
+        return {
+            "mode": ANALYSIS_MODE,
+            "llm_max_inflight": LLM_MAX_INFLIGHT,
+            "llm_inflight": _llm_inflight,
+            "sources": dict(_analysis_sources),
+        }
+
+
+def _record_source(source: str, fallback: bool = False) -> None:
+    with _llm_lock:
+        _analysis_sources[source] += 1
+        if fallback:
+            _analysis_sources["fallbacks"] += 1
+
+
+def _acquire_llm_slot() -> bool:
+    global _llm_inflight
+    if ANALYSIS_MODE == "rules" or not os.getenv("OPENAI_API_KEY"):
+        return False
+    with _llm_lock:
+        if LLM_MAX_INFLIGHT and _llm_inflight >= LLM_MAX_INFLIGHT:
+            return False
+        _llm_inflight += 1
+        return True
+
+
+def _release_llm_slot() -> None:
+    global _llm_inflight
+    with _llm_lock:
+        _llm_inflight -= 1
+
+
+def _rules_interpretation(posture_data: dict[str, Any], language: str) -> dict[str, Any]:
+    _record_source("rules", fallback=ANALYSIS_MODE != "rules")
+    return rule_based_analysis(posture_data["angles"], posture_data.get("detected_view"), language)
+
+
+def _graded_deviations(posture_data: dict[str, Any], language: str) -> tuple[list[Any], list[str] | None]:
+    grades = classify_deviations(posture_data["angles"], language)
+    rule_deviations = detected_deviation_labels(grades, language) if ANALYSIS_MODE == "hybrid" else None
+    return grades, rule_deviations
+
+
+def _with_grades(llm_result: dict[str, Any], grades: list[Any], rule_deviations: list[str] | None) -> dict[str, Any]:
+    result = dict(llm_result)
+    if rule_deviations is not None:
+        result["detected_deviations"] = rule_deviations
+    result["deviation_grades"] = serialize_grades(grades)
+    result["analysis_source"] = ANALYSIS_MODE
+    _record_source(ANALYSIS_MODE)
+    return result
+
+
+def _interpretation_key(posture_key: str, language: str) -> str:
+    return f"{posture_key}|{language}|{ANALYSIS_MODEL}|{ANALYSIS_MODE}"
+
+
+def run_interpretation_stage(
+    posture_key: str, posture_data: dict[str, Any], language: str, use_cache: bool = True
+) -> tuple[dict[str, Any], bool]:
+    cache = get_analysis_cache()
+    interpretation_key = _interpretation_key(posture_key, language)
+
+    llm_result = cache.get("interpretation", interpretation_key) if use_cache else None
+    if llm_result is not None:
+        return llm_result, True
+
+    if not _acquire_llm_slot():
+        # No API key, rules-only mode, or too many model calls in flight. Fallback results are not cached
+        # so the model interpretation is still produced once capacity returns.
+        llm_result = _rules_interpretation(posture_data, language)
+        if ANALYSIS_MODE == "rules":
+            cache.set("interpretation", interpretation_key, llm_result)
+        return llm_result, False
+
+    grades, rule_deviations = _graded_deviations(posture_data, language)
+    try:
+        llm_result = _memoized_json_analysis(
+            posture_data["angles"],
+            posture_data.get("detected_view"),
+            language,
+            bypass=not use_cache,
+            rule_deviations=rule_deviations,
+        )
+    finally:
+        _release_llm_slot()
+    llm_result = _with_grades(llm_result, grades, rule_deviations)
+    cache.set("interpretation", interpretation_key, llm_result)
+    return llm_result, False
+
+
+async def run_interpretation_stage_async(
+    posture_key: str, posture_data: dict[str, Any], language: str, use_cache: bool = True
+) -> tuple[dict[str, Any], bool]:
+    cache = get_analysis_cache()
+    interpretation_key = _interpretation_key(posture_key, language)
+
+    llm_result = cache.get("interpretation", interpretation_key) if use_cache else None
+    if llm_result is not None:
+        return llm_result, True
+
+    if not _acquire_llm_slot():
+        # No API key, rules-only mode, or too many model calls in flight. Fallback results are not cached
+        # so the model interpretation is still produced once capacity returns.
+        llm_result = _rules_interpretation(posture_data, language)
+        if ANALYSIS_MODE == "rules":
+            cache.set("interpretation", interpretation_key, llm_result)
+        return llm_result, False
+
+    grades, rule_deviations = _graded_deviations(posture_data, language)
+    try:
+        llm_result = await _memoized_json_analysis_async(
+            posture_data["angles"],
+            posture_data.get("detected_view"),
+            language,
+            bypass=not use_cache,
+            rule_deviations=rule_deviations,
+        )
+    finally:
+        _release_llm_slot()
+    llm_result = _with_grades(llm_result, grades, rule_deviations)
+    cache.set("interpretation", interpretation_key, llm_result)
+    return llm_result, False
+
+
+def build_pipeline_result(
+    posture_data: dict[str, Any],
+    llm_result: dict[str, Any],
+    posture_cached: bool = False,
+    interpretation_cached: bool = False,
+) -> dict[str, Any]:
     detected_deviations = llm_result.get("detected_deviations", [])
     if not isinstance(detected_deviations, list):
         detected_deviations = []
@@ -99,7 +415,53 @@ def run_postural_pipeline(image_bytes: bytes, language: str = "en") -> dict[str,
         "detected_view": posture_data.get("detected_view"),
         "detected_deviations": detected_deviations,
         "clinical_analysis": clinical_analysis,
+        "analysis_source": llm_result.get("analysis_source", "llm"),
+        "deviation_grades": llm_result.get("deviation_grades", []),
         "angles": posture_data["angles"],
+        "joint_angles": posture_data.get("joint_angles", {}),
         "landmarks_2d": posture_data["landmarks_2d"],
         "landmarks_3d": posture_data["landmarks_3d"],
+        "pose_tier": posture_data.get("pose_tier"),
+        **{key: posture_data[key] for key in SEQUENCE_RESULT_KEYS if key in posture_data},
+        "cache": {"posture": posture_cached, "interpretation": interpretation_cached},
     }
+
+
+# Returns (posture data, pipeline result); the posture data carries what is stored but not returned to clients,
+# such as the full-precision landmark blob.
+def run_postural_stages(
+    image_bytes: bytes, language: str = "en", use_cache: bool = True
+) -> tuple[dict[str, Any], dict[str, Any]]:
+    with span("postural_pipeline"):
+        posture_key, posture_data, posture_cached = run_posture_stage(image_bytes, use_cache)
+        llm_result, interpretation_cached = run_interpretation_stage(posture_key, posture_data, language, use_cache)
+        return posture_data, build_pipeline_result(posture_data, llm_result, posture_cached, interpretation_cached)
+
+
+def run_postural_pipeline(image_bytes: bytes, language: str = "en", use_cache: bool = True) -> dict[str, Any]:
+    return run_postural_stages(image_bytes, language, use_cache)[1]
+
+
+_posture_process_pool: ProcessPoolExecutor | None = None
+_posture_process_pool_lock = threading.Lock()
+
+
+def get_posture_process_pool() -> ProcessPoolExecutor:
+    global _posture_process_pool
+    if _posture_process_pool is None:
+        with _posture_process_pool_lock:
+            if _posture_process_pool is None:
+                # MediaPipe starts its own threads, so workers are spawned rather than forked.
+                _posture_process_pool = ProcessPoolExecutor(
+                    max_workers=POSTURE_PROCESS_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _posture_process_pool
+
+
+def shutdown_posture_process_pool() -> None:
+    global _posture_process_pool
+    with _posture_process_pool_lock:
+        if _posture_process_pool is not None:
+            _posture_process_pool.shutdown(wait=False, cancel_futures=True)
+            _posture_process_pool = None
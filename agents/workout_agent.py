@@ -1,38 +1,53 @@
 from __future__ import annotations
 
+import asyncio
 import json
 import os
 import re
-from typing import Any
-
-from openai import OpenAI
+from dataclasses import replace
+from typing import Any, AsyncIterator
 
+from agents.context_builder import (
+    PLAN_TOOL_RESULT_TOKEN_BUDGET,
+    PrescriptionContext,
+    build_prescription_context,
+    estimate_tokens,
+    fit_to_budget,
+)
+from agents.llm_client import get_async_openai_client, get_openai_client
+from tools.exercise_catalog import search_exercise_catalog
+from tools.telemetry import llm_requests, llm_retries, record_llm_usage, span
 from tools.web_tools import fetch_pilates_exercises
 
 
+def _normalize_exercise(item: Any) -> dict[str, str] | None:
+    if not isinstance(item, dict):
+        return None
+    name = str(item.get("exercise_name", "")).strip()
+    if not name:
+        return None
+    return {
+        "exercise_name": name,
+        "sets": str(item.get("sets", "")).strip() or "3",
+        "reps": str(item.get("reps", "")).strip() or "10-12",
+        "clinical_reason": str(item.get("clinical_reason", "")).strip(),
+    }
+
+
 def _normalize_workout_plan(items: list[dict[str, Any]]) -> list[dict[str, str]]:
     normalized: list[dict[str, str]] = []
     seen: set[str] = set()
 
     for item in items:
-        if not isinstance(item, dict):
+        exercise = _normalize_exercise(item)
+        if exercise is None:
             continue
-        name = str(item.get("exercise_name", "")).strip()
-        if not name:
-            continue
-        key = name.lower()
+        key = exercise["exercise_name"].lower()
         if key in seen:
             continue
         seen.add(key)
 
-        normalized.append(
-            {
-                "exercise_name": name,
-                "sets": str(item.get("sets", "")).strip() or "3",
-                "reps": str(item.get("reps", "")).strip() or "10-12",
-                "clinical_reason": str(item.get("clinical_reason", "")).strip(),
-            }
-        )
+        normalized.append(exercise)
 
         if len(normalized) == 5:
             break
@@ -66,145 +81,432 @@ def _parse_model_json(content: str) -> dict[str, Any]:
     return json.loads(json_text)
 
 
-def generate_workout_plan(student_profile: dict[str, Any], clinical_analysis: str, language: str = "en") -> dict[str, Any]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        raise RuntimeError("OPENAI_API_KEY is not configured.")
+PLAN_MODEL = "gpt-5-mini"
+MAX_TOOL_ITERATIONS = 6
+PLAN_JSON_SCHEMA_HINT = '{"workout_plan":[{"exercise_name":"...","sets":"...","reps":"...","clinical_reason":"..."}]}'
 
-    client = OpenAI(api_key=api_key)
-    output_language = "Portuguese (Brazil)" if language == "pt" else "English"
+# "catalog" grounds the plan on the bundled exercise catalog; "web" keeps the original live scraping.
+EXERCISE_SOURCE = os.getenv("EXERCISE_SOURCE", "catalog").strip().lower()
 
-    tools = [
-        {
-            "type": "function",
-            "function": {
-                "name": "fetch_pilates_exercises",
-                "description": "Fetches and summarizes Pilates exercises from curated web URLs.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "urls": {
-                            "type": "array",
-                            "items": {"type": "string"},
-                            "description": "Optional list of URLs to scrape. If omitted, default URLs are used.",
-                        }
-                    },
-                    "required": [],
-                    "additionalProperties": False,
+CATALOG_TOOL = {
+    "type": "function",
+    "function": {
+        "name": "search_exercise_catalog",
+        "description": (
+            "Returns Pilates exercises from the local catalog ranked by relevance to the given postural deviations, "
+            "excluding exercises contraindicated by the student's medical notes."
+        ),
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "deviations": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Detected postural deviations to address, e.g. 'Forward Head Posture'.",
+                },
+                "limit": {
+                    "type": "integer",
+                    "description": "Maximum number of exercises to return (default 12).",
                 },
             },
-        }
-    ]
+            "required": ["deviations"],
+            "additionalProperties": False,
+        },
+    },
+}
+
+WEB_TOOLS = [
+    {
+        "type": "function",
+        "function": {
+            "name": "fetch_pilates_exercises",
+            "description": "Fetches and summarizes Pilates exercises from curated web URLs.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "urls": {
+                        "type": "array",
+                        "items": {"type": "string"},
+                        "description": "Optional list of URLs to scrape. If omitted, default URLs are used.",
+                    }
+                },
+                "required": [],
+                "additionalProperties": False,
+            },
+        },
+    }
+]
 
-    messages: list[dict[str, Any]] = [
+PLAN_TOOLS = [CATALOG_TOOL] if EXERCISE_SOURCE == "catalog" else WEB_TOOLS
+FIRST_TOOL_NAME = PLAN_TOOLS[0]["function"]["name"]
+
+
+def _initial_messages(context: PrescriptionContext, language: str, allow_tools: bool = True) -> list[dict[str, Any]]:
+    output_language = "Portuguese (Brazil)" if language == "pt" else "English"
+    if context.catalog_text:
+        # The relevant catalog passages are already in the prompt, which saves the forced tool round trip.
+        instructions = (
+            "You are a Clinical Pilates Instructor. Prescribe exactly 5 distinct exercises from the catalog "
+            "exercises provided, based on the patient profile and the clinical analysis. "
+        )
+        if allow_tools:
+            instructions += f"Call {FIRST_TOOL_NAME} only if none of the provided exercises are suitable. "
+        catalog_section = f"Catalog exercises:\n{context.catalog_text}\n\n"
+    else:
+        instructions = (
+            f"You are a Clinical Pilates Instructor. You must FIRST call the {FIRST_TOOL_NAME} tool to read "
+            "the available Pilates exercises. THEN prescribe exactly 5 distinct exercises based on the full "
+            "patient profile and the clinical analysis. "
+        )
+        catalog_section = ""
+
+    return [
         {
             "role": "system",
-            "content": (
-                "You are a Clinical Pilates Instructor. You must FIRST call the fetch_pilates_exercises tool to read "
-                "the Pilates exercises from the web. THEN prescribe exactly 5 distinct exercises based on the full "
-                "patient profile and the clinical analysis. "
-                f"Write the entire final workout_plan in {output_language}."
-            ),
+            "content": instructions + f"Write the entire final workout_plan in {output_language}.",
         },
         {
             "role": "user",
             "content": (
-                f"Student profile:\n{json.dumps(student_profile, ensure_ascii=False)}\n\n"
-                f"Clinical analysis:\n{clinical_analysis}\n\n"
-                "Return only valid JSON with this structure: "
-                '{"workout_plan":[{"exercise_name":"...","sets":"...","reps":"...","clinical_reason":"..."}]}'
+                f"Student profile:\n{context.profile_text}\n\n"
+                f"Clinical analysis:\n{context.clinical_analysis}\n\n"
+                f"{catalog_section}"
+                f"Return only valid JSON with this structure: {PLAN_JSON_SCHEMA_HINT}"
             ),
         },
     ]
 
-    # Force the first assistant turn to call the scraper tool.
-    force_first_tool_call = True
-    seen_tool_calls: set[str] = set()
-    max_iterations = 6
-
-    for _ in range(max_iterations):
-        completion = client.chat.completions.create(
-            model="gpt-5-mini",
-            #model="gpt-4o-mini",
-            #temperature=0.2,
-            messages=messages,
-            tools=tools,
-            response_format={"type": "json_object"} if not force_first_tool_call else None,
-            tool_choice=(
-                {"type": "function", "function": {"name": "fetch_pilates_exercises"}}
-                if force_first_tool_call
-                else "auto"
-            ),
+
+def _prepare_context(student_profile: dict[str, Any], clinical_analysis: str) -> PrescriptionContext:
+    return build_prescription_context(
+        student_profile,
+        clinical_analysis,
+        include_catalog=EXERCISE_SOURCE == "catalog",
+    )
+
+
+def _new_usage(context: PrescriptionContext) -> dict[str, int]:
+    return {
+        "prompt_tokens": 0,
+        "completion_tokens": 0,
+        "total_tokens": 0,
+        "llm_calls": 0,
+        "context_tokens_estimate": context.estimated_tokens,
+    }
+
+
+def _add_usage(usage: dict[str, int], completion: Any) -> None:
+    usage["llm_calls"] += 1
+    llm_requests.inc(agent="workout")
+    _add_reported_usage(usage, getattr(completion, "usage", None))
+
+
+def _add_reported_usage(usage: dict[str, int], reported: Any) -> None:
+    if reported is None:
+        return
+    record_llm_usage("workout", reported)
+    usage["prompt_tokens"] += reported.prompt_tokens or 0
+    usage["completion_tokens"] += reported.completion_tokens or 0
+    usage["total_tokens"] += reported.total_tokens or 0
+
+
+def _completion_kwargs(messages: list[dict[str, Any]], force_first_tool_call: bool) -> dict[str, Any]:
+    return {
+        "model": PLAN_MODEL,
+        #"model": "gpt-4o-mini",
+        #"temperature": 0.2,
+        "messages": messages,
+        "tools": PLAN_TOOLS,
+        "response_format": {"type": "json_object"} if not force_first_tool_call else None,
+        "tool_choice": (
+            {"type": "function", "function": {"name": FIRST_TOOL_NAME}}
+            if force_first_tool_call
+            else "auto"
+        ),
+    }
+
+
+def _retry_kwargs(messages: list[dict[str, Any]], invalid_content: str | None) -> dict[str, Any]:
+    # Retry once with explicit "no tools" and strict JSON response
+    retry_messages = messages + [
+        {"role": "assistant", "content": invalid_content or ""},
+        {
+            "role": "user",
+            "content": f"Your previous answer was invalid. Return ONLY valid JSON with this schema: {PLAN_JSON_SCHEMA_HINT}",
+        },
+    ]
+    return {
+        "model": PLAN_MODEL,
+        "messages": retry_messages,
+        "response_format": {"type": "json_object"},
+        "tool_choice": "none",
+    }
+
+
+def _parse_retry_content(retry_content: str) -> dict[str, Any]:
+    try:
+        return _parse_model_json(retry_content)
+    except json.JSONDecodeError as retry_exc:
+        preview = (retry_content or "").strip()[:300]
+        raise RuntimeError(
+            f"Model returned invalid JSON after retry: {retry_exc}. Raw preview: {preview}"
+        ) from retry_exc
+
+
+def _plan_from_parsed(parsed: dict[str, Any], usage: dict[str, int]) -> dict[str, Any]:
+    raw_plan = parsed.get("workout_plan", [])
+    if not isinstance(raw_plan, list):
+        raise RuntimeError("Invalid workout_plan format returned by model.")
+    return {"workout_plan": _normalize_workout_plan(raw_plan), "usage": usage}
+
+
+def _execute_tool(name: str, arguments: str | None, student_profile: dict[str, Any]) -> str:
+    args = json.loads(arguments or "{}")
+    if name == "search_exercise_catalog":
+        deviations = args.get("deviations") or student_profile.get("latest_detected_deviations") or []
+        limit = args.get("limit") if isinstance(args.get("limit"), int) else 12
+        return search_exercise_catalog(
+            deviations,
+            medical_notes=str(student_profile.get("medical_notes", "")),
+            limit=max(1, min(limit, 25)),
+        )
+    if name == "fetch_pilates_exercises":
+        return fetch_pilates_exercises(urls=args.get("urls"))
+    return "Unknown tool."
+
+
+def _run_tool_calls(
+    messages: list[dict[str, Any]], message: Any, seen_tool_calls: set[str], student_profile: dict[str, Any]
+) -> None:
+    tool_calls = message.tool_calls or []
+    messages.append(
+        {
+            "role": "assistant",
+            "content": message.content or "",
+            "tool_calls": [tc.model_dump() for tc in tool_calls],
+        }
+    )
+
+    for tool_call in tool_calls:
+        call_sig = f"{tool_call.function.name}:{tool_call.function.arguments or ''}"
+        if call_sig in seen_tool_calls:
+            continue
+        seen_tool_calls.add(call_sig)
+
+        # Tool output is resent on every later iteration, so it is capped to its own token budget.
+        tool_result = fit_to_budget(
+            _execute_tool(tool_call.function.name, tool_call.function.arguments, student_profile),
+            PLAN_TOOL_RESULT_TOKEN_BUDGET,
         )
-        force_first_tool_call = False
-
-        message = completion.choices[0].message
-        tool_calls = message.tool_calls or []
-
-        if not tool_calls:
-            content = message.content or "{}"
-            try:
-                parsed = _parse_model_json(content)
-            except json.JSONDecodeError as exc:
-                # Retry once with explicit "no tools" and strict JSON response
-                retry_messages = messages + [
-                    {"role": "assistant", "content": message.content or ""},
-                    {
-                        "role": "user",
-                        "content": (
-                            "Your previous answer was invalid. Return ONLY valid JSON with this schema: "
-                            '{"workout_plan":[{"exercise_name":"...","sets":"...","reps":"...","clinical_reason":"..."}]}'
-                        ),
-                    },
-                ]
-                retry = client.chat.completions.create(
-                    model="gpt-5-mini",
-                    #model="gpt-4o-mini",
-                    #temperature=0.2,
-                    messages=retry_messages,
-                    response_format={"type": "json_object"},
-                    tool_choice="none",
-                )
-                retry_content = retry.choices[0].message.content or ""
-                try:
-                    parsed = _parse_model_json(retry_content)
-                except json.JSONDecodeError as retry_exc:
-                    preview = (retry_content or "").strip()[:300]
-                    raise RuntimeError(
-                        f"Model returned invalid JSON after retry: {retry_exc}. Raw preview: {preview}"
-                    ) from retry_exc
-            raw_plan = parsed.get("workout_plan", [])
-            if not isinstance(raw_plan, list):
-                raise RuntimeError("Invalid workout_plan format returned by model.")
-            return {"workout_plan": _normalize_workout_plan(raw_plan)}
 
         messages.append(
             {
-                "role": "assistant",
-                "content": message.content or "",
-                "tool_calls": [tc.model_dump() for tc in tool_calls],
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": tool_result,
             }
         )
 
-        for tool_call in tool_calls:
-            call_sig = f"{tool_call.function.name}:{tool_call.function.arguments or ''}"
-            if call_sig in seen_tool_calls:
+
+def generate_workout_plan(student_profile: dict[str, Any], clinical_analysis: str, language: str = "en") -> dict[str, Any]:
+    with span("workout_plan"):
+        client = get_openai_client()
+        context = _prepare_context(student_profile, clinical_analysis)
+        messages = _initial_messages(context, language)
+        usage = _new_usage(context)
+
+        # Without catalog passages in the prompt, force the first assistant turn to call the lookup tool.
+        force_first_tool_call = not context.catalog_text
+        seen_tool_calls: set[str] = set()
+
+        for _ in range(MAX_TOOL_ITERATIONS):
+            with span("llm.workout"):
+                completion = client.chat.completions.create(**_completion_kwargs(messages, force_first_tool_call))
+            _add_usage(usage, completion)
+            force_first_tool_call = False
+
+            message = completion.choices[0].message
+            if not message.tool_calls:
+                try:
+                    parsed = _parse_model_json(message.content or "{}")
+                except json.JSONDecodeError:
+                    llm_retries.inc(agent="workout")
+                    with span("llm.workout_retry"):
+                        retry = client.chat.completions.create(**_retry_kwargs(messages, message.content))
+                    _add_usage(usage, retry)
+                    parsed = _parse_retry_content(retry.choices[0].message.content or "")
+                return _plan_from_parsed(parsed, usage)
+
+            with span("tool_iteration"):
+                _run_tool_calls(messages, message, seen_tool_calls, student_profile)
+
+        raise RuntimeError("Exceeded tool-calling iterations while generating workout plan.")
+
+
+async def generate_workout_plan_async(
+    student_profile: dict[str, Any], clinical_analysis: str, language: str = "en"
+) -> dict[str, Any]:
+    with span("workout_plan"):
+        client = get_async_openai_client()
+        context = _prepare_context(student_profile, clinical_analysis)
+        messages = _initial_messages(context, language)
+        usage = _new_usage(context)
+
+        force_first_tool_call = not context.catalog_text
+        seen_tool_calls: set[str] = set()
+
+        for _ in range(MAX_TOOL_ITERATIONS):
+            with span("llm.workout"):
+                completion = await client.chat.completions.create(
+                    **_completion_kwargs(messages, force_first_tool_call)
+                )
+            _add_usage(usage, completion)
+            force_first_tool_call = False
+
+            message = completion.choices[0].message
+            if not message.tool_calls:
+                try:
+                    parsed = _parse_model_json(message.content or "{}")
+                except json.JSONDecodeError:
+                    llm_retries.inc(agent="workout")
+                    with span("llm.workout_retry"):
+                        retry = await client.chat.completions.create(**_retry_kwargs(messages, message.content))
+                    _add_usage(usage, retry)
+                    parsed = _parse_retry_content(retry.choices[0].message.content or "")
+                return _plan_from_parsed(parsed, usage)
+
+            # Tools may do blocking I/O (the web scraper), so they run off the event loop.
+            with span("tool_iteration"):
+                await asyncio.to_thread(_run_tool_calls, messages, message, seen_tool_calls, student_profile)
+
+        raise RuntimeError("Exceeded tool-calling iterations while generating workout plan.")
+
+
+# Pulls complete exercise objects out of a partially streamed {"workout_plan": [...]} document.
+class _StreamingPlanParser:
+    _ARRAY_START = re.compile(r'"workout_plan"\s*:\s*\[')
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._position = -1
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start = -1
+        self._finished = False
+
+    def feed(self, text: str) -> list[dict[str, Any]]:
+        self._buffer += text
+        if self._finished:
+            return []
+        if self._position < 0:
+            match = self._ARRAY_START.search(self._buffer)
+            if not match:
+                return []
+            self._position = match.end()
+
+        items: list[dict[str, Any]] = []
+        buffer = self._buffer
+        while self._position < len(buffer):
+            char = buffer[self._position]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char in "{[":
+                if self._depth == 0:
+                    self._item_start = self._position
+                self._depth += 1
+            elif char in "}]":
+                if self._depth == 0:
+                    self._finished = True
+                    break
+                self._depth -= 1
+                if self._depth == 0 and self._item_start >= 0:
+                    try:
+                        item = json.loads(buffer[self._item_start : self._position + 1])
+                    except json.JSONDecodeError:
+                        item = None
+                    if isinstance(item, dict):
+                        items.append(item)
+                    self._item_start = -1
+            self._position += 1
+        return items
+
+
+# Yields {"event", "data"} dicts: status updates, each exercise as soon as it parses, then "done". A "reset"
+# event tells the client to drop the exercises received so far, which are then sent again from index 0.
+async def stream_workout_plan(
+    student_profile: dict[str, Any], clinical_analysis: str, language: str = "en"
+) -> AsyncIterator[dict[str, Any]]:
+    client = get_async_openai_client()
+    context = await asyncio.to_thread(_prepare_context, student_profile, clinical_analysis)
+    if not context.catalog_text:
+        # A streamed completion cannot pause for a tool round trip, so the scraped passages go in the prompt.
+        scraped = fit_to_budget(await asyncio.to_thread(fetch_pilates_exercises), PLAN_TOOL_RESULT_TOKEN_BUDGET)
+        context = replace(
+            context, catalog_text=scraped, estimated_tokens=context.estimated_tokens + estimate_tokens(scraped)
+        )
+    yield {
+        "event": "status",
+        "data": {"stage": "catalog_loaded", "source": EXERCISE_SOURCE, "catalog_exercises": context.catalog_exercises},
+    }
+
+    messages = _initial_messages(context, language, allow_tools=False)
+    usage = _new_usage(context)
+    stream = await client.chat.completions.create(
+        model=PLAN_MODEL,
+        messages=messages,
+        response_format={"type": "json_object"},
+        stream=True,
+        stream_options={"include_usage": True},
+    )
+    usage["llm_calls"] += 1
+    llm_requests.inc(agent="workout")
+    yield {"event": "status", "data": {"stage": "model_thinking"}}
+
+    parser = _StreamingPlanParser()
+    content_parts: list[str] = []
+    emitted: list[str] = []
+    async for chunk in stream:
+        _add_reported_usage(usage, getattr(chunk, "usage", None))
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        content_parts.append(delta)
+        for item in parser.feed(delta):
+            exercise = _normalize_exercise(item)
+            if exercise is None or len(emitted) == 5 or exercise["exercise_name"].lower() in emitted:
                 continue
-            seen_tool_calls.add(call_sig)
-
-            if tool_call.function.name != "fetch_pilates_exercises":
-                tool_result = "Unknown tool."
-            else:
-                args = json.loads(tool_call.function.arguments or "{}")
-                urls = args.get("urls")
-                tool_result = fetch_pilates_exercises(urls=urls)
-
-            messages.append(
-                {
-                    "role": "tool",
-                    "tool_call_id": tool_call.id,
-                    "content": tool_result,
-                }
-            )
-
-    raise RuntimeError("Exceeded tool-calling iterations while generating workout plan.")
+            emitted.append(exercise["exercise_name"].lower())
+            yield {"event": "exercise", "data": {"index": len(emitted) - 1, **exercise}}
+
+    content = "".join(content_parts)
+    try:
+        result = _plan_from_parsed(_parse_model_json(content), usage)
+    except (json.JSONDecodeError, RuntimeError):
+        retry_kwargs = _retry_kwargs(messages, content)
+        # No tools were offered on the streamed call, so tool_choice has nothing to refer to.
+        retry_kwargs.pop("tool_choice")
+        llm_retries.inc(agent="workout")
+        with span("llm.workout_retry"):
+            retry = await client.chat.completions.create(**retry_kwargs)
+        _add_usage(usage, retry)
+        result = _plan_from_parsed(_parse_retry_content(retry.choices[0].message.content or ""), usage)
+
+    # The final plan is authoritative. When the streamed exercises are not its first items, as after a retry,
+    # the client discards them and receives the whole plan; otherwise only the missing tail follows.
+    plan = result["workout_plan"]
+    if emitted != [exercise["exercise_name"].lower() for exercise in plan[: len(emitted)]]:
+        yield {"event": "reset", "data": {"reason": "plan_replaced"}}
+        emitted = []
+    for index in range(len(emitted), len(plan)):
+        yield {"event": "exercise", "data": {"index": index, **plan[index]}}
+    yield {"event": "done", "data": result}
@@ -0,0 +1,265 @@
+from __future__ import annotations
+
+import base64
+import json
+import math
+import os
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import bindparam, case, null, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from tools.posture_tools import LANDMARK_BLOB_COLUMNS, NUM_POSE_LANDMARKS, landmarks_payload
+import models
+
+# Blob layouts are positional, so these tuples are append-only: new metrics go at the end and older
+# rows simply unpack to fewer values.
+ANGLE_METRICS = (
+    "shoulder_tilt_deg",
+    "pelvic_tilt_deg",
+    "head_tilt_deg",
+    "shoulder_rotation_cm",
+    "pelvic_rotation_cm",
+    "head_protraction_deg",
+    "trunk_inclination_deg",
+    "shoulder_mid_z_cm",
+    "ear_mid_z_cm",
+)
+JOINT_METRICS = (
+    "left_elbow_deg",
+    "right_elbow_deg",
+    "left_knee_deg",
+    "right_knee_deg",
+    "left_ankle_deg",
+    "right_ankle_deg",
+)
+METRIC_KEYS = ANGLE_METRICS + JOINT_METRICS
+
+PROGRESS_EMA_ALPHA = min(1.0, max(0.01, float(os.getenv("PROGRESS_EMA_ALPHA", "0.3"))))
+SLOPE_PERIOD_DAYS = 30.0
+
+# Blobs written before the image visibility was stored separately: image x, y, then world x, y, z and
+# the world visibility, which also served as the image visibility (33 x 6 float32 = 792 bytes).
+LEGACY_LANDMARK_COLUMNS = ("x", "y", "world_x", "world_y", "world_z", "visibility")
+
+
+def pack_metrics(angles: dict[str, float], joint_angles: dict[str, float] | None = None) -> bytes:
+    values = {**(joint_angles or {}), **angles}
+    # Metrics outside the detected view are stored as NaN.
+    return np.array(
+        [values[key] if values.get(key) is not None else math.nan for key in METRIC_KEYS], dtype=np.float32
+    ).tobytes()
+
+
+def unpack_metrics(blob: bytes) -> tuple[dict[str, float], dict[str, float]]:
+    values = np.frombuffer(blob, dtype=np.float32).astype(np.float64)
+    angles: dict[str, float] = {}
+    joint_angles: dict[str, float] = {}
+    for key, value in zip(METRIC_KEYS, values):
+        if math.isnan(value):
+            continue
+        target = angles if key in ANGLE_METRICS else joint_angles
+        target[key] = round(float(value), 2)
+    return angles, joint_angles
+
+
+# Fallback for results that only carry the rounded payloads, such as posture data cached before
+# "landmarks_blob" existed; fresh results are stored from their full-precision blob.
+def pack_landmarks(landmarks_2d: list[dict[str, float]], landmarks_3d: list[dict[str, float]]) -> bytes | None:
+    if len(landmarks_2d) != NUM_POSE_LANDMARKS or len(landmarks_3d) != NUM_POSE_LANDMARKS:
+        return None
+    packed = np.array(
+        [
+            (
+                point_2d["x"],
+                point_2d["y"],
+                point_2d["visibility"],
+                point_3d["x"],
+                point_3d["y"],
+                point_3d["z"],
+                point_3d["visibility"],
+            )
+            for point_2d, point_3d in zip(landmarks_2d, landmarks_3d)
+        ],
+        dtype=np.float32,
+    )
+    return packed.tobytes()
+
+
+def unpack_landmarks(blob: bytes) -> tuple[list[dict[str, float]], list[dict[str, float]]]:
+    if len(blob) == NUM_POSE_LANDMARKS * len(LEGACY_LANDMARK_COLUMNS) * 4:
+        legacy = np.frombuffer(blob, dtype=np.float32).reshape(-1, len(LEGACY_LANDMARK_COLUMNS))
+        # The 2D payload has no z, so that slot is just filler.
+        points_2d = legacy[:, [0, 1, 0, 5]]
+        points_3d = legacy[:, [2, 3, 4, 5]]
+    else:
+        packed = np.frombuffer(blob, dtype=np.float32).reshape(-1, len(LANDMARK_BLOB_COLUMNS))
+        points_2d = packed[:, [0, 1, 0, 2]]
+        points_3d = packed[:, 3:]
+    return landmarks_payload(points_2d, include_z=False), landmarks_payload(points_3d, include_z=True)
+
+
+def _landmarks_blob(result: dict[str, object], packed_landmarks: str | None) -> bytes | None:
+    if packed_landmarks:
+        return base64.b64decode(packed_landmarks)
+    return pack_landmarks(result.get("landmarks_2d") or [], result.get("landmarks_3d") or [])
+
+
+def build_analysis_record(
+    student_id: int, result: dict[str, object], packed_landmarks: str | None = None
+) -> models.PostureAnalysis:
+    return models.PostureAnalysis(
+        student_id=student_id,
+        created_at=datetime.utcnow(),
+        detected_view=result.get("detected_view") or "",
+        analysis_source=result.get("analysis_source") or "llm",
+        metrics_blob=pack_metrics(result.get("angles") or {}, result.get("joint_angles") or {}),
+        landmarks_blob=_landmarks_blob(result, packed_landmarks),
+        detected_deviations=json.dumps(result.get("detected_deviations", []), ensure_ascii=False),
+        clinical_analysis=result.get("clinical_analysis", ""),
+    )
+
+
+def serialize_analysis(record: models.PostureAnalysis, include_landmarks: bool = False) -> dict[str, object]:
+    angles, joint_angles = unpack_metrics(record.metrics_blob)
+    payload: dict[str, object] = {
+        "id": record.id,
+        "student_id": record.student_id,
+        "created_at": record.created_at,
+        "detected_view": record.detected_view,
+        "analysis_source": record.analysis_source,
+        "angles": angles,
+        "joint_angles": joint_angles,
+        "detected_deviations": json.loads(record.detected_deviations or "[]"),
+        "clinical_analysis": record.clinical_analysis,
+    }
+    if include_landmarks and record.landmarks_blob:
+        payload["landmarks_2d"], payload["landmarks_3d"] = unpack_landmarks(record.landmarks_blob)
+    return payload
+
+
+_stats_table = models.StudentMetricStats.__table__
+_insert_missing_stats = sqlite_insert(_stats_table).on_conflict_do_nothing()
+# Every column is updated from its own previous value, so concurrent analyses cannot lose an update. The
+# insert seeds last_value with the first measurement, so there is no previous value until the second one.
+_update_stats = (
+    update(_stats_table)
+    .where(_stats_table.c.student_id == bindparam("b_student_id"), _stats_table.c.metric == bindparam("b_metric"))
+    .values(
+        n=_stats_table.c.n + 1,
+        sum_t=_stats_table.c.sum_t + bindparam("t"),
+        sum_y=_stats_table.c.sum_y + bindparam("y"),
+        sum_tt=_stats_table.c.sum_tt + bindparam("tt"),
+        sum_ty=_stats_table.c.sum_ty + bindparam("ty"),
+        sum_yy=_stats_table.c.sum_yy + bindparam("yy"),
+        ema=_stats_table.c.ema + PROGRESS_EMA_ALPHA * (bindparam("y") - _stats_table.c.ema),
+        previous_value=case((_stats_table.c.n == 0, null()), else_=_stats_table.c.last_value),
+        last_value=bindparam("y"),
+        last_at=bindparam("measured_at"),
+    )
+)
+
+
+# Three statements per analysis whatever the number of metrics, so the write lock is held briefly.
+def update_metric_stats(db: Session, student_id: int, measured_at: datetime, values: dict[str, float]) -> None:
+    measured = {metric: float(value) for metric, value in values.items() if metric in METRIC_KEYS and value is not None}
+    if not measured:
+        return
+    db.execute(
+        _insert_missing_stats,
+        [
+            {
+                "student_id": student_id,
+                "metric": metric,
+                "n": 0,
+                "origin_at": measured_at,
+                "last_at": measured_at,
+                "first_value": value,
+                "last_value": value,
+                "ema": value,
+            }
+            for metric, value in measured.items()
+        ],
+    )
+    origins = dict(
+        db.execute(
+            select(_stats_table.c.metric, _stats_table.c.origin_at).where(
+                _stats_table.c.student_id == student_id, _stats_table.c.metric.in_(measured)
+            )
+        ).all()
+    )
+    updates = []
+    for metric, value in measured.items():
+        t = (measured_at - origins[metric]).total_seconds() / 86400.0
+        updates.append(
+            {
+                "b_student_id": student_id,
+                "b_metric": metric,
+                "t": t,
+                "y": value,
+                "tt": t * t,
+                "ty": t * value,
+                "yy": value * value,
+                "measured_at": measured_at,
+            }
+        )
+    db.execute(_update_stats, updates)
+
+
+# `packed_landmarks` is the posture data's "landmarks_blob", which the pipeline result does not carry.
+def record_analysis(
+    db: Session, student_id: int, result: dict[str, object], packed_landmarks: str | None = None
+) -> models.PostureAnalysis:
+    record = build_analysis_record(student_id, result, packed_landmarks)
+    db.add(record)
+    update_metric_stats(
+        db, student_id, record.created_at, {**(result.get("joint_angles") or {}), **(result.get("angles") or {})}
+    )
+    return record
+
+
+# Replays the stored analyses into empty running aggregates; returns the number of analyses replayed.
+def rebuild_metric_stats(db: Session) -> int:
+    if db.execute(select(models.StudentMetricStats.student_id).limit(1)).first() is not None:
+        return 0
+    rows = db.execute(
+        select(
+            models.PostureAnalysis.student_id,
+            models.PostureAnalysis.created_at,
+            models.PostureAnalysis.metrics_blob,
+        ).order_by(models.PostureAnalysis.created_at, models.PostureAnalysis.id)
+    ).all()
+    for student_id, created_at, metrics_blob in rows:
+        angles, joint_angles = unpack_metrics(metrics_blob)
+        update_metric_stats(db, student_id, created_at, {**joint_angles, **angles})
+    db.commit()
+    return len(rows)
+
+
+def summarize_metric_stats(row: models.StudentMetricStats) -> dict[str, object]:
+    n = row.n
+    slope = None
+    if n >= 2:
+        denominator = n * row.sum_tt - row.sum_t * row.sum_t
+        # Analyses taken within the same instant give no time spread to fit a slope on.
+        if denominator > 1e-9 * max(1.0, n * row.sum_tt):
+            slope = (n * row.sum_ty - row.sum_t * row.sum_y) / denominator * SLOPE_PERIOD_DAYS
+    mean = row.sum_y / n if n else row.last_value
+    variance = max(0.0, row.sum_yy / n - mean * mean) if n else 0.0
+    return {
+        "metric": row.metric,
+        "count": n,
+        "first_at": row.origin_at,
+        "last_at": row.last_at,
+        "first_value": round(row.first_value, 2),
+        "last_value": round(row.last_value, 2),
+        "delta_total": round(row.last_value - row.first_value, 2),
+        # Rows written before the first update left previous_value empty carry a copy of last_value at n == 1.
+        "delta_last": None if n < 2 or row.previous_value is None else round(row.last_value - row.previous_value, 2),
+        "mean": round(mean, 2),
+        "std": round(math.sqrt(variance), 2),
+        "ema": round(row.ema, 2),
+        "slope_per_30_days": None if slope is None else round(slope, 3),
+    }
@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+
+APPOINTMENT_INTERVAL_INDEX = os.getenv("APPOINTMENT_INTERVAL_INDEX", "1") == "1"
+# Writes from this process are applied to the cached schedules; the age limit bounds how long writes made by
+# other worker processes can go unseen by the free-slot lookups.
+APPOINTMENT_INDEX_MAX_AGE = max(0.0, float(os.getenv("APPOINTMENT_INDEX_MAX_AGE", "60")))
+
+IntervalRow = tuple[int, datetime, datetime]
+
+
+# SQLite stores DateTime columns without an offset, so aware payload values are compared the same way.
+def naive(value: datetime) -> datetime:
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+# One instructor's appointments sorted by start time. max_ends[i] is the latest end among the first
+# i + 1 appointments; it never decreases, so a bisect on it finds the first appointment that can still
+# reach a given instant and everything before it can be skipped.
+@dataclass
+class InstructorSchedule:
+    starts: list[datetime] = field(default_factory=list)
+    ends: list[datetime] = field(default_factory=list)
+    ids: list[int] = field(default_factory=list)
+    max_ends: list[datetime] = field(default_factory=list)
+
+    @classmethod
+    def from_rows(cls, rows: list[IntervalRow]) -> InstructorSchedule:
+        schedule = cls()
+        latest_end: datetime | None = None
+        for appointment_id, start_time, end_time in sorted(rows, key=lambda row: (row[1], row[0])):
+            latest_end = end_time if latest_end is None else max(latest_end, end_time)
+            schedule.ids.append(appointment_id)
+            schedule.starts.append(start_time)
+            schedule.ends.append(end_time)
+            schedule.max_ends.append(latest_end)
+        return schedule
+
+    def _copy(self) -> InstructorSchedule:
+        return InstructorSchedule(list(self.starts), list(self.ends), list(self.ids), list(self.max_ends))
+
+    def _recompute_max_ends(self, first: int) -> None:
+        latest_end = self.max_ends[first - 1] if first > 0 else None
+        del self.max_ends[first:]
+        for end_time in self.ends[first:]:
+            latest_end = end_time if latest_end is None else max(latest_end, end_time)
+            self.max_ends.append(latest_end)
+
+    # Schedules are shared between request threads, so changes return an updated copy instead of mutating.
+    # Only the max_ends after the first changed position are recomputed.
+    def with_added(self, rows: Iterable[IntervalRow]) -> InstructorSchedule:
+        schedule = self._copy()
+        first = len(schedule.ids)
+        for appointment_id, start_time, end_time in rows:
+            index = bisect_right(schedule.starts, start_time)
+            schedule.starts.insert(index, start_time)
+            schedule.ends.insert(index, end_time)
+            schedule.ids.insert(index, appointment_id)
+            first = min(first, index)
+        schedule._recompute_max_ends(first)
+        return schedule
+
+    def without(self, appointment_id: int, start_time: datetime) -> InstructorSchedule:
+        index = bisect_left(self.starts, start_time)
+        while index < len(self.ids) and self.starts[index] == start_time and self.ids[index] != appointment_id:
+            index += 1
+        if index >= len(self.ids) or self.ids[index] != appointment_id:
+            if appointment_id not in self.ids:
+                return self
+            index = self.ids.index(appointment_id)
+        schedule = self._copy()
+        del schedule.starts[index], schedule.ends[index], schedule.ids[index]
+        schedule._recompute_max_ends(index)
+        return schedule
+
+    def _span(self, start: datetime, end: datetime) -> range:
+        # Appointments that start before `end` and whose running max end passes `start`.
+        return range(bisect_right(self.max_ends, start), bisect_left(self.starts, end))
+
+    def find_overlap(self, start: datetime, end: datetime, exclude_id: int | None = None) -> int | None:
+        for index in self._span(start, end):
+            if self.ends[index] > start and self.ids[index] != exclude_id:
+                return self.ids[index]
+        return None
+
+    def busy(self, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+        return [
+            (self.starts[index], self.ends[index]) for index in self._span(start, end) if self.ends[index] > start
+        ]
+
+
+def free_intervals(
+    busy: list[tuple[datetime, datetime]], start: datetime, end: datetime, min_duration: timedelta
+) -> list[tuple[datetime, datetime]]:
+    slots: list[tuple[datetime, datetime]] = []
+    cursor = start
+    for busy_start, busy_end in sorted(busy):
+        if busy_start > cursor and busy_start - cursor >= min_duration:
+            slots.append((cursor, busy_start))
+        cursor = max(cursor, busy_end)
+        if cursor >= end:
+            return slots
+    if end > cursor and end - cursor >= min_duration:
+        slots.append((cursor, end))
+    return slots
+
+
+# Per-instructor schedules are loaded on first use, then kept current by applying this process's committed
+# writes to them; they are reloaded once older than APPOINTMENT_INDEX_MAX_AGE. Every change bumps the
+# instructor's generation, so a load that raced with a write is returned but not cached.
+class AppointmentIntervalIndex:
+    def __init__(self, max_age: float = APPOINTMENT_INDEX_MAX_AGE) -> None:
+        self.max_age = max_age
+        self._schedules: dict[int, InstructorSchedule] = {}
+        self._loaded_at: dict[int, float] = {}
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._loads = 0
+        self._hits = 0
+        self._updates = 0
+
+    def schedule(self, db: Session, instructor_id: int) -> InstructorSchedule:
+        with self._lock:
+            cached = self._schedules.get(instructor_id)
+            if cached is not None and time.monotonic() - self._loaded_at[instructor_id] < self.max_age:
+                self._hits += 1
+                return cached
+            generation = self._generations.get(instructor_id, 0)
+
+        # Served entirely from ix_appointments_instructor_interval, without touching the table rows.
+        rows = db.execute(
+            select(models.Appointment.id, models.Appointment.start_time, models.Appointment.end_time).where(
+                models.Appointment.instructor_id == instructor_id
+            )
+        ).all()
+        schedule = InstructorSchedule.from_rows([tuple(row) for row in rows])
+        with self._lock:
+            self._loads += 1
+            if self._generations.get(instructor_id, 0) == generation:
+                self._schedules[instructor_id] = schedule
+                self._loaded_at[instructor_id] = time.monotonic()
+        return schedule
+
+    def _apply(self, instructor_id: int, change: Callable[[InstructorSchedule], InstructorSchedule]) -> None:
+        with self._lock:
+            self._generations[instructor_id] = self._generations.get(instructor_id, 0) + 1
+            cached = self._schedules.get(instructor_id)
+            if cached is not None:
+                self._schedules[instructor_id] = change(cached)
+                self._updates += 1
+
+    def added(self, instructor_id: int, rows: list[IntervalRow]) -> None:
+        rows = [(appointment_id, naive(start), naive(end)) for appointment_id, start, end in rows]
+        self._apply(instructor_id, lambda schedule: schedule.with_added(rows))
+
+    def removed(self, instructor_id: int, appointment_id: int, start_time: datetime) -> None:
+        self._apply(instructor_id, lambda schedule: schedule.without(appointment_id, naive(start_time)))
+
+    def invalidate(self, *instructor_ids: int) -> None:
+        with self._lock:
+            for instructor_id in instructor_ids:
+                self._schedules.pop(instructor_id, None)
+                self._generations[instructor_id] = self._generations.get(instructor_id, 0) + 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for instructor_id in list(self._schedules):
+                self._generations[instructor_id] = self._generations.get(instructor_id, 0) + 1
+            self._schedules.clear()
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "enabled": APPOINTMENT_INTERVAL_INDEX,
+                "max_age_seconds": self.max_age,
+                "instructors": len(self._schedules),
+                "appointments": sum(len(schedule.ids) for schedule in self._schedules.values()),
+                "loads": self._loads,
+                "hits": self._hits,
+                "updates": self._updates,
+            }
+
+
+appointment_index = AppointmentIntervalIndex()
+
+
+def _range_schedule(
+    db: Session, instructor_id: int, start: datetime, end: datetime, exclude_ids: Iterable[int] = ()
+) -> InstructorSchedule:
+    query = select(models.Appointment.id, models.Appointment.start_time, models.Appointment.end_time).where(
+        models.Appointment.instructor_id == instructor_id,
+        models.Appointment.start_time < end,
+        models.Appointment.end_time > start,
+    )
+    exclude_ids = list(exclude_ids)
+    if exclude_ids:
+        query = query.where(models.Appointment.id.not_in(exclude_ids))
+    return InstructorSchedule.from_rows([tuple(row) for row in db.execute(query).all()])
+
+
+# The cached schedule can still list an appointment another worker process has since moved or deleted, so a
+# conflict it reports is only trusted if the row still has the cached interval.
+def _still_current(db: Session, instructor_id: int, schedule: InstructorSchedule, conflict_ids: set[int]) -> bool:
+    if not conflict_ids:
+        return True
+    cached = {
+        (appointment_id, start, end)
+        for appointment_id, start, end in zip(schedule.ids, schedule.starts, schedule.ends)
+        if appointment_id in conflict_ids
+    }
+    stored = db.execute(
+        select(models.Appointment.id, models.Appointment.start_time, models.Appointment.end_time).where(
+            models.Appointment.id.in_(conflict_ids), models.Appointment.instructor_id == instructor_id
+        )
+    ).all()
+    return cached == {tuple(row) for row in stored}
+
+
+def find_conflict(
+    db: Session, instructor_id: int, start: datetime, end: datetime, exclude_id: int | None = None
+) -> int | None:
+    return find_conflicts(db, instructor_id, [(start, end)], exclude_id)[0]
+
+
+def busy_intervals(db: Session, instructor_id: int, start: datetime, end: datetime) -> list[tuple[datetime, datetime]]:
+    start, end = naive(start), naive(end)
+    if APPOINTMENT_INTERVAL_INDEX:
+        return appointment_index.schedule(db, instructor_id).busy(start, end)
+
+    rows = db.execute(
+        select(models.Appointment.start_time, models.Appointment.end_time)
+        .where(
+            models.Appointment.instructor_id == instructor_id,
+            models.Appointment.start_time < end,
+            models.Appointment.end_time > start,
+        )
+        .order_by(models.Appointment.start_time)
+    ).all()
+    return [tuple(row) for row in rows]
+
+
+# Checks many candidate intervals for one instructor; each result is the id of an existing appointment the
+# interval overlaps, or None. This is the fast pre-check before a write: the authority is
+# committed_conflicts, run inside the write transaction.
+def find_conflicts(
+    db: Session, instructor_id: int, intervals: list[tuple[datetime, datetime]], exclude_id: int | None = None
+) -> list[int | None]:
+    if not intervals:
+        return []
+    intervals = [(naive(start), naive(end)) for start, end in intervals]
+    if APPOINTMENT_INTERVAL_INDEX:
+        schedule = appointment_index.schedule(db, instructor_id)
+        conflicts = [schedule.find_overlap(start, end, exclude_id) for start, end in intervals]
+        if _still_current(db, instructor_id, schedule, {conflict for conflict in conflicts if conflict is not None}):
+            return conflicts
+        appointment_index.invalidate(instructor_id)
+        schedule = appointment_index.schedule(db, instructor_id)
+    else:
+        first_start = min(start for start, _ in intervals)
+        last_end = max(end for _, end in intervals)
+        schedule = _range_schedule(db, instructor_id, first_start, last_end)
+    return [schedule.find_overlap(start, end, exclude_id) for start, end in intervals]
+
+
+# Run after the new or moved appointments are flushed, in the same transaction. SQLite then holds the write
+# lock, so no other connection or process can commit an overlapping appointment before this one commits.
+def committed_conflicts(
+    db: Session, instructor_id: int, intervals: list[tuple[datetime, datetime]], exclude_ids: Iterable[int]
+) -> list[int | None]:
+    if not intervals:
+        return []
+    intervals = [(naive(start), naive(end)) for start, end in intervals]
+    first_start = min(start for start, _ in intervals)
+    last_end = max(end for _, end in intervals)
+    schedule = _range_schedule(db, instructor_id, first_start, last_end, exclude_ids)
+    return [schedule.find_overlap(start, end) for start, end in intervals]
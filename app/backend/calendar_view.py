@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from itertools import groupby
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+import models
+
+CALENDAR_CACHE_SIZE = max(0, int(os.getenv("CALENDAR_CACHE_SIZE", "128")))
+CALENDAR_MAX_DAYS = max(1, int(os.getenv("CALENDAR_MAX_DAYS", "92")))
+
+CalendarKey = tuple[datetime, datetime, int | None, int | None]
+
+
+# Rendered calendar responses keyed by their query. Any write that can change a calendar bumps the
+# version, which makes every stored entry stale at once without walking the cache.
+class CalendarCache:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[CalendarKey, tuple[int, bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def bump(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get(self, key: CalendarKey) -> tuple[bytes, str] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != self._version:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1], entry[2]
+
+    # `version` is read before the query runs, so a response built while a write landed is dropped.
+    def put(self, key: CalendarKey, version: int, body: bytes, etag: str) -> None:
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[key] = (version, body, etag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "version": self._version,
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+            }
+
+
+calendar_cache = CalendarCache(CALENDAR_CACHE_SIZE)
+
+
+def build_calendar(
+    db: Session, start: datetime, end: datetime, instructor_id: int | None = None, student_id: int | None = None
+) -> dict[str, object]:
+    appointment = models.Appointment
+    # Names come from the same joined statement, so the client needs no per-appointment lookups.
+    query = (
+        select(
+            appointment.id,
+            appointment.student_id,
+            appointment.instructor_id,
+            appointment.start_time,
+            appointment.end_time,
+            appointment.status,
+            appointment.notes,
+            appointment.created_at,
+            models.Student.name.label("student_name"),
+            models.Instructor.name.label("instructor_name"),
+        )
+        .join(models.Student, models.Student.id == appointment.student_id)
+        .join(models.Instructor, models.Instructor.id == appointment.instructor_id)
+        .where(appointment.start_time < end, appointment.end_time > start)
+        .order_by(appointment.start_time, appointment.id)
+    )
+    if instructor_id is not None:
+        query = query.where(appointment.instructor_id == instructor_id)
+    if student_id is not None:
+        query = query.where(appointment.student_id == student_id)
+
+    rows = [dict(row._mapping) for row in db.execute(query)]
+    days = [
+        {"date": day, "appointments": list(items)}
+        for day, items in groupby(rows, key=lambda row: row["start_time"].date())
+    ]
+    return {"start": start, "end": end, "total": len(rows), "days": days}
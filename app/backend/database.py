@@ -1,16 +1,99 @@
 from __future__ import annotations
 
 import os
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session, sessionmaker
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./pilates_vision_progress.db")
-engine_kwargs = {"connect_args": {"check_same_thread": False}} if DATABASE_URL.startswith("sqlite") else {}
+IS_SQLITE = DATABASE_URL.startswith("sqlite")
+# An in-memory database exists only inside its one connection, so it keeps SQLAlchemy's default pool
+# and has no separate read engine.
+IS_SQLITE_FILE = IS_SQLITE and make_url(DATABASE_URL).database not in {None, "", ":memory:"}
 
-engine = create_engine(DATABASE_URL, **engine_kwargs)
+# WAL lets readers run alongside the single writer; with it, synchronous=NORMAL only fsyncs at checkpoints,
+# which can lose the last commits on power loss but never corrupts the database.
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL").strip().upper()
+if SQLITE_JOURNAL_MODE not in {"WAL", "DELETE", "TRUNCATE", "PERSIST"}:
+    SQLITE_JOURNAL_MODE = "WAL"
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").strip().upper()
+if SQLITE_SYNCHRONOUS not in {"OFF", "NORMAL", "FULL", "EXTRA"}:
+    SQLITE_SYNCHRONOUS = "NORMAL"
+SQLITE_BUSY_TIMEOUT_MS = max(0, int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "10000")))
+SQLITE_MMAP_SIZE = max(0, int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))))
+SQLITE_CACHE_SIZE_KB = max(0, int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024))))
+
+# Sync endpoints run on a 40-thread pool, so the defaults let every thread hold a connection.
+DB_POOL_SIZE = max(1, int(os.getenv("DB_POOL_SIZE", "10")))
+DB_MAX_OVERFLOW = max(0, int(os.getenv("DB_MAX_OVERFLOW", "30")))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+def _engine_kwargs() -> dict[str, Any]:
+    if not IS_SQLITE:
+        return {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT}
+    kwargs: dict[str, Any] = {"connect_args": {"check_same_thread": False}}
+    if IS_SQLITE_FILE:
+        kwargs.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW, pool_timeout=DB_POOL_TIMEOUT)
+    return kwargs
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, read_only: bool) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        # The busy timeout goes first so switching the journal mode waits for a concurrent writer.
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if IS_SQLITE_FILE and not read_only:
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+
+engine = create_engine(DATABASE_URL, **_engine_kwargs())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+if IS_SQLITE:
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection: Any, _: Any) -> None:
+        _apply_sqlite_pragmas(dbapi_connection, read_only=False)
+
+
+# GET endpoints use their own pool of autocommit, query-only connections: no BEGIN/ROLLBACK per request,
+# no read transaction left open to hold back WAL checkpoints, and reads never wait for a connection
+# that a slow write is holding.
+if IS_SQLITE_FILE:
+    read_engine = create_engine(DATABASE_URL, isolation_level="AUTOCOMMIT", **_engine_kwargs())
+
+    @event.listens_for(read_engine, "connect")
+    def _on_read_connect(dbapi_connection: Any, _: Any) -> None:
+        _apply_sqlite_pragmas(dbapi_connection, read_only=True)
+
+else:
+    read_engine = engine
+
+ReadSessionLocal = sessionmaker(autoflush=False, expire_on_commit=False, bind=read_engine)
+
+
+def database_stats() -> dict[str, object]:
+    settings: dict[str, object] = {"pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW}
+    if IS_SQLITE:
+        with engine.connect() as connection:
+            for pragma in ("journal_mode", "synchronous", "busy_timeout", "mmap_size", "cache_size"):
+                settings[pragma] = connection.exec_driver_sql(f"PRAGMA {pragma}").scalar()
+    for name, pool in (("pool", engine.pool), ("read_pool", read_engine.pool)):
+        if hasattr(pool, "checkedout"):
+            settings[f"{name}_checked_out"] = pool.checkedout()
+    return settings
+
 
 def get_db() -> Session:
     db = SessionLocal()
@@ -18,3 +101,11 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+def get_read_db() -> Session:
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
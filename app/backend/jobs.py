@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import ipaddress
+import json
+import logging
+import os
+import queue
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable
+from urllib.parse import urlsplit
+
+import requests
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+import models
+from database import SessionLocal
+
+JOB_WORKERS = max(1, int(os.getenv("JOB_WORKERS", "2")))
+JOB_MAX_ATTEMPTS = max(1, int(os.getenv("JOB_MAX_ATTEMPTS", "3")))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "2"))
+JOB_CALLBACK_TIMEOUT = float(os.getenv("JOB_CALLBACK_TIMEOUT", "10"))
+# A running job whose lease has expired is assumed abandoned by a process that died, and is requeued by the
+# next process that starts. It has to outlast the slowest job, or that job can run twice.
+JOB_LEASE_SECONDS = max(1.0, float(os.getenv("JOB_LEASE_SECONDS", "900")))
+# When set, callbacks may only go to these hosts (which may then be internal); otherwise any host that
+# resolves exclusively to public addresses is accepted.
+JOB_CALLBACK_ALLOWED_HOSTS = frozenset(
+    host.strip().lower() for host in os.getenv("JOB_CALLBACK_ALLOWED_HOSTS", "").split(",") if host.strip()
+)
+
+JobHandler = Callable[[dict[str, Any], bytes | None], dict[str, Any]]
+
+logger = logging.getLogger(__name__)
+
+
+# Callbacks carry clinical results, so they are refused for non-http(s) URLs and for hosts that resolve to
+# private, loopback, link-local or otherwise non-public addresses. Raises ValueError.
+def validate_callback_url(callback_url: str | None) -> str | None:
+    if not callback_url:
+        return None
+    parsed = urlsplit(callback_url)
+    if parsed.scheme not in {"http", "https"} or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http or https URL.")
+    host = parsed.hostname.lower()
+    if JOB_CALLBACK_ALLOWED_HOSTS:
+        if host not in JOB_CALLBACK_ALLOWED_HOSTS:
+            raise ValueError(f"callback_url host '{host}' is not in JOB_CALLBACK_ALLOWED_HOSTS.")
+        return callback_url
+
+    port = parsed.port or (443 if parsed.scheme == "https" else 80)
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, port, proto=socket.IPPROTO_TCP)}
+    except (OSError, UnicodeError) as exc:
+        raise ValueError(f"callback_url host '{host}' could not be resolved.") from exc
+    for address in addresses:
+        if not ipaddress.ip_address(address.split("%", 1)[0]).is_global:
+            raise ValueError("callback_url must not point to a private, loopback or reserved address.")
+    return callback_url
+
+
+def serialize_job(job: models.Job) -> dict[str, Any]:
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "attempts": job.attempts,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error or "",
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "finished_at": job.finished_at,
+    }
+
+
+# Jobs are persisted in the application database and executed by in-process worker threads, so queued
+# work survives a restart and slow LLM calls never occupy request threads. Several processes can share the
+# table: a job only runs in the process whose conditional UPDATE moved it from queued to running.
+class JobQueue:
+    def __init__(self, workers: int, max_attempts: int, retry_backoff: float, lease_seconds: float) -> None:
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._pending: queue.Queue[str | None] = queue.Queue()
+        self._handlers: dict[str, JobHandler] = {}
+        self._threads: list[threading.Thread] = []
+        self._timers: set[threading.Timer] = set()
+        self._lock = threading.Lock()
+        self._running = 0
+        self._retries = 0
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(models.Job)
+                .where(
+                    models.Job.status == "running",
+                    or_(models.Job.lease_expires_at.is_(None), models.Job.lease_expires_at < datetime.utcnow()),
+                )
+                .values(status="queued", owner=None, lease_expires_at=None)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+            queued = db.scalars(
+                select(models.Job.id).where(models.Job.status == "queued").order_by(models.Job.created_at.asc())
+            ).all()
+        finally:
+            db.close()
+        for job_id in queued:
+            self._pending.put(job_id)
+
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self) -> None:
+        with self._lock:
+            for timer in self._timers:
+                timer.cancel()
+            self._timers.clear()
+        for _ in self._threads:
+            self._pending.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads.clear()
+
+    def submit(
+        self,
+        kind: str,
+        payload: dict[str, Any],
+        input_blob: bytes | None = None,
+        callback_url: str | None = None,
+    ) -> dict[str, Any]:
+        if kind not in self._handlers:
+            raise RuntimeError(f"No handler registered for job kind '{kind}'.")
+        callback_url = validate_callback_url(callback_url)
+
+        db = SessionLocal()
+        try:
+            job = models.Job(
+                id=uuid.uuid4().hex,
+                kind=kind,
+                status="queued",
+                payload=json.dumps(payload, ensure_ascii=False),
+                input_blob=input_blob,
+                callback_url=callback_url,
+            )
+            db.add(job)
+            db.commit()
+            db.refresh(job)
+            serialized = serialize_job(job)
+        finally:
+            db.close()
+
+        self._pending.put(serialized["id"])
+        return serialized
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._pending.qsize(),
+                "running": self._running,
+                "scheduled_retries": len(self._timers),
+                "retries": self._retries,
+            }
+
+    def _work(self) -> None:
+        while True:
+            job_id = self._pending.get()
+            if job_id is None:
+                return
+            with self._lock:
+                self._running += 1
+            try:
+                self._run(job_id)
+            except Exception:
+                logger.exception("Job %s crashed outside of its handler.", job_id)
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    # Moves a queued job to running under this queue's owner; False when another worker or process got it first.
+    def _claim(self, db: Session, job_id: str) -> bool:
+        now = datetime.utcnow()
+        claimed = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status == "queued")
+            .values(
+                status="running",
+                owner=self.owner,
+                attempts=models.Job.attempts + 1,
+                updated_at=now,
+                lease_expires_at=now + timedelta(seconds=self.lease_seconds),
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return claimed.rowcount == 1
+
+    def _run(self, job_id: str) -> None:
+        db = SessionLocal()
+        try:
+            if not self._claim(db, job_id):
+                return
+            job = db.get(models.Job, job_id)
+            kind, attempts = job.kind, job.attempts
+            payload = json.loads(job.payload or "{}")
+            input_blob = job.input_blob
+        finally:
+            db.close()
+
+        handler = self._handlers.get(kind)
+        try:
+            if handler is None:
+                raise LookupError(f"No handler registered for job kind '{kind}'.")
+            result = handler(payload, input_blob)
+        except (ValueError, LookupError) as exc:
+            self._finish(job_id, "failed", error=str(exc))
+        except Exception as exc:
+            if attempts < self.max_attempts:
+                self._schedule_retry(job_id, attempts, str(exc))
+            else:
+                self._finish(job_id, "failed", error=str(exc))
+        else:
+            self._finish(job_id, "succeeded", result=result)
+
+    # Updates a job this queue still holds; False when its lease expired and another process requeued it.
+    def _release(self, db: Session, job_id: str, **values: Any) -> bool:
+        released = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job_id, models.Job.status == "running", models.Job.owner == self.owner)
+            .values(owner=None, lease_expires_at=None, updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if released.rowcount != 1:
+            logger.warning("Job %s is no longer held by %s; its outcome was discarded.", job_id, self.owner)
+            return False
+        return True
+
+    def _schedule_retry(self, job_id: str, attempts: int, error: str) -> None:
+        db = SessionLocal()
+        try:
+            if not self._release(db, job_id, status="queued", error=error):
+                return
+        finally:
+            db.close()
+
+        delay = self.retry_backoff * (2 ** (attempts - 1))
+
+        def requeue() -> None:
+            with self._lock:
+                self._timers.discard(timer)
+            self._pending.put(job_id)
+
+        timer = threading.Timer(delay, requeue)
+        timer.daemon = True
+        with self._lock:
+            self._timers.add(timer)
+            self._retries += 1
+        timer.start()
+
+    def _finish(self, job_id: str, status: str, result: dict[str, Any] | None = None, error: str = "") -> None:
+        db = SessionLocal()
+        try:
+            finished = self._release(
+                db,
+                job_id,
+                status=status,
+                result=json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                error=error,
+                input_blob=None,
+                finished_at=datetime.utcnow(),
+            )
+            job = db.get(models.Job, job_id)
+            if not finished or not job:
+                return
+            callback_url = job.callback_url
+            serialized = serialize_job(job)
+        finally:
+            db.close()
+
+        if callback_url:
+            self._send_callback(callback_url, serialized)
+
+    def _send_callback(self, callback_url: str, serialized: dict[str, Any]) -> None:
+        try:
+            # Resolved again at send time, since the name may point elsewhere by now; redirects are not
+            # followed, as they could lead to an internal address.
+            validate_callback_url(callback_url)
+            response = requests.post(
+                callback_url,
+                data=json.dumps(serialized, ensure_ascii=False, default=str),
+                headers={"Content-Type": "application/json"},
+                timeout=JOB_CALLBACK_TIMEOUT,
+                allow_redirects=False,
+            )
+            response.raise_for_status()
+        except Exception:
+            logger.warning("Callback for job %s to %s failed.", serialized["id"], callback_url, exc_info=True)
+
+
+job_queue = JobQueue(
+    workers=JOB_WORKERS,
+    max_attempts=JOB_MAX_ATTEMPTS,
+    retry_backoff=JOB_RETRY_BACKOFF,
+    lease_seconds=JOB_LEASE_SECONDS,
+)
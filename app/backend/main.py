@@ -1,28 +1,101 @@
 from __future__ import annotations
 
+import asyncio
 import json
+import logging
+import os
 import sys
-from datetime import datetime
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Literal
 
-from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Response, UploadFile
+import anyio.to_thread
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, Response, UploadFile
 from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import or_, text
-from sqlalchemy.orm import Session
+from sqlalchemy import and_, delete, insert, or_, text
+from sqlalchemy.orm import Session, defer
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from agents.pipeline import run_postural_pipeline
-from agents.workout_agent import generate_workout_plan
+from agents.analysis_cache import get_analysis_cache
+from agents.pipeline import (
+    analysis_memo_stats,
+    analysis_mode_stats,
+    build_pipeline_result,
+    run_interpretation_stage_async,
+    run_postural_stages,
+    run_interpretation_stage,
+    run_posture_stage,
+    run_posture_stage_pooled,
+    sequence_posture_key,
+    shutdown_posture_process_pool,
+)
+from agents.llm_client import close_openai_clients
+from agents.workout_agent import generate_workout_plan, generate_workout_plan_async, stream_workout_plan
+from tools.pose_sequence import SEQUENCE_MAX_FRAMES, analyze_pose_sequence, open_frame_source
+from tools.web_tools import web_cache_stats
+from tools.posture_tools import PosePoolSaturatedError, close_pose_pool, pose_pool_stats, warm_pose_pool
+from tools.telemetry import (
+    SERVER_TIMING_ENABLED,
+    TELEMETRY_ENABLED,
+    http_request_duration,
+    render_metrics,
+    server_timing_header,
+    span,
+    start_request_spans,
+    telemetry_stats,
+)
 import models
 import schemas
-from database import engine, get_db
+from analysis_history import (
+    METRIC_KEYS,
+    rebuild_metric_stats,
+    record_analysis,
+    serialize_analysis,
+    summarize_metric_stats,
+    unpack_metrics,
+)
+from appointment_index import (
+    appointment_index,
+    busy_intervals,
+    committed_conflicts,
+    find_conflict,
+    find_conflicts,
+    free_intervals,
+    naive,
+)
+from calendar_view import CALENDAR_MAX_DAYS, build_calendar, calendar_cache
+from database import SessionLocal, database_stats, engine, get_db, get_read_db
+from jobs import job_queue, serialize_job
+from uploads import (
+    MAX_UPLOAD_BYTES,
+    MAX_VIDEO_UPLOAD_BYTES,
+    MULTIPART_OVERHEAD_BYTES,
+    RequestSizeLimitMiddleware,
+    read_frame_upload,
+    read_image_upload,
+)
+from student_search import ensure_student_search_index, index_student, search_student_ids, unindex_student
+from pagination import (
+    MAX_PAGE_SIZE,
+    decode_cursor,
+    encode_cursor,
+    encode_json,
+    etag_response,
+    fetch_page,
+    page_response,
+    parse_fields,
+    project,
+    serialize_rows,
+)
 
 models.Base.metadata.create_all(bind=engine)
 
@@ -40,7 +113,99 @@ def ensure_student_analysis_columns() -> None:
 
 ensure_student_analysis_columns()
 
-app = FastAPI(title="Pilates Vision & Progress API", version="0.2.0")
+
+def ensure_job_columns() -> None:
+    with engine.begin() as conn:
+        existing_columns = {row[1] for row in conn.execute(text("PRAGMA table_info(jobs)"))}
+        if "owner" not in existing_columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN owner VARCHAR(64)"))
+        if "lease_expires_at" not in existing_columns:
+            conn.execute(text("ALTER TABLE jobs ADD COLUMN lease_expires_at DATETIME"))
+
+
+ensure_job_columns()
+
+
+def ensure_appointment_indexes() -> None:
+    # create_all only adds indexes for new tables; databases created earlier get them here.
+    for index in models.Appointment.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
+
+
+ensure_appointment_indexes()
+
+
+def ensure_metric_stats() -> None:
+    # Analyses stored before the running aggregates existed are replayed once.
+    db = SessionLocal()
+    try:
+        rebuild_metric_stats(db)
+    finally:
+        db.close()
+
+
+ensure_metric_stats()
+
+with engine.begin() as connection:
+    ensure_student_search_index(connection)
+
+logger = logging.getLogger(__name__)
+POSE_POOL_WARM = os.getenv("POSE_POOL_WARM", "1") == "1"
+PROGRESS_MOVING_AVERAGE_WINDOW = max(1, int(os.getenv("PROGRESS_MOVING_AVERAGE_WINDOW", "3")))
+BATCH_MAX_IMAGES = max(1, int(os.getenv("BATCH_MAX_IMAGES", "50")))
+BATCH_LLM_CONCURRENCY = max(1, int(os.getenv("BATCH_LLM_CONCURRENCY", "4")))
+FREE_SLOTS_MAX_DAYS = max(1, int(os.getenv("FREE_SLOTS_MAX_DAYS", "31")))
+# Whole requests are capped too, so an oversized body is refused before it is parsed; upload routes get the
+# tighter limit their files allow.
+MAX_REQUEST_BYTES = max(
+    1, int(os.getenv("MAX_REQUEST_BYTES", str(MAX_UPLOAD_BYTES * BATCH_MAX_IMAGES + MULTIPART_OVERHEAD_BYTES)))
+)
+UPLOAD_REQUEST_LIMITS = {
+    "/analyze": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+    "/jobs/analyze": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+    "/analyze/batch": MAX_UPLOAD_BYTES * BATCH_MAX_IMAGES + MULTIPART_OVERHEAD_BYTES,
+    # A burst of frames shares the single clip's budget, so up to SEQUENCE_MAX_FRAMES images cannot add up to
+    # more memory than one video.
+    "/analyze/frames": MAX_VIDEO_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES,
+}
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    if POSE_POOL_WARM:
+        try:
+            await run_in_threadpool(warm_pose_pool)
+        except Exception:
+            logger.exception("Could not warm the MediaPipe Pose pool; instances will be created on demand.")
+    job_queue.start()
+    yield
+    job_queue.stop()
+    await close_openai_clients()
+    shutdown_posture_process_pool()
+    close_pose_pool()
+
+
+app = FastAPI(title="Pilates Vision & Progress API", version="0.2.0", lifespan=lifespan)
+
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=MAX_REQUEST_BYTES, path_limits=UPLOAD_REQUEST_LIMITS)
+
+
+# Streaming responses are timed up to their headers; stages that run while the body streams still reach the
+# histograms but not the Server-Timing header.
+@app.middleware("http")
+async def record_request_timing(request: Request, call_next):
+    if not TELEMETRY_ENABLED:
+        return await call_next(request)
+    started = time.perf_counter()
+    spans = start_request_spans()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    http_request_duration.observe(elapsed, method=request.method, route=route, status=response.status_code)
+    if SERVER_TIMING_ENABLED:
+        response.headers["Server-Timing"] = server_timing_header(spans, elapsed)
+    return response
+
 
 app.add_middleware(
     CORSMiddleware,
@@ -48,6 +213,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Next-Cursor", "Server-Timing"],
 )
 
 
@@ -56,6 +222,49 @@ def health_check() -> dict[str, str]:
     return {"status": "ok"}
 
 
+# Must run on the event loop: the limiter behind run_in_threadpool is per loop.
+def threadpool_stats() -> dict[str, object]:
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    return {
+        "capacity": limiter.total_tokens,
+        "busy": limiter.borrowed_tokens,
+        "queued": limiter.statistics().tasks_waiting,
+    }
+
+
+def collect_runtime_stats() -> dict[str, object]:
+    return {
+        "pose_pool": pose_pool_stats(),
+        "analysis_cache": get_analysis_cache().stats(),
+        "analysis": analysis_mode_stats(),
+        "analysis_memo": analysis_memo_stats(),
+        "appointment_index": appointment_index.stats(),
+        "calendar_cache": calendar_cache.stats(),
+        "jobs": job_queue.stats(),
+        "web_cache": web_cache_stats(),
+        "database": database_stats(),
+    }
+
+
+@app.get("/stats")
+async def runtime_stats() -> dict[str, object]:
+    threadpool = threadpool_stats()
+    # The SQLite-backed cache counts its rows, so the collection itself runs off the event loop.
+    stats = await run_in_threadpool(collect_runtime_stats)
+    return {**stats, "threadpool": threadpool, "telemetry": telemetry_stats()}
+
+
+# Prometheus text format: the stage and request histograms and LLM counters, plus every numeric value
+# from /stats as a gauge (pilates_pose_pool_in_use, pilates_threadpool_queued, ...).
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    threadpool = threadpool_stats()
+    stats = await run_in_threadpool(collect_runtime_stats)
+    return PlainTextResponse(
+        render_metrics({**stats, "threadpool": threadpool}), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.post("/students", response_model=schemas.StudentRead, status_code=201)
 def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)) -> schemas.StudentRead:
     existing = db.query(models.Student).filter(models.Student.tax_id_cpf == student.tax_id_cpf).first()
@@ -64,14 +273,53 @@ def create_student(student: schemas.StudentCreate, db: Session = Depends(get_db)
 
     new_student = models.Student(**student.model_dump())
     db.add(new_student)
+    index_student(db, new_student)
     db.commit()
     db.refresh(new_student)
     return new_student
 
 
+def parse_list_params(
+    fields: str | None, cursor: str | None, schema: type
+) -> tuple[list[str] | None, dict[str, object] | None]:
+    try:
+        return parse_fields(fields, schema), decode_cursor(cursor) if cursor else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+def cursor_id(after: dict[str, object]) -> int:
+    try:
+        return int(after["id"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+
+
 @app.get("/students", response_model=list[schemas.StudentRead])
-def list_students(q: str | None = Query(default=None, min_length=1), db: Session = Depends(get_db)) -> list[schemas.StudentRead]:
-    query = db.query(models.Student)
+def list_students(
+    request: Request,
+    q: str | None = Query(default=None, min_length=1),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None, description="Comma-separated StudentRead fields"),
+    db: Session = Depends(get_read_db),
+) -> Response:
+    selected_fields, after = parse_list_params(fields, cursor, schemas.StudentRead)
+    query = project(db.query(models.Student), models.Student, selected_fields)
+
+    if q:
+        # Ranked full-text matches page by offset; the LIKE fallback keeps the id keyset below.
+        offset = int(after.get("offset", 0)) if after and str(after.get("offset", "0")).isdigit() else 0
+        ranked_ids = search_student_ids(db, q.strip(), limit + 1 if limit else None, offset)
+        if ranked_ids is not None:
+            page_ids = ranked_ids[:limit] if limit else ranked_ids
+            by_id = {row.id: row for row in query.filter(models.Student.id.in_(page_ids))} if page_ids else {}
+            rows = [by_id[student_id] for student_id in page_ids if student_id in by_id]
+            next_cursor = encode_cursor({"offset": offset + limit}) if limit and len(ranked_ids) > limit else None
+            return page_response(request, serialize_rows(rows, schemas.StudentRead, selected_fields), next_cursor)
+
+    if after:
+        query = query.filter(models.Student.id < cursor_id(after))
 
     if q:
         pattern = f"%{q.strip()}%"
@@ -83,11 +331,13 @@ def list_students(q: str | None = Query(default=None, min_length=1), db: Session
             )
         )
 
-    return query.order_by(models.Student.id.desc()).all()
+    rows, has_more = fetch_page(query.order_by(models.Student.id.desc()), limit)
+    next_cursor = encode_cursor({"id": rows[-1].id}) if has_more else None
+    return page_response(request, serialize_rows(rows, schemas.StudentRead, selected_fields), next_cursor)
 
 
 @app.get("/students/{student_id}", response_model=schemas.StudentRead)
-def get_student(student_id: int, db: Session = Depends(get_db)) -> schemas.StudentRead:
+def get_student(student_id: int, db: Session = Depends(get_read_db)) -> schemas.StudentRead:
     student = db.get(models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
@@ -113,7 +363,11 @@ def update_student(student_id: int, payload: schemas.StudentUpdate, db: Session
     for key, value in updates.items():
         setattr(student, key, value)
 
+    if updates.keys() & {"name", "tax_id_cpf", "phone"}:
+        index_student(db, student)
     db.commit()
+    if "name" in updates:
+        calendar_cache.bump()
     db.refresh(student)
     return student
 
@@ -133,6 +387,7 @@ def delete_student(student_id: int, db: Session = Depends(get_db)) -> Response:
         raise HTTPException(status_code=409, detail="Cannot delete student with linked assessments")
 
     db.delete(student)
+    unindex_student(db, student_id)
     db.commit()
     return Response(status_code=204)
 
@@ -151,12 +406,25 @@ def create_instructor(instructor: schemas.InstructorCreate, db: Session = Depend
 
 
 @app.get("/instructors", response_model=list[schemas.InstructorRead])
-def list_instructors(db: Session = Depends(get_db)) -> list[schemas.InstructorRead]:
-    return db.query(models.Instructor).order_by(models.Instructor.id.desc()).all()
+def list_instructors(
+    request: Request,
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None, description="Comma-separated InstructorRead fields"),
+    db: Session = Depends(get_read_db),
+) -> Response:
+    selected_fields, after = parse_list_params(fields, cursor, schemas.InstructorRead)
+    query = project(db.query(models.Instructor), models.Instructor, selected_fields)
+    if after:
+        query = query.filter(models.Instructor.id < cursor_id(after))
+
+    rows, has_more = fetch_page(query.order_by(models.Instructor.id.desc()), limit)
+    next_cursor = encode_cursor({"id": rows[-1].id}) if has_more else None
+    return page_response(request, serialize_rows(rows, schemas.InstructorRead, selected_fields), next_cursor)
 
 
 @app.get("/instructors/{instructor_id}", response_model=schemas.InstructorRead)
-def get_instructor(instructor_id: int, db: Session = Depends(get_db)) -> schemas.InstructorRead:
+def get_instructor(instructor_id: int, db: Session = Depends(get_read_db)) -> schemas.InstructorRead:
     instructor = db.get(models.Instructor, instructor_id)
     if not instructor:
         raise HTTPException(status_code=404, detail="Instructor not found")
@@ -181,6 +449,8 @@ def update_instructor(
         setattr(instructor, key, value)
 
     db.commit()
+    if "name" in updates:
+        calendar_cache.bump()
     db.refresh(instructor)
     return instructor
 
@@ -200,6 +470,44 @@ def delete_instructor(instructor_id: int, db: Session = Depends(get_db)) -> Resp
     return Response(status_code=204)
 
 
+# Called after every committed appointment write with the (instructor_id, id, start, end) intervals it added
+# and the (instructor_id, id, start) intervals it removed, which are applied to the cached schedules in place.
+def appointments_changed(
+    added: list[tuple[int, int, datetime, datetime]] = (), removed: list[tuple[int, int, datetime]] = ()
+) -> None:
+    for instructor_id, appointment_id, start_time in removed:
+        appointment_index.removed(instructor_id, appointment_id, start_time)
+    added_by_instructor: dict[int, list[tuple[int, datetime, datetime]]] = {}
+    for instructor_id, appointment_id, start_time, end_time in added:
+        added_by_instructor.setdefault(instructor_id, []).append((appointment_id, start_time, end_time))
+    for instructor_id, rows in added_by_instructor.items():
+        appointment_index.added(instructor_id, rows)
+    calendar_cache.bump()
+
+
+@app.get("/instructors/{instructor_id}/free_slots", response_model=list[schemas.FreeSlot])
+def list_instructor_free_slots(
+    instructor_id: int,
+    start: datetime = Query(alias="from"),
+    end: datetime = Query(alias="to"),
+    min_minutes: int = Query(default=30, ge=1, le=24 * 60),
+    db: Session = Depends(get_read_db),
+) -> list[dict[str, object]]:
+    start, end = naive(start), naive(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > timedelta(days=FREE_SLOTS_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {FREE_SLOTS_MAX_DAYS} days")
+    if not db.get(models.Instructor, instructor_id):
+        raise HTTPException(status_code=404, detail="Instructor not found")
+
+    slots = free_intervals(busy_intervals(db, instructor_id, start, end), start, end, timedelta(minutes=min_minutes))
+    return [
+        {"start_time": slot_start, "end_time": slot_end, "minutes": int((slot_end - slot_start).total_seconds() // 60)}
+        for slot_start, slot_end in slots
+    ]
+
+
 @app.post("/appointments", response_model=schemas.AppointmentRead, status_code=201)
 def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Depends(get_db)) -> schemas.AppointmentRead:
     if appointment.end_time <= appointment.start_time:
@@ -213,31 +521,152 @@ def create_appointment(appointment: schemas.AppointmentCreate, db: Session = Dep
     if not instructor:
         raise HTTPException(status_code=404, detail="Instructor not found")
 
-    overlapping = (
-        db.query(models.Appointment)
-        .filter(
-            models.Appointment.instructor_id == appointment.instructor_id,
-            models.Appointment.start_time < appointment.end_time,
-            models.Appointment.end_time > appointment.start_time,
-        )
-        .first()
-    )
-    if overlapping:
+    if find_conflict(db, appointment.instructor_id, appointment.start_time, appointment.end_time) is not None:
         raise HTTPException(status_code=409, detail="Instructor already has an appointment in this time range")
 
     new_appointment = models.Appointment(**appointment.model_dump())
     db.add(new_appointment)
+    db.flush()
+    # The check above may have used another process's stale schedule; this one runs under the write lock.
+    interval = [(appointment.start_time, appointment.end_time)]
+    if committed_conflicts(db, appointment.instructor_id, interval, [new_appointment.id])[0] is not None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Instructor already has an appointment in this time range")
     db.commit()
     db.refresh(new_appointment)
+    appointments_changed(
+        added=[
+            (new_appointment.instructor_id, new_appointment.id, new_appointment.start_time, new_appointment.end_time)
+        ]
+    )
     return new_appointment
 
 
+def expand_series(series: schemas.AppointmentSeriesCreate) -> list[tuple[datetime, datetime]]:
+    weekdays = set(series.weekdays)
+    duration = timedelta(minutes=series.duration_minutes)
+    occurrences: list[tuple[datetime, datetime]] = []
+    for offset in range(series.weeks * 7):
+        day = series.first_date + timedelta(days=offset)
+        if day.weekday() in weekdays:
+            start = naive(datetime.combine(day, series.start_time))
+            occurrences.append((start, start + duration))
+    return occurrences
+
+
+@app.post("/appointments/series", response_model=schemas.AppointmentSeriesRead, status_code=201)
+def create_appointment_series(
+    series: schemas.AppointmentSeriesCreate, db: Session = Depends(get_db)
+) -> dict[str, object]:
+    if not db.get(models.Student, series.student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+    if not db.get(models.Instructor, series.instructor_id):
+        raise HTTPException(status_code=404, detail="Instructor not found")
+
+    # Occurrences fall on distinct days and last at most 12 hours, so they cannot overlap each other.
+    occurrences = expand_series(series)
+    conflicts = [
+        {"start_time": start, "end_time": end, "conflicting_appointment_id": conflict_id}
+        for (start, end), conflict_id in zip(occurrences, find_conflicts(db, series.instructor_id, occurrences))
+        if conflict_id is not None
+    ]
+    if conflicts and series.all_or_nothing:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "message": "Instructor already has appointments in this series",
+                "conflicts": jsonable_encoder(conflicts),
+            },
+        )
+
+    conflicting_starts = {conflict["start_time"] for conflict in conflicts}
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            "student_id": series.student_id,
+            "instructor_id": series.instructor_id,
+            "start_time": start,
+            "end_time": end,
+            "status": series.status,
+            "notes": series.notes,
+            "created_at": created_at,
+        }
+        for start, end in occurrences
+        if start not in conflicting_starts
+    ]
+    created: list[schemas.AppointmentRead] = []
+    if rows:
+        # One executemany in a single transaction instead of a commit per occurrence.
+        inserted = db.scalars(insert(models.Appointment).returning(models.Appointment), rows)
+        # Serialised before the commit expires them, which would reload each row.
+        created = [schemas.AppointmentRead.model_validate(appointment) for appointment in inserted]
+        late_conflicts = [
+            (appointment, conflict_id)
+            for appointment, conflict_id in zip(
+                created,
+                committed_conflicts(
+                    db,
+                    series.instructor_id,
+                    [(appointment.start_time, appointment.end_time) for appointment in created],
+                    [appointment.id for appointment in created],
+                ),
+            )
+            if conflict_id is not None
+        ]
+        if late_conflicts:
+            conflicts += [
+                {
+                    "start_time": appointment.start_time,
+                    "end_time": appointment.end_time,
+                    "conflicting_appointment_id": conflict_id,
+                }
+                for appointment, conflict_id in late_conflicts
+            ]
+            if series.all_or_nothing:
+                db.rollback()
+                raise HTTPException(
+                    status_code=409,
+                    detail={
+                        "message": "Instructor already has appointments in this series",
+                        "conflicts": jsonable_encoder(conflicts),
+                    },
+                )
+            late_ids = {appointment.id for appointment, _ in late_conflicts}
+            db.execute(delete(models.Appointment).where(models.Appointment.id.in_(late_ids)))
+            created = [appointment for appointment in created if appointment.id not in late_ids]
+        db.commit()
+        appointments_changed(
+            added=[
+                (appointment.instructor_id, appointment.id, appointment.start_time, appointment.end_time)
+                for appointment in created
+            ]
+        )
+    return {"requested": len(occurrences), "created": created, "conflicts": conflicts}
+
+
 @app.get("/appointments", response_model=list[schemas.AppointmentRead])
 def list_appointments(
+    request: Request,
     date: str | None = Query(default=None, description="YYYY-MM-DD"),
-    db: Session = Depends(get_db),
-) -> list[schemas.AppointmentRead]:
-    query = db.query(models.Appointment)
+    student_id: int | None = Query(default=None),
+    instructor_id: int | None = Query(default=None),
+    status: Literal["booked", "completed", "canceled"] | None = Query(default=None),
+    limit: int | None = Query(default=None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(default=None),
+    fields: str | None = Query(default=None, description="Comma-separated AppointmentRead fields"),
+    db: Session = Depends(get_read_db),
+) -> Response:
+    selected_fields, after = parse_list_params(fields, cursor, schemas.AppointmentRead)
+    # The cursor is built from start_time, so it is always loaded, but only returned when it was requested.
+    loaded_fields = selected_fields and list(dict.fromkeys([*selected_fields, "start_time"]))
+    query = project(db.query(models.Appointment), models.Appointment, loaded_fields)
+
+    if student_id is not None:
+        query = query.filter(models.Appointment.student_id == student_id)
+    if instructor_id is not None:
+        query = query.filter(models.Appointment.instructor_id == instructor_id)
+    if status is not None:
+        query = query.filter(models.Appointment.status == status)
 
     if date:
         try:
@@ -248,11 +677,54 @@ def list_appointments(
         query = query.filter(models.Appointment.start_time >= datetime.combine(selected_date, datetime.min.time()))
         query = query.filter(models.Appointment.start_time < datetime.combine(selected_date, datetime.max.time()))
 
-    return query.order_by(models.Appointment.start_time.asc()).all()
+    if after:
+        after_id = cursor_id(after)
+        try:
+            after_start = datetime.fromisoformat(str(after.get("start_time")))
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor.") from exc
+        query = query.filter(
+            or_(
+                models.Appointment.start_time > after_start,
+                and_(models.Appointment.start_time == after_start, models.Appointment.id > after_id),
+            )
+        )
+
+    rows, has_more = fetch_page(
+        query.order_by(models.Appointment.start_time.asc(), models.Appointment.id.asc()), limit
+    )
+    next_cursor = encode_cursor({"start_time": rows[-1].start_time, "id": rows[-1].id}) if has_more else None
+    return page_response(request, serialize_rows(rows, schemas.AppointmentRead, selected_fields), next_cursor)
+
+
+@app.get("/calendar", response_model=schemas.CalendarRead)
+def get_calendar(
+    request: Request,
+    start: datetime = Query(alias="from"),
+    end: datetime = Query(alias="to"),
+    instructor_id: int | None = Query(default=None),
+    student_id: int | None = Query(default=None),
+    db: Session = Depends(get_read_db),
+) -> Response:
+    start, end = naive(start), naive(end)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > timedelta(days=CALENDAR_MAX_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range cannot exceed {CALENDAR_MAX_DAYS} days")
+
+    key = (start, end, instructor_id, student_id)
+    cached = calendar_cache.get(key)
+    if cached is None:
+        version = calendar_cache.version
+        body, etag = encode_json(build_calendar(db, start, end, instructor_id, student_id))
+        calendar_cache.put(key, version, body, etag)
+    else:
+        body, etag = cached
+    return etag_response(request, body, etag, {"Cache-Control": "private, no-cache"})
 
 
 @app.get("/appointments/{appointment_id}", response_model=schemas.AppointmentRead)
-def get_appointment(appointment_id: int, db: Session = Depends(get_db)) -> schemas.AppointmentRead:
+def get_appointment(appointment_id: int, db: Session = Depends(get_read_db)) -> schemas.AppointmentRead:
     appointment = db.get(models.Appointment, appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
@@ -281,24 +753,23 @@ def update_appointment(
     if "instructor_id" in updates and not db.get(models.Instructor, updates["instructor_id"]):
         raise HTTPException(status_code=404, detail="Instructor not found")
 
-    overlapping = (
-        db.query(models.Appointment)
-        .filter(
-            models.Appointment.id != appointment_id,
-            models.Appointment.instructor_id == next_instructor,
-            models.Appointment.start_time < next_end,
-            models.Appointment.end_time > next_start,
-        )
-        .first()
-    )
-    if overlapping:
+    if find_conflict(db, next_instructor, next_start, next_end, exclude_id=appointment_id) is not None:
         raise HTTPException(status_code=409, detail="Instructor already has an appointment in this time range")
 
+    previous = (appointment.instructor_id, appointment.id, appointment.start_time)
     for key, value in updates.items():
         setattr(appointment, key, value)
 
+    db.flush()
+    if committed_conflicts(db, next_instructor, [(next_start, next_end)], [appointment_id])[0] is not None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Instructor already has an appointment in this time range")
     db.commit()
     db.refresh(appointment)
+    appointments_changed(
+        added=[(appointment.instructor_id, appointment.id, appointment.start_time, appointment.end_time)],
+        removed=[previous],
+    )
     return appointment
 
 
@@ -308,8 +779,10 @@ def delete_appointment(appointment_id: int, db: Session = Depends(get_db)) -> Re
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
 
+    removed = (appointment.instructor_id, appointment.id, appointment.start_time)
     db.delete(appointment)
     db.commit()
+    appointments_changed(removed=[removed])
     return Response(status_code=204)
 
 
@@ -326,44 +799,236 @@ def create_assessment(assessment: schemas.AssessmentCreate, db: Session = Depend
     return new_assessment
 
 
+def save_latest_analysis(
+    db: Session, student: models.Student, result: dict[str, object], packed_landmarks: str | None = None
+) -> None:
+    student.latest_detected_deviations = json.dumps(result.get("detected_deviations", []), ensure_ascii=False)
+    student.latest_clinical_analysis = result.get("clinical_analysis", "")
+    with span("db_commit"):
+        record_analysis(db, student.id, result, packed_landmarks)
+        db.commit()
+
+
+def save_latest_analysis_for(student_id: int, result: dict[str, object], packed_landmarks: str | None = None) -> None:
+    db = SessionLocal()
+    try:
+        student = db.get(models.Student, student_id)
+        if student:
+            save_latest_analysis(db, student, result, packed_landmarks)
+    finally:
+        db.close()
+
+
+@app.get("/students/{student_id}/analyses", response_model=list[schemas.PostureAnalysisRead])
+def list_student_analyses(
+    student_id: int,
+    limit: int = Query(default=50, ge=1, le=500),
+    include_landmarks: bool = Query(default=False),
+    db: Session = Depends(get_read_db),
+) -> list[schemas.PostureAnalysisRead]:
+    if not db.get(models.Student, student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    query = db.query(models.PostureAnalysis).filter(models.PostureAnalysis.student_id == student_id)
+    if not include_landmarks:
+        query = query.options(defer(models.PostureAnalysis.landmarks_blob))
+    records = query.order_by(models.PostureAnalysis.created_at.desc(), models.PostureAnalysis.id.desc()).limit(limit)
+    return [schemas.PostureAnalysisRead(**serialize_analysis(record, include_landmarks)) for record in records]
+
+
+@app.get("/students/{student_id}/progress", response_model=schemas.StudentProgressRead)
+def get_student_progress(
+    student_id: int,
+    metrics: list[str] | None = Query(default=None),
+    series_limit: int = Query(default=20, ge=0, le=200),
+    db: Session = Depends(get_read_db),
+) -> schemas.StudentProgressRead:
+    if not db.get(models.Student, student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    # Trend figures come from the running aggregates, so their cost does not grow with the history.
+    query = db.query(models.StudentMetricStats).filter(models.StudentMetricStats.student_id == student_id)
+    if metrics:
+        query = query.filter(models.StudentMetricStats.metric.in_(metrics))
+    order = {metric: position for position, metric in enumerate(METRIC_KEYS)}
+    rows = sorted(query.all(), key=lambda row: order.get(row.metric, len(order)))
+    summaries = {row.metric: summarize_metric_stats(row) for row in rows}
+
+    if series_limit and summaries:
+        recent = (
+            db.query(models.PostureAnalysis.created_at, models.PostureAnalysis.metrics_blob)
+            .filter(models.PostureAnalysis.student_id == student_id)
+            .order_by(models.PostureAnalysis.created_at.desc(), models.PostureAnalysis.id.desc())
+            .limit(series_limit)
+            .all()
+        )
+        values: dict[str, list[tuple[datetime, float]]] = {metric: [] for metric in summaries}
+        for created_at, metrics_blob in reversed(recent):
+            angles, joint_angles = unpack_metrics(metrics_blob)
+            for metric, value in {**joint_angles, **angles}.items():
+                if metric in values:
+                    values[metric].append((created_at, value))
+        for metric, points in values.items():
+            series = []
+            for index, (created_at, value) in enumerate(points):
+                window = [point[1] for point in points[max(0, index - PROGRESS_MOVING_AVERAGE_WINDOW + 1) : index + 1]]
+                series.append(
+                    {"created_at": created_at, "value": value, "moving_average": round(sum(window) / len(window), 2)}
+                )
+            summaries[metric]["series"] = series
+
+    return schemas.StudentProgressRead(
+        student_id=student_id,
+        analyses=max((row.n for row in rows), default=0),
+        metrics=list(summaries.values()),
+    )
+
+
 @app.post("/analyze")
 async def analyze_posture(
     image: UploadFile = File(...),
     student_id: int = Form(...),
     language: Literal["pt", "en"] = Form(default="en"),
+    refresh: bool = Form(default=False),
     db: Session = Depends(get_db),
 ) -> dict[str, object]:
-    if not image.content_type or not image.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Invalid file type. Please upload an image.")
-
     student = db.get(models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
 
-    image_bytes = await image.read()
-    if not image_bytes:
-        raise HTTPException(status_code=400, detail="Uploaded image is empty.")
+    image_bytes = await read_image_upload(image)
 
     try:
-        result = await run_in_threadpool(run_postural_pipeline, image_bytes, language)
-
-        student.latest_detected_deviations = json.dumps(result.get("detected_deviations", []), ensure_ascii=False)
-        student.latest_clinical_analysis = result.get("clinical_analysis", "")
-        db.commit()
-
+        use_cache = not refresh
+        posture_key, posture_data, posture_cached = await run_in_threadpool(run_posture_stage, image_bytes, use_cache)
+        llm_result, interpretation_cached = await run_interpretation_stage_async(
+            posture_key, posture_data, language, use_cache
+        )
+        result = build_pipeline_result(posture_data, llm_result, posture_cached, interpretation_cached)
+        save_latest_analysis(db, student, result, posture_data.get("landmarks_blob"))
         return result
     except ValueError as exc:
         raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except PosePoolSaturatedError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "5"}) from exc
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
-@app.post("/generate_plan", response_model=schemas.WorkoutPlanResponse)
-async def generate_plan(payload: schemas.WorkoutPlanRequest, db: Session = Depends(get_db)) -> schemas.WorkoutPlanResponse:
-    student = db.get(models.Student, payload.student_id)
-    if not student:
+@app.post("/analyze/batch")
+async def analyze_posture_batch(
+    images: list[UploadFile] = File(...),
+    student_ids: list[int] = Form(...),
+    language: Literal["pt", "en"] = Form(default="en"),
+    refresh: bool = Form(default=False),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    if len(images) != len(student_ids):
+        raise HTTPException(status_code=400, detail="Provide exactly one student_id per image.")
+    if len(images) > BATCH_MAX_IMAGES:
+        raise HTTPException(status_code=400, detail=f"A batch can contain at most {BATCH_MAX_IMAGES} images.")
+
+    known_ids = {
+        row[0] for row in db.query(models.Student.id).filter(models.Student.id.in_(set(student_ids))).all()
+    }
+    missing_ids = sorted(set(student_ids) - known_ids)
+    if missing_ids:
+        raise HTTPException(status_code=404, detail=f"Student not found: {', '.join(map(str, missing_ids))}")
+
+    uploads: list[bytes] = []
+    for image in images:
+        uploads.append(await read_image_upload(image))
+
+    use_cache = not refresh
+    llm_slots = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def analyze_one(index: int, student_id: int, image_bytes: bytes) -> dict[str, object]:
+        item: dict[str, object] = {"index": index, "student_id": student_id, "filename": images[index].filename}
+        try:
+            posture_key, posture_data, posture_cached = await run_posture_stage_pooled(image_bytes, use_cache)
+            async with llm_slots:
+                llm_result, interpretation_cached = await run_interpretation_stage_async(
+                    posture_key, posture_data, language, use_cache
+                )
+            result = build_pipeline_result(posture_data, llm_result, posture_cached, interpretation_cached)
+            await run_in_threadpool(save_latest_analysis_for, student_id, result, posture_data.get("landmarks_blob"))
+            item["result"] = result
+        except ValueError as exc:
+            item.update(status="error", status_code=422, detail=str(exc))
+        except PosePoolSaturatedError as exc:
+            item.update(status="error", status_code=503, detail=str(exc))
+        except Exception as exc:
+            item.update(status="error", status_code=500, detail=str(exc))
+        else:
+            item["status"] = "success"
+        return item
+
+    async def stream_results():
+        tasks = [
+            asyncio.create_task(analyze_one(index, student_id, image_bytes))
+            for index, (student_id, image_bytes) in enumerate(zip(student_ids, uploads))
+        ]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@app.post("/analyze/frames")
+async def analyze_posture_frames(
+    files: list[UploadFile] = File(...),
+    student_id: int = Form(...),
+    language: Literal["pt", "en"] = Form(default="en"),
+    refresh: bool = Form(default=False),
+    db: Session = Depends(get_db),
+) -> StreamingResponse:
+    if len(files) > SEQUENCE_MAX_FRAMES:
+        raise HTTPException(status_code=400, detail=f"Upload at most {SEQUENCE_MAX_FRAMES} frames.")
+    if not db.get(models.Student, student_id):
         raise HTTPException(status_code=404, detail="Student not found")
 
+    uploads = [await read_frame_upload(upload, allow_video=len(files) == 1) for upload in files]
+    try:
+        source = await run_in_threadpool(open_frame_source, uploads)
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    posture_key = sequence_posture_key(uploads)
+    use_cache = not refresh
+
+    # A plain generator, so Starlette drives it from the threadpool; each frame is sent as soon as it is
+    # tracked and the aggregated, interpreted result comes last.
+    def stream_events():
+        try:
+            for event in analyze_pose_sequence(source):
+                if event["type"] == "frame":
+                    yield json.dumps(event, ensure_ascii=False) + "\n"
+                    continue
+                posture_data = event["posture_data"]
+                llm_result, interpretation_cached = run_interpretation_stage(
+                    posture_key, posture_data, language, use_cache
+                )
+                result = build_pipeline_result(posture_data, llm_result, False, interpretation_cached)
+                save_latest_analysis_for(student_id, result, posture_data.get("landmarks_blob"))
+                yield json.dumps({"type": "result", "result": result}, ensure_ascii=False) + "\n"
+        except ValueError as exc:
+            yield json.dumps({"type": "error", "status_code": 422, "detail": str(exc)}, ensure_ascii=False) + "\n"
+        except PosePoolSaturatedError as exc:
+            yield json.dumps({"type": "error", "status_code": 503, "detail": str(exc)}, ensure_ascii=False) + "\n"
+        except Exception as exc:
+            logger.exception("Sequence analysis failed for student %s", student_id)
+            yield json.dumps({"type": "error", "status_code": 500, "detail": str(exc)}, ensure_ascii=False) + "\n"
+        finally:
+            source.close()
+
+    return StreamingResponse(stream_events(), media_type="application/x-ndjson")
+
+
+def build_plan_inputs(student: models.Student) -> tuple[dict[str, object], str]:
     try:
         deviations = json.loads(student.latest_detected_deviations or "[]")
         if not isinstance(deviations, list):
@@ -386,16 +1051,36 @@ async def generate_plan(payload: schemas.WorkoutPlanRequest, db: Session = Depen
         "latest_detected_deviations": deviations,
         "latest_clinical_analysis": student.latest_clinical_analysis or "",
     }
+    return student_profile, clinical_analysis
 
-    try:
-        result = await run_in_threadpool(
-            generate_workout_plan,
-            student_profile,
-            clinical_analysis,
-            payload.language,
-        )
-        student.latest_workout_plan = json.dumps(result.get("workout_plan", []), ensure_ascii=False)
+
+def save_workout_plan(db: Session, student: models.Student, result: dict[str, object]) -> None:
+    student.latest_workout_plan = json.dumps(result.get("workout_plan", []), ensure_ascii=False)
+    with span("db_commit"):
         db.commit()
+
+
+def save_workout_plan_for(student_id: int, result: dict[str, object]) -> None:
+    db = SessionLocal()
+    try:
+        student = db.get(models.Student, student_id)
+        if student:
+            save_workout_plan(db, student, result)
+    finally:
+        db.close()
+
+
+@app.post("/generate_plan", response_model=schemas.WorkoutPlanResponse)
+async def generate_plan(payload: schemas.WorkoutPlanRequest, db: Session = Depends(get_db)) -> schemas.WorkoutPlanResponse:
+    student = db.get(models.Student, payload.student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    student_profile, clinical_analysis = build_plan_inputs(student)
+
+    try:
+        result = await generate_workout_plan_async(student_profile, clinical_analysis, payload.language)
+        save_workout_plan(db, student, result)
         return schemas.WorkoutPlanResponse(**result)
     except RuntimeError as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
@@ -403,6 +1088,113 @@ async def generate_plan(payload: schemas.WorkoutPlanRequest, db: Session = Depen
         raise HTTPException(status_code=500, detail=f"Failed to generate workout plan: {exc}") from exc
 
 
+def format_sse(event: str, data: object) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/generate_plan/stream")
+async def generate_plan_stream(payload: schemas.WorkoutPlanRequest, db: Session = Depends(get_db)) -> StreamingResponse:
+    student = db.get(models.Student, payload.student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    student_profile, clinical_analysis = build_plan_inputs(student)
+
+    async def stream_events():
+        # The request session is closed before the body streams, so the plan is saved with its own session.
+        try:
+            async for event in stream_workout_plan(student_profile, clinical_analysis, payload.language):
+                if event["event"] == "done":
+                    await run_in_threadpool(save_workout_plan_for, payload.student_id, event["data"])
+                yield format_sse(event["event"], event["data"])
+        except Exception as exc:
+            yield format_sse("error", {"detail": f"Failed to generate workout plan: {exc}"})
+
+    return StreamingResponse(
+        stream_events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def run_analyze_job(payload: dict[str, object], image_bytes: bytes | None) -> dict[str, object]:
+    if not image_bytes:
+        raise ValueError("Uploaded image is empty.")
+    posture_data, result = run_postural_stages(image_bytes, payload["language"], not payload.get("refresh", False))
+    save_latest_analysis_for(payload["student_id"], result, posture_data.get("landmarks_blob"))
+    return result
+
+
+def run_generate_plan_job(payload: dict[str, object], _: bytes | None) -> dict[str, object]:
+    db = SessionLocal()
+    try:
+        student = db.get(models.Student, payload["student_id"])
+        if not student:
+            raise LookupError("Student not found")
+        student_profile, clinical_analysis = build_plan_inputs(student)
+    finally:
+        db.close()
+
+    result = generate_workout_plan(student_profile, clinical_analysis, payload["language"])
+    save_workout_plan_for(payload["student_id"], result)
+    return result
+
+
+job_queue.register("analyze", run_analyze_job)
+job_queue.register("generate_plan", run_generate_plan_job)
+
+
+@app.post("/jobs/analyze", response_model=schemas.JobRead, status_code=202)
+async def submit_analyze_job(
+    image: UploadFile = File(...),
+    student_id: int = Form(...),
+    language: Literal["pt", "en"] = Form(default="en"),
+    refresh: bool = Form(default=False),
+    callback_url: str | None = Form(default=None, max_length=500),
+    db: Session = Depends(get_db),
+) -> schemas.JobRead:
+    if not db.get(models.Student, student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    image_bytes = await read_image_upload(image)
+
+    try:
+        job = await run_in_threadpool(
+            job_queue.submit,
+            "analyze",
+            {"student_id": student_id, "language": language, "refresh": refresh},
+            image_bytes,
+            callback_url,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return schemas.JobRead(**job)
+
+
+@app.post("/jobs/generate_plan", response_model=schemas.JobRead, status_code=202)
+def submit_generate_plan_job(payload: schemas.WorkoutPlanJobRequest, db: Session = Depends(get_db)) -> schemas.JobRead:
+    if not db.get(models.Student, payload.student_id):
+        raise HTTPException(status_code=404, detail="Student not found")
+
+    try:
+        job = job_queue.submit(
+            "generate_plan",
+            {"student_id": payload.student_id, "language": payload.language},
+            callback_url=payload.callback_url,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    return schemas.JobRead(**job)
+
+
+@app.get("/jobs/{job_id}", response_model=schemas.JobRead)
+def get_job(job_id: str, db: Session = Depends(get_read_db)) -> schemas.JobRead:
+    job = db.get(models.Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return schemas.JobRead(**serialize_job(job))
+
+
 frontend_dist = Path(__file__).resolve().parents[1] / "frontend" / "dist"
 
 if frontend_dist.exists():
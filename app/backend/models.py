@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import date, datetime
 
-from sqlalchemy import Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Date, DateTime, Float, ForeignKey, Index, Integer, LargeBinary, String, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -26,6 +26,10 @@ class Student(Base):
 
     assessments: Mapped[list[Assessment]] = relationship(back_populates="student", cascade="all, delete-orphan")
     appointments: Mapped[list[Appointment]] = relationship(back_populates="student", cascade="all, delete-orphan")
+    posture_analyses: Mapped[list[PostureAnalysis]] = relationship(
+        back_populates="student", cascade="all, delete-orphan"
+    )
+    metric_stats: Mapped[list[StudentMetricStats]] = relationship(cascade="all, delete-orphan")
 
 
 class Instructor(Base):
@@ -53,8 +57,48 @@ class Assessment(Base):
     student: Mapped[Student] = relationship(back_populates="assessments")
 
 
+class PostureAnalysis(Base):
+    __tablename__ = "posture_analyses"
+    __table_args__ = (Index("ix_posture_analyses_student_created", "student_id", "created_at"),)
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    detected_view: Mapped[str] = mapped_column(String(10), default="")
+    analysis_source: Mapped[str] = mapped_column(String(10), default="llm")
+    # float32 vectors, see analysis_history.py for the layouts.
+    metrics_blob: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    landmarks_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    detected_deviations: Mapped[str] = mapped_column(Text, default="[]")
+    clinical_analysis: Mapped[str] = mapped_column(Text, default="")
+
+    student: Mapped[Student] = relationship(back_populates="posture_analyses")
+
+
+# Running regression sums per student and metric, where t is days since the first analysis (origin_at).
+class StudentMetricStats(Base):
+    __tablename__ = "student_metric_stats"
+
+    student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), primary_key=True)
+    metric: Mapped[str] = mapped_column(String(40), primary_key=True)
+    n: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    origin_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    last_at: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    first_value: Mapped[float] = mapped_column(Float, nullable=False)
+    last_value: Mapped[float] = mapped_column(Float, nullable=False)
+    previous_value: Mapped[float | None] = mapped_column(Float, nullable=True)
+    ema: Mapped[float] = mapped_column(Float, nullable=False)
+    sum_t: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    sum_y: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    sum_tt: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    sum_ty: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+    sum_yy: Mapped[float] = mapped_column(Float, default=0.0, nullable=False)
+
+
 class Appointment(Base):
     __tablename__ = "appointments"
+    # Covers the overlap checks and free-slot lookups, which only need these columns per instructor.
+    __table_args__ = (Index("ix_appointments_instructor_interval", "instructor_id", "start_time", "end_time"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
     student_id: Mapped[int] = mapped_column(ForeignKey("students.id"), nullable=False, index=True)
@@ -67,3 +111,22 @@ class Appointment(Base):
 
     student: Mapped[Student] = relationship(back_populates="appointments")
     instructor: Mapped[Instructor] = relationship(back_populates="appointments")
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(40), nullable=False)
+    status: Mapped[str] = mapped_column(String(20), nullable=False, default="queued", index=True)
+    payload: Mapped[str] = mapped_column(Text, default="{}")
+    input_blob: Mapped[bytes | None] = mapped_column(LargeBinary, nullable=True)
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)
+    error: Mapped[str] = mapped_column(Text, default="")
+    attempts: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    callback_url: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    owner: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    lease_expires_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.orm import Query, load_only
+
+MAX_PAGE_SIZE = 500
+
+
+def encode_cursor(values: dict[str, Any]) -> str:
+    raw = json.dumps(jsonable_encoder(values), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeError) as exc:
+        raise ValueError("Invalid cursor.") from exc
+    if not isinstance(values, dict):
+        raise ValueError("Invalid cursor.")
+    return values
+
+
+def parse_fields(fields: str | None, schema: type[BaseModel]) -> list[str] | None:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = sorted(set(requested) - set(schema.model_fields))
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    # The id is always returned so clients can keep paging and link to the detail view.
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def project(query: Query, model: type, fields: list[str] | None) -> Query:
+    if not fields:
+        return query
+    # Columns outside the projection (e.g. the long analysis and plan texts) are never selected.
+    return query.options(load_only(*(getattr(model, field) for field in fields)))
+
+
+def fetch_page(query: Query, limit: int | None) -> tuple[list[Any], bool]:
+    if limit is None:
+        return query.all(), False
+    rows = query.limit(limit + 1).all()
+    return rows[:limit], len(rows) > limit
+
+
+def serialize_rows(rows: list[Any], schema: type[BaseModel], fields: list[str] | None) -> list[dict[str, Any]]:
+    if fields:
+        return [{field: getattr(row, field) for field in fields} for row in rows]
+    return [schema.model_validate(row).model_dump() for row in rows]
+
+
+def encode_json(payload: Any) -> tuple[bytes, str]:
+    body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_response(request: Request, body: bytes, etag: str, headers: dict[str, str] | None = None) -> Response:
+    headers = {**(headers or {}), "ETag": etag}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def page_response(request: Request, items: list[dict[str, Any]], next_cursor: str | None = None) -> Response:
+    body, etag = encode_json(items)
+    return etag_response(request, body, etag, {"X-Next-Cursor": next_cursor} if next_cursor else None)
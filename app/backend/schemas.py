@@ -1,7 +1,7 @@
 from __future__ import annotations
 
-from datetime import date, datetime
-from typing import Literal
+from datetime import date, datetime, time
+from typing import Any, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -76,6 +76,48 @@ class AssessmentRead(AssessmentCreate):
     model_config = ConfigDict(from_attributes=True)
 
 
+class PostureAnalysisRead(BaseModel):
+    id: int
+    student_id: int
+    created_at: datetime
+    detected_view: str
+    analysis_source: str
+    angles: dict[str, float]
+    joint_angles: dict[str, float]
+    detected_deviations: list[str]
+    clinical_analysis: str
+    landmarks_2d: list[dict[str, float | int]] | None = None
+    landmarks_3d: list[dict[str, float | int]] | None = None
+
+
+class ProgressPoint(BaseModel):
+    created_at: datetime
+    value: float
+    moving_average: float
+
+
+class MetricProgress(BaseModel):
+    metric: str
+    count: int
+    first_at: datetime
+    last_at: datetime
+    first_value: float
+    last_value: float
+    delta_total: float
+    delta_last: float | None = None
+    mean: float
+    std: float
+    ema: float
+    slope_per_30_days: float | None = None
+    series: list[ProgressPoint] = Field(default_factory=list)
+
+
+class StudentProgressRead(BaseModel):
+    student_id: int
+    analyses: int
+    metrics: list[MetricProgress]
+
+
 class AppointmentBase(BaseModel):
     student_id: int
     instructor_id: int
@@ -105,6 +147,54 @@ class AppointmentRead(AppointmentBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CalendarAppointment(AppointmentRead):
+    student_name: str
+    instructor_name: str
+
+
+class CalendarDay(BaseModel):
+    date: date
+    appointments: list[CalendarAppointment]
+
+
+class CalendarRead(BaseModel):
+    start: datetime
+    end: datetime
+    total: int
+    days: list[CalendarDay]
+
+
+class AppointmentSeriesCreate(BaseModel):
+    student_id: int
+    instructor_id: int
+    first_date: date
+    weekdays: list[Literal[0, 1, 2, 3, 4, 5, 6]] = Field(..., min_length=1, description="0 = Monday ... 6 = Sunday")
+    start_time: time
+    duration_minutes: int = Field(..., ge=5, le=720)
+    weeks: int = Field(..., ge=1, le=52)
+    status: Literal["booked", "completed", "canceled"] = "booked"
+    notes: str = ""
+    all_or_nothing: bool = False
+
+
+class SeriesConflict(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    conflicting_appointment_id: int
+
+
+class AppointmentSeriesRead(BaseModel):
+    requested: int
+    created: list[AppointmentRead]
+    conflicts: list[SeriesConflict]
+
+
+class FreeSlot(BaseModel):
+    start_time: datetime
+    end_time: datetime
+    minutes: int
+
+
 class WorkoutPlanRequest(BaseModel):
     student_id: int
     language: Literal["pt", "en"] = "en"
@@ -117,5 +207,30 @@ class WorkoutExercise(BaseModel):
     clinical_reason: str
 
 
+class TokenUsage(BaseModel):
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    llm_calls: int = 0
+    context_tokens_estimate: int = 0
+
+
 class WorkoutPlanResponse(BaseModel):
     workout_plan: list[WorkoutExercise]
+    usage: TokenUsage | None = None
+
+
+class WorkoutPlanJobRequest(WorkoutPlanRequest):
+    callback_url: str | None = Field(default=None, max_length=500)
+
+
+class JobRead(BaseModel):
+    id: str
+    kind: str
+    status: Literal["queued", "running", "succeeded", "failed"]
+    attempts: int
+    result: dict[str, Any] | None = None
+    error: str = ""
+    created_at: datetime
+    updated_at: datetime
+    finished_at: datetime | None = None
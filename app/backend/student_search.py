@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import logging
+import os
+import re
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+import models
+
+logger = logging.getLogger(__name__)
+
+STUDENT_SEARCH_FTS = os.getenv("STUDENT_SEARCH_FTS", "1") == "1"
+# Shorter digit fragments match too many CPFs and phones to be useful.
+MIN_DIGIT_TOKEN = 3
+
+# rowid mirrors students.id. "digits" holds every suffix of the CPF and phone digits, so a prefix
+# query on it matches any run of digits the user types, with or without punctuation.
+CREATE_FTS_TABLE = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS students_fts USING fts5("
+    "name, digits, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+_fts_enabled = False
+
+
+def fts_enabled() -> bool:
+    return _fts_enabled
+
+
+def digit_tokens(*values: str | None) -> str:
+    tokens: list[str] = []
+    for value in values:
+        digits = re.sub(r"\D", "", value or "")
+        tokens.extend(digits[start:] for start in range(len(digits) - MIN_DIGIT_TOKEN + 1))
+    return " ".join(dict.fromkeys(tokens))
+
+
+def _index_row(student: models.Student) -> dict[str, object]:
+    return {"id": student.id, "name": student.name, "digits": digit_tokens(student.tax_id_cpf, student.phone)}
+
+
+def ensure_student_search_index(connection: Connection) -> bool:
+    global _fts_enabled
+    if not STUDENT_SEARCH_FTS:
+        _fts_enabled = False
+        return False
+    try:
+        connection.execute(text(CREATE_FTS_TABLE))
+    except OperationalError:
+        logger.warning("SQLite was built without FTS5; student search falls back to LIKE scans.")
+        _fts_enabled = False
+        return False
+
+    # Rebuilt on startup only when it drifted from the students table, e.g. rows written while the
+    # index was disabled or a database restored without it.
+    indexed = connection.execute(text("SELECT count(*) FROM students_fts")).scalar_one()
+    students = connection.execute(text("SELECT count(*) FROM students")).scalar_one()
+    if indexed != students:
+        rebuild_student_search_index(connection)
+    _fts_enabled = True
+    return True
+
+
+def rebuild_student_search_index(connection: Connection) -> None:
+    connection.execute(text("DELETE FROM students_fts"))
+    rows = connection.execute(text("SELECT id, name, tax_id_cpf, phone FROM students")).all()
+    if rows:
+        connection.execute(
+            text("INSERT INTO students_fts(rowid, name, digits) VALUES (:id, :name, :digits)"),
+            [{"id": row.id, "name": row.name, "digits": digit_tokens(row.tax_id_cpf, row.phone)} for row in rows],
+        )
+
+
+def index_student(db: Session, student: models.Student) -> None:
+    if not _fts_enabled:
+        return
+    db.flush()
+    db.execute(text("DELETE FROM students_fts WHERE rowid = :id"), {"id": student.id})
+    db.execute(text("INSERT INTO students_fts(rowid, name, digits) VALUES (:id, :name, :digits)"), _index_row(student))
+
+
+def unindex_student(db: Session, student_id: int) -> None:
+    if _fts_enabled:
+        db.execute(text("DELETE FROM students_fts WHERE rowid = :id"), {"id": student_id})
+
+
+def build_match_query(query: str) -> str | None:
+    clauses: list[str] = []
+    for term in query.split():
+        if re.fullmatch(r"[\d.\-()/+]+", term):
+            digits = re.sub(r"\D", "", term)
+            if len(digits) >= MIN_DIGIT_TOKEN:
+                clauses.append(f'digits : "{digits}"*')
+            continue
+        words = re.findall(r"\w+", term)
+        clauses.extend(f'name : "{word}"*' for word in words)
+    return " AND ".join(clauses) or None
+
+
+def search_student_ids(db: Session, query: str, limit: int | None = None, offset: int = 0) -> list[int] | None:
+    # Returns ranked ids, or None when the caller should fall back to the LIKE scan.
+    match = build_match_query(query)
+    if not _fts_enabled or match is None:
+        return None
+    sql = "SELECT rowid FROM students_fts WHERE students_fts MATCH :match ORDER BY bm25(students_fts, 10.0, 1.0), rowid DESC"
+    params: dict[str, object] = {"match": match}
+    if limit is not None or offset:
+        # SQLite reads a negative LIMIT as "no limit", so an offset alone still applies.
+        sql += " LIMIT :limit OFFSET :offset"
+        params.update(limit=-1 if limit is None else limit, offset=offset)
+    return [row[0] for row in db.execute(text(sql), params)]
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+from typing import Callable
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from tools.pose_sequence import sniff_video_type
+from tools.posture_tools import IMAGE_SNIFF_BYTES, sniff_image_type
+
+MAX_UPLOAD_BYTES = max(1, int(os.getenv("MAX_UPLOAD_BYTES", str(15 * 1024 * 1024))))
+MAX_VIDEO_UPLOAD_BYTES = max(1, int(os.getenv("MAX_VIDEO_UPLOAD_BYTES", str(50 * 1024 * 1024))))
+UPLOAD_CHUNK_BYTES = 256 * 1024
+# Room for the multipart boundaries, part headers and form fields around the files.
+MULTIPART_OVERHEAD_BYTES = 1024 * 1024
+
+
+def upload_too_large(max_bytes: int = MAX_UPLOAD_BYTES) -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Uploaded file exceeds the {max_bytes // (1024 * 1024)} MB limit.")
+
+
+# Reads an upload in chunks, trusting its leading bytes rather than the client's content type: `limit_for`
+# returns the size limit for an accepted header, or None to reject it. Reading stops as soon as the limit is
+# crossed. By the time this runs Starlette has already spooled the whole
+# multipart body (to disk past 1 MB per file), so the cap only bounds the bytes copied into memory for
+# decoding; what a client can send at all is bounded by RequestSizeLimitMiddleware.
+async def read_upload(
+    upload: UploadFile,
+    limit_for: Callable[[bytes], int | None],
+    invalid_detail: str,
+    empty_detail: str = "Uploaded image is empty.",
+) -> bytes:
+    header = await upload.read(IMAGE_SNIFF_BYTES)
+    if not header:
+        raise HTTPException(status_code=400, detail=empty_detail)
+    max_bytes = limit_for(header)
+    if max_bytes is None:
+        raise HTTPException(status_code=400, detail=invalid_detail)
+    if upload.size is not None and upload.size > max_bytes:
+        raise upload_too_large(max_bytes)
+
+    buffer = bytearray(header)
+    while chunk := await upload.read(UPLOAD_CHUNK_BYTES):
+        buffer += chunk
+        if len(buffer) > max_bytes:
+            raise upload_too_large(max_bytes)
+    return bytes(buffer)
+
+
+async def read_image_upload(upload: UploadFile, max_bytes: int = MAX_UPLOAD_BYTES) -> bytes:
+    return await read_upload(
+        upload,
+        lambda header: max_bytes if sniff_image_type(header) is not None else None,
+        "Invalid file type. Please upload an image.",
+    )
+
+
+# Frames get the image limit; only a clip uploaded on its own may use the larger video limit.
+async def read_frame_upload(upload: UploadFile, allow_video: bool) -> bytes:
+    def frame_limit(header: bytes) -> int | None:
+        if sniff_image_type(header) is not None:
+            return MAX_UPLOAD_BYTES
+        if sniff_video_type(header) is None:
+            return None
+        if not allow_video:
+            raise HTTPException(status_code=400, detail="Upload either a single video or a set of images.")
+        return MAX_VIDEO_UPLOAD_BYTES
+
+    return await read_upload(
+        upload,
+        frame_limit,
+        "Invalid file type. Please upload a video or images.",
+        "Uploaded frame or video is empty.",
+    )
+
+
+# Starlette parses the whole multipart body before the endpoint runs, so oversized requests are refused here
+# instead: up front from Content-Length, or, for bodies sent without one, as soon as the bytes received pass
+# the limit for the request's path.
+class RequestSizeLimitMiddleware:
+    def __init__(self, app: ASGIApp, max_bytes: int, path_limits: dict[str, int] | None = None) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_limits = path_limits or {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = min(self.path_limits.get(scope["path"], self.max_bytes), self.max_bytes)
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            exc = upload_too_large(max_bytes)
+            response = JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    raise upload_too_large(max_bytes)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -20,10 +20,15 @@ export const updateInstructor = (instructorId, payload) => api.put(`/instructors
 export const deleteInstructor = (instructorId) => api.delete(`/instructors/${instructorId}`);
 
 export const createAppointment = (payload) => api.post('/appointments', payload);
+export const createAppointmentSeries = (payload) => api.post('/appointments/series', payload);
 export const fetchAppointments = (date = '') =>
   api.get('/appointments', {
     params: date ? { date } : {},
   });
+export const fetchCalendar = (from, to, instructorId = null) =>
+  api.get('/calendar', {
+    params: instructorId ? { from, to, instructor_id: instructorId } : { from, to },
+  });
 export const updateAppointment = (appointmentId, payload) => api.put(`/appointments/${appointmentId}`, payload);
 export const deleteAppointment = (appointmentId) => api.delete(`/appointments/${appointmentId}`);
 
@@ -36,4 +41,70 @@ export const analyzeImage = (formData) =>
 
 export const generateWorkoutPlan = (payload) => api.post('/generate_plan', payload);
 
+// Reads the Server-Sent Events stream of /generate_plan/stream, calling onEvent(event, data) per message.
+export const streamWorkoutPlan = async (payload, onEvent) => {
+  const response = await fetch(`${api.defaults.baseURL}/generate_plan/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify(payload),
+  });
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    throw new Error(body.detail || response.statusText);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf('\n\n');
+    while (boundary !== -1) {
+      const message = buffer.slice(0, boundary);
+      buffer = buffer.slice(boundary + 2);
+      const event = message.match(/^event: (.*)$/m)?.[1] || 'message';
+      const data = message.match(/^data: (.*)$/m)?.[1];
+      if (data) {
+        onEvent(event, JSON.parse(data));
+      }
+      boundary = buffer.indexOf('\n\n');
+    }
+  }
+};
+
+export const streamFrameAnalysis = async (formData, onEvent) => {
+  const response = await fetch(`${api.defaults.baseURL}/analyze/frames`, {
+    method: 'POST',
+    body: formData,
+  });
+  if (!response.ok) {
+    const body = await response.json().catch(() => ({}));
+    throw new Error(body.detail || response.statusText);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      break;
+    }
+    buffer += decoder.decode(value, { stream: true });
+    let boundary = buffer.indexOf('\n');
+    while (boundary !== -1) {
+      const line = buffer.slice(0, boundary).trim();
+      buffer = buffer.slice(boundary + 1);
+      if (line) {
+        onEvent(JSON.parse(line));
+      }
+      boundary = buffer.indexOf('\n');
+    }
+  }
+};
+
 export default api;
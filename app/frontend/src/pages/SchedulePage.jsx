@@ -4,7 +4,7 @@ import { CalendarPlus2, Clock3, Loader2, Search, Trash2 } from 'lucide-react';
 import {
   createAppointment,
   deleteAppointment,
-  fetchAppointments,
+  fetchCalendar,
   fetchInstructors,
   fetchStudents,
   updateAppointment,
@@ -94,11 +94,12 @@ function SchedulePage() {
       const [studentsRes, instructorsRes, appointmentsRes] = await Promise.all([
         fetchStudents(''),
         fetchInstructors(),
-        fetchAppointments(''),
+        // Only the visible week, with student and instructor names already joined in.
+        fetchCalendar(`${slotDateFromDay(0)}T00:00:00`, `${slotDateFromDay(days.length)}T00:00:00`),
       ]);
       setStudents(studentsRes.data);
       setInstructors(instructorsRes.data);
-      setAppointments(appointmentsRes.data);
+      setAppointments(appointmentsRes.data.days.flatMap((day) => day.appointments));
     } catch {
       setStudents([]);
       setInstructors([]);
@@ -118,12 +119,6 @@ function SchedulePage() {
     return map;
   }, [students]);
 
-  const instructorMap = useMemo(() => {
-    const map = new Map();
-    instructors.forEach((instructor) => map.set(instructor.id, instructor));
-    return map;
-  }, [instructors]);
-
   const getStudentWorkoutPlan = (studentId) => {
     const student = studentMap.get(studentId);
     if (!student?.latest_workout_plan) {
@@ -329,7 +324,7 @@ function SchedulePage() {
                                 ? t('schedule.statusCompleted')
                                 : t('schedule.statusCanceled')}
                           </p>
-                          <p>{studentMap.get(appointment.student_id)?.name || t('schedule.student')}</p>
+                          <p>{appointment.student_name || t('schedule.student')}</p>
                           {getStudentWorkoutPlan(appointment.student_id).length > 0 ? (
                             <p className="text-[11px] font-medium">{getStudentWorkoutPlan(appointment.student_id).length} treinos</p>
                           ) : null}
@@ -436,10 +431,10 @@ function SchedulePage() {
             {!isEditing ? (
               <div className="mt-4 space-y-3 text-sm text-slate-700 dark:text-slate-200">
                 <p>
-                  <span className="font-semibold text-slateSoft dark:text-slate-100">{t('schedule.student')}:</span> {studentMap.get(detailAppointment.student_id)?.name || t('schedule.unknown')}
+                  <span className="font-semibold text-slateSoft dark:text-slate-100">{t('schedule.student')}:</span> {detailAppointment.student_name || t('schedule.unknown')}
                 </p>
                 <p>
-                  <span className="font-semibold text-slateSoft dark:text-slate-100">{t('schedule.instructor')}:</span> {instructorMap.get(detailAppointment.instructor_id)?.name || t('schedule.unknown')}
+                  <span className="font-semibold text-slateSoft dark:text-slate-100">{t('schedule.instructor')}:</span> {detailAppointment.instructor_name || t('schedule.unknown')}
                 </p>
                 <p>
                   <span className="font-semibold text-slateSoft dark:text-slate-100">{t('schedule.time')}:</span> {formatReadableDateTime(detailAppointment.start_time)}
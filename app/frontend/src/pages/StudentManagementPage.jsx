@@ -1,4 +1,4 @@
-import { useEffect, useMemo, useState } from 'react';
+import { useEffect, useMemo, useRef, useState } from 'react';
 import { CheckCircle2, Loader2, Pencil, Search, Trash2, X } from 'lucide-react';
 
 import { createStudent, deleteStudent, fetchStudents, updateStudent } from '../api';
@@ -104,15 +104,26 @@ function StudentManagementPage() {
     return formData.goals.length > 0;
   }, [step, formData]);
 
+  const latestSearchRef = useRef(0);
+
   const loadStudents = async (query = '') => {
+    // Search-as-you-type can resolve out of order; only the newest request updates the list.
+    const searchId = latestSearchRef.current + 1;
+    latestSearchRef.current = searchId;
     setIsSearching(true);
     try {
       const response = await fetchStudents(query);
-      setStudents(response.data);
+      if (searchId === latestSearchRef.current) {
+        setStudents(response.data);
+      }
     } catch {
-      setStudents([]);
+      if (searchId === latestSearchRef.current) {
+        setStudents([]);
+      }
     } finally {
-      setIsSearching(false);
+      if (searchId === latestSearchRef.current) {
+        setIsSearching(false);
+      }
     }
   };
 
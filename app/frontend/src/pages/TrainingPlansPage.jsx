@@ -1,6 +1,6 @@
 import { Loader2 } from 'lucide-react';
 import { useEffect, useMemo, useState } from 'react';
-import { fetchStudents, generateWorkoutPlan } from '../api';
+import { fetchStudents, streamWorkoutPlan } from '../api';
 import { useI18n } from '../i18n';
 import { useToast } from '../components/ToastProvider';
 
@@ -79,14 +79,27 @@ function TrainingPlansPage() {
     }
 
     setIsGenerating(true);
+    setGeneratedPlan([]);
     try {
-      const response = await generateWorkoutPlan({ student_id: selectedStudent.id, language });
-      const plan = Array.isArray(response.data?.workout_plan) ? response.data.workout_plan : [];
-      setGeneratedPlan(plan);
+      let streamError = null;
+      await streamWorkoutPlan({ student_id: selectedStudent.id, language }, (event, data) => {
+        if (event === 'exercise') {
+          setGeneratedPlan((current) => [...current, data]);
+        } else if (event === 'reset') {
+          setGeneratedPlan([]);
+        } else if (event === 'done') {
+          setGeneratedPlan(Array.isArray(data?.workout_plan) ? data.workout_plan : []);
+        } else if (event === 'error') {
+          streamError = new Error(data?.detail);
+        }
+      });
+      if (streamError) {
+        throw streamError;
+      }
       await loadStudents();
       pushToast({ type: 'success', message: t('plans.generated', { name: selectedStudent.name }) });
     } catch (error) {
-      const message = error?.response?.data?.detail || t('plans.loadError');
+      const message = error?.message || t('plans.loadError');
       pushToast({ type: 'error', message });
     } finally {
       setIsGenerating(false);
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+from typing import Any
+
+import numpy as np
+
+from benchmarks.bench_vision import load_pose_image
+from benchmarks.harness import Recorder
+from benchmarks.stubs import STUB_ANALYSIS, offline_agents
+
+CONCURRENT_PLANS = 8
+
+STUDENT_PROFILE = {
+    "student_id": 1,
+    "name": "Aluno Benchmark",
+    "age": 42,
+    "goal": "Melhorar a postura e reduzir dores lombares",
+    "medical_notes": "Hérnia de disco L4-L5, evitar flexão de tronco com carga.",
+    "phone": "11999990000",
+    "tax_id_cpf": "123.456.789-00",
+    "latest_detected_deviations": STUB_ANALYSIS["detected_deviations"],
+    "latest_clinical_analysis": STUB_ANALYSIS["clinical_analysis"],
+}
+
+
+def sample_posture_data() -> dict[str, Any]:
+    from tools import posture_tools
+
+    rng = np.random.default_rng(5)
+    count = posture_tools.NUM_POSE_LANDMARKS
+    points = np.column_stack([rng.normal(0, 0.3, (count, 3)), rng.uniform(0.5, 1.0, count)]).astype(np.float32)
+    angles, joint_angles, detected_view = posture_tools.posture_metrics(points)
+    return {
+        "angles": angles,
+        "joint_angles": joint_angles,
+        "detected_view": detected_view,
+        "landmarks_2d": posture_tools.landmarks_payload(points, include_z=False),
+        "landmarks_3d": posture_tools.landmarks_payload(points, include_z=True),
+    }
+
+
+# The model and the scraper are replaced by stubs that sleep for a fixed latency, so these timings are
+# that latency plus the orchestration around it: prompt building, JSON parsing, tool dispatch and caching.
+def run_agents(recorder: Recorder, options: argparse.Namespace) -> None:
+    from agents import pipeline, workout_agent
+
+    llm_latency_s = options.llm_latency_ms / 1000.0
+    scrape_latency_s = options.scrape_latency_ms / 1000.0
+    extra = {"llm_latency_ms": options.llm_latency_ms}
+    posture_data = sample_posture_data()
+    clinical_analysis = STUB_ANALYSIS["clinical_analysis"]
+    loop = asyncio.new_event_loop()
+    try:
+        with offline_agents(llm_latency_s, scrape_latency_s):
+            recorder.measure(
+                "agents/interpretation_sync",
+                lambda: pipeline.run_interpretation_stage("bench", posture_data, "en", use_cache=False),
+                **extra,
+            )
+            recorder.measure(
+                "agents/interpretation_async",
+                lambda: loop.run_until_complete(
+                    pipeline.run_interpretation_stage_async("bench", posture_data, "en", use_cache=False)
+                ),
+                **extra,
+            )
+            recorder.measure(
+                "agents/interpretation_cached",
+                lambda: pipeline.run_interpretation_stage("bench", posture_data, "en"),
+            )
+
+        for source in ("catalog", "web"):
+            source_extra = {**extra, "scrape_latency_ms": options.scrape_latency_ms} if source == "web" else extra
+            with offline_agents(llm_latency_s, scrape_latency_s, exercise_source=source) as (sync_client, _):
+                sync_client.calls = 0
+                stats = recorder.measure(
+                    f"agents/plan_{source}_sync",
+                    lambda: workout_agent.generate_workout_plan(STUDENT_PROFILE, clinical_analysis, "pt"),
+                    **source_extra,
+                )
+                if stats:
+                    stats["llm_calls_per_plan"] = round(sync_client.calls / (recorder.warmup + stats["n"]), 2)
+                recorder.measure(
+                    f"agents/plan_{source}_async",
+                    lambda: loop.run_until_complete(
+                        workout_agent.generate_workout_plan_async(STUDENT_PROFILE, clinical_analysis, "pt")
+                    ),
+                    **source_extra,
+                )
+
+        async def concurrent_plans() -> None:
+            await asyncio.gather(
+                *(
+                    workout_agent.generate_workout_plan_async(STUDENT_PROFILE, clinical_analysis, "pt")
+                    for _ in range(CONCURRENT_PLANS)
+                )
+            )
+
+        with offline_agents(llm_latency_s, scrape_latency_s):
+            recorder.measure(
+                f"agents/plan_catalog_async_x{CONCURRENT_PLANS}_concurrent",
+                lambda: loop.run_until_complete(concurrent_plans()),
+                **extra,
+            )
+    finally:
+        loop.close()
+
+    # The end-to-end case needs a real person in the frame; the synthetic image has none.
+    if options.image:
+        image_bytes = load_pose_image(options)
+        with offline_agents(llm_latency_s, scrape_latency_s):
+            recorder.measure(
+                "agents/postural_pipeline_uncached",
+                lambda: pipeline.run_postural_pipeline(image_bytes, "en", use_cache=False),
+                repeat=max(3, recorder.repeat // 4),
+                **extra,
+            )
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from benchmarks.harness import Recorder
+
+FIRST_NAMES = ("Ana", "João", "Maria", "José", "Luíza", "Conceição", "Pedro", "Beatriz", "Raí", "Márcia")
+LAST_NAMES = ("Silva", "Souza", "Araújo", "Gonçalves", "Lima", "Simões", "Pereira", "Tavares", "Melo", "Brandão")
+SEED_BATCH = 5000
+STUDENTS_PER_INSTRUCTOR = 100
+# Appointments rotate over this many instructors, one per hour, so no two appointments ever overlap.
+SCHEDULED_INSTRUCTORS = 20
+SCHEDULE_START = datetime(2026, 1, 5, 7)
+BENCH_SLOT_START = datetime(2040, 1, 1)
+
+
+def _cpf(number: int) -> str:
+    digits = f"{number:011d}"
+    return f"{digits[:3]}.{digits[3:6]}.{digits[6:9]}-{digits[9:]}"
+
+
+# Grows the database from `start` to `stop` students, with one appointment per student and one instructor
+# per STUDENTS_PER_INSTRUCTOR students, then rebuilds the search index and drops in-memory caches.
+def seed(main: Any, start: int, stop: int) -> None:
+    from sqlalchemy import func, insert, select
+
+    import models
+    from student_search import rebuild_student_search_index
+
+    with main.engine.begin() as connection:
+        existing = connection.execute(select(func.count(models.Instructor.id))).scalar_one()
+        wanted = max(SCHEDULED_INSTRUCTORS, stop // STUDENTS_PER_INSTRUCTOR)
+        if wanted > existing:
+            connection.execute(
+                insert(models.Instructor),
+                [
+                    {
+                        "name": f"Instrutor {number}",
+                        "phone": f"1198{number:07d}",
+                        "email": f"instrutor{number}@bench.local",
+                        "specialty": "Pilates",
+                        "notes": "",
+                    }
+                    for number in range(existing + 1, wanted + 1)
+                ],
+            )
+
+        for batch_start in range(start, stop, SEED_BATCH):
+            batch = range(batch_start, min(stop, batch_start + SEED_BATCH))
+            connection.execute(
+                insert(models.Student),
+                [
+                    {
+                        "id": index + 1,
+                        "name": f"{FIRST_NAMES[index % 10]} {LAST_NAMES[(index // 10) % 10]} {index}",
+                        "tax_id_cpf": _cpf(10_000_000 + index),
+                        "date_of_birth": date(1960 + index % 40, 1 + index % 12, 1 + index % 28),
+                        "phone": f"119{index:08d}",
+                        "medical_notes": "Lombalgia crônica" if index % 7 == 0 else "",
+                        "goals": "Postura",
+                    }
+                    for index in batch
+                ],
+            )
+            connection.execute(
+                insert(models.Appointment),
+                [
+                    {
+                        "student_id": index + 1,
+                        "instructor_id": index % SCHEDULED_INSTRUCTORS + 1,
+                        "start_time": SCHEDULE_START + timedelta(hours=index),
+                        "end_time": SCHEDULE_START + timedelta(hours=index, minutes=50),
+                        "status": "booked",
+                        "notes": "",
+                        "created_at": datetime(2026, 1, 1),
+                    }
+                    for index in batch
+                ],
+            )
+        rebuild_student_search_index(connection)
+
+    main.appointment_index.clear()
+    main.calendar_cache.bump()
+
+
+def _checked(response: Any) -> Any:
+    if response.status_code >= 400:
+        request = response.request
+        raise RuntimeError(f"{request.method} {request.url} -> {response.status_code}: {response.text[:200]}")
+    return response
+
+
+def run_api(recorder: Recorder, options: argparse.Namespace) -> None:
+    from fastapi.testclient import TestClient
+
+    import main
+
+    # No context manager: the lifespan (pose pool warm-up, job workers) is not needed for these paths.
+    client = TestClient(main.app)
+    counter = itertools.count(1)
+    seeded = 0
+    for rows in sorted(options.rows):
+        seed(main, seeded, rows)
+        seeded = rows
+        tag = f"api/{rows // 1000}k"
+        middle = rows // 2
+        instructor_id = 1
+        week = {"from": "2026-01-05T00:00:00", "to": "2026-01-12T00:00:00"}
+        heavy_repeat = max(3, recorder.repeat // 5) if rows >= 50_000 else None
+
+        recorder.measure(f"{tag}/list_students_all", lambda: _checked(client.get("/students")), repeat=heavy_repeat)
+        recorder.measure(f"{tag}/list_students_page", lambda: _checked(client.get("/students", params={"limit": 50})))
+        recorder.measure(
+            f"{tag}/list_students_projected",
+            lambda: _checked(client.get("/students", params={"limit": 50, "fields": "id,name"})),
+        )
+        recorder.measure(
+            f"{tag}/search_students_name",
+            lambda: _checked(client.get("/students", params={"q": "conceicao gonçalves", "limit": 20})),
+        )
+        recorder.measure(
+            f"{tag}/search_students_cpf_digits",
+            lambda: _checked(client.get("/students", params={"q": _cpf(10_000_000 + middle)[4:11], "limit": 20})),
+        )
+        recorder.measure(f"{tag}/get_student", lambda: _checked(client.get(f"/students/{middle}")))
+        recorder.measure(
+            f"{tag}/create_student",
+            lambda: _checked(
+                client.post(
+                    "/students",
+                    json={
+                        "name": f"Benchmark Aluno {next(counter)}",
+                        "tax_id_cpf": _cpf(90_000_000_000 + next(counter)),
+                        "date_of_birth": "1990-01-01",
+                        "phone": "11999990000",
+                    },
+                )
+            ),
+        )
+        recorder.measure(
+            f"{tag}/update_student",
+            lambda: _checked(client.put(f"/students/{middle}", json={"name": f"Aluno Renomeado {next(counter)}"})),
+        )
+        recorder.measure(
+            f"{tag}/list_instructors_page", lambda: _checked(client.get("/instructors", params={"limit": 50}))
+        )
+        recorder.measure(
+            f"{tag}/list_appointments_instructor_page",
+            lambda: _checked(client.get("/appointments", params={"instructor_id": instructor_id, "limit": 50})),
+        )
+
+        def create_appointment() -> None:
+            start_time = BENCH_SLOT_START + timedelta(hours=next(counter))
+            payload = {
+                "student_id": 1,
+                "instructor_id": instructor_id,
+                "start_time": start_time.isoformat(),
+                "end_time": (start_time + timedelta(minutes=50)).isoformat(),
+            }
+            _checked(client.post("/appointments", json=payload))
+
+        recorder.measure(f"{tag}/create_appointment", create_appointment)
+        recorder.measure(
+            f"{tag}/free_slots_week",
+            lambda: _checked(client.get(f"/instructors/{instructor_id}/free_slots", params=week)),
+        )
+
+        def calendar_cold() -> None:
+            main.calendar_cache.bump()
+            _checked(client.get("/calendar", params=week))
+
+        recorder.measure(f"{tag}/calendar_week_cold", calendar_cold)
+        recorder.measure(f"{tag}/calendar_week_cached", lambda: _checked(client.get("/calendar", params=week)))
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from benchmarks.harness import Recorder
+
+DECODE_RESOLUTIONS = ((640, 480), (1280, 720), (1920, 1080), (3024, 4032), (4000, 3000))
+POSE_COMPLEXITIES = (0, 1, 2)
+
+
+# Smooth gradients with mild noise compress like a photo, so JPEG sizes and decode costs are realistic.
+def synthetic_photo(width: int, height: int, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    channels = [
+        128 + 100 * np.sin(x / (width / 6.0)),
+        128 + 100 * np.cos(y / (height / 5.0)),
+        128 + 80 * np.sin((x + y) / (width / 4.0)),
+    ]
+    image = np.dstack(channels) + rng.normal(0, 6, (height, width, 3))
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def encode(image: np.ndarray, extension: str) -> bytes:
+    ok, buffer = cv2.imencode(extension, image, [cv2.IMWRITE_JPEG_QUALITY, 90] if extension == ".jpg" else [])
+    if not ok:
+        raise RuntimeError(f"Could not encode a {extension} benchmark image.")
+    return buffer.tobytes()
+
+
+def load_pose_image(options: argparse.Namespace) -> bytes:
+    if options.image:
+        return Path(options.image).read_bytes()
+    return encode(synthetic_photo(1280, 960), ".jpg")
+
+
+def run_decode(recorder: Recorder, options: argparse.Namespace) -> None:
+    from tools import posture_tools
+
+    resolutions = DECODE_RESOLUTIONS[:3] if recorder.quick else DECODE_RESOLUTIONS
+    for width, height in resolutions:
+        image = synthetic_photo(width, height)
+        for extension in (".jpg", ".png"):
+            data = encode(image, extension)
+            label = f"decode/{extension[1:]}_{width}x{height}"
+            extra = {"bytes": len(data), "megapixels": round(width * height / 1e6, 2)}
+            recorder.measure(label, lambda data=data: posture_tools._decode_image(data), **extra)
+            if extension == ".jpg":
+                previous = posture_tools.POSE_REDUCED_DECODE
+                posture_tools.POSE_REDUCED_DECODE = False
+                try:
+                    recorder.measure(
+                        f"{label}_full_scale", lambda data=data: posture_tools._decode_image(data), **extra
+                    )
+                finally:
+                    posture_tools.POSE_REDUCED_DECODE = previous
+        recorder.measure(
+            f"decode/sniff_and_jpeg_dimensions_{width}x{height}",
+            lambda data=encode(image, ".jpg"): (
+                posture_tools.sniff_image_type(data[:12]),
+                posture_tools.jpeg_dimensions(data),
+            ),
+        )
+
+
+def run_pose(recorder: Recorder, options: argparse.Namespace) -> None:
+    from tools import posture_tools
+
+    image_bytes = load_pose_image(options)
+    image = posture_tools.prepare_image(image_bytes)
+    complexities = (posture_tools.POSE_MODEL_COMPLEXITY,) if recorder.quick else POSE_COMPLEXITIES
+    original_tiers = posture_tools.POSE_TIERS
+    repeat = max(3, recorder.repeat // 4)
+    try:
+        for complexity in complexities:
+            posture_tools.POSE_TIERS = (
+                posture_tools.PoseTier("fixed", complexity, posture_tools.POSE_MAX_IMAGE_SIZE),
+            )
+            try:
+                result, _, _ = posture_tools._run_pose_tiers(image)
+            except Exception as exc:
+                # Typically a model file that MediaPipe could not download.
+                recorder.record_error(f"pose/inference_complexity_{complexity}", exc)
+                continue
+            detected = bool(result.pose_world_landmarks)
+
+            # Without a person in the frame (the default synthetic image) only the detector runs, so
+            # pass --image with a real photo for representative landmark timings.
+            def infer() -> None:
+                pose_result, _, _ = posture_tools._run_pose_tiers(image)
+                if pose_result.pose_world_landmarks:
+                    posture_tools.posture_metrics(
+                        posture_tools._landmark_array(pose_result.pose_world_landmarks.landmark)
+                    )
+
+            recorder.measure(
+                f"pose/inference_complexity_{complexity}", infer, repeat=repeat, landmarks_detected=detected
+            )
+            if detected:
+                recorder.measure(
+                    f"pose/extract_landmarks_and_angles_complexity_{complexity}",
+                    lambda: posture_tools.extract_landmarks_and_angles(image_bytes),
+                    repeat=repeat,
+                )
+    finally:
+        posture_tools.POSE_TIERS = original_tiers
+
+
+def run_angles(recorder: Recorder, options: argparse.Namespace) -> None:
+    from agents.deviation_rules import classify_deviations, rule_based_analysis
+    from analysis_history import pack_landmarks, pack_metrics, unpack_landmarks, unpack_metrics
+    from tools import posture_tools
+
+    rng = np.random.default_rng(11)
+    count = posture_tools.NUM_POSE_LANDMARKS
+    points = np.column_stack([rng.normal(0, 0.3, (count, 3)), rng.uniform(0.5, 1.0, count)]).astype(np.float32)
+    angles, joint_angles, detected_view = posture_tools.posture_metrics(points)
+    landmarks_2d = posture_tools.landmarks_payload(points, include_z=False)
+    landmarks_3d = posture_tools.landmarks_payload(points, include_z=True)
+    metrics_blob = pack_metrics(angles, joint_angles)
+    landmarks_blob = pack_landmarks(landmarks_2d, landmarks_3d)
+    repeat = recorder.repeat * 10
+
+    recorder.measure("angles/posture_metrics", lambda: posture_tools.posture_metrics(points), repeat=repeat)
+    recorder.measure(
+        "angles/landmarks_payload_2d_and_3d",
+        lambda: (
+            posture_tools.landmarks_payload(points, include_z=False),
+            posture_tools.landmarks_payload(points, include_z=True),
+        ),
+        repeat=repeat,
+    )
+    recorder.measure("angles/classify_deviations", lambda: classify_deviations(angles, "en"), repeat=repeat)
+    recorder.measure(
+        "angles/rule_based_analysis", lambda: rule_based_analysis(angles, detected_view, "en"), repeat=repeat
+    )
+    recorder.measure("angles/pack_metrics", lambda: pack_metrics(angles, joint_angles), repeat=repeat)
+    recorder.measure("angles/unpack_metrics", lambda: unpack_metrics(metrics_blob), repeat=repeat)
+    recorder.measure("angles/pack_landmarks", lambda: pack_landmarks(landmarks_2d, landmarks_3d), repeat=repeat)
+    recorder.measure("angles/unpack_landmarks", lambda: unpack_landmarks(landmarks_blob), repeat=repeat)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import gc
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+BACKEND_DIR = ROOT_DIR / "app" / "backend"
+for path in (ROOT_DIR, BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+
+def percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    position = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[position]
+
+
+# Collects timings for one run. Each case is warmed up first, then timed `repeat` times with the garbage
+# collector paused so a collection in the middle of a sample does not show up as noise.
+class Recorder:
+    def __init__(self, repeat: int, warmup: int, quick: bool = False) -> None:
+        self.repeat = repeat
+        self.warmup = warmup
+        self.quick = quick
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def measure(
+        self, name: str, fn: Callable[[], object], repeat: int | None = None, **extra: Any
+    ) -> dict[str, Any] | None:
+        repeat = max(1, repeat or self.repeat)
+        try:
+            for _ in range(self.warmup):
+                fn()
+            samples: list[float] = []
+            gc_was_enabled = gc.isenabled()
+            gc.disable()
+            try:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    fn()
+                    samples.append((time.perf_counter() - started) * 1000.0)
+            finally:
+                if gc_was_enabled:
+                    gc.enable()
+        except Exception as exc:
+            self.record_error(name, exc, **extra)
+            return None
+
+        stats = {
+            "n": repeat,
+            "mean_ms": round(statistics.fmean(samples), 4),
+            "p50_ms": round(statistics.median(samples), 4),
+            "p95_ms": round(percentile(samples, 0.95), 4),
+            "min_ms": round(min(samples), 4),
+            "max_ms": round(max(samples), 4),
+            **extra,
+        }
+        self.results[name] = stats
+        print(f"  {name:<58} p50 {stats['p50_ms']:>10.3f} ms   p95 {stats['p95_ms']:>10.3f} ms", file=sys.stderr)
+        return stats
+
+    def record_error(self, name: str, exc: Exception, **extra: Any) -> None:
+        self.results[name] = {"error": f"{type(exc).__name__}: {exc}", **extra}
+        print(f"  {name:<58} error: {exc}", file=sys.stderr)
+
+
+def _git_revision() -> str | None:
+    try:
+        completed = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return completed.stdout.strip() or None
+
+
+def run_metadata(suites: list[str], recorder: Recorder) -> dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "suites": suites,
+        "repeat": recorder.repeat,
+        "warmup": recorder.warmup,
+        "quick": recorder.quick,
+    }
+
+
+# Compares the p50 of every case present in both runs. A case counts as a regression when it got slower
+# by more than `threshold` (a fraction) and by more than `min_delta_ms`, which keeps sub-millisecond
+# jitter on tiny cases from failing a comparison.
+def compare_results(
+    baseline: dict[str, Any], current: dict[str, Any], threshold: float, min_delta_ms: float = 0.05
+) -> dict[str, Any]:
+    rows: list[dict[str, Any]] = []
+    for name, stats in current.get("results", {}).items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "p50_ms" not in before or "p50_ms" not in stats:
+            continue
+        delta_ms = stats["p50_ms"] - before["p50_ms"]
+        ratio = stats["p50_ms"] / before["p50_ms"] if before["p50_ms"] > 0 else float("inf")
+        if ratio > 1 + threshold and delta_ms > min_delta_ms:
+            verdict = "regression"
+        elif ratio < 1 - threshold and -delta_ms > min_delta_ms:
+            verdict = "improvement"
+        else:
+            verdict = "unchanged"
+        rows.append(
+            {
+                "name": name,
+                "baseline_p50_ms": before["p50_ms"],
+                "current_p50_ms": stats["p50_ms"],
+                "change_pct": round((ratio - 1) * 100, 1),
+                "verdict": verdict,
+            }
+        )
+    return {
+        "threshold": threshold,
+        "baseline_revision": baseline.get("meta", {}).get("git_revision"),
+        "cases": rows,
+        "regressions": [row["name"] for row in rows if row["verdict"] == "regression"],
+    }
+
+
+def print_comparison(comparison: dict[str, Any]) -> None:
+    print(
+        f"\nComparison against {comparison['baseline_revision'] or 'baseline'} "
+        f"(threshold {comparison['threshold'] * 100:.0f}%):",
+        file=sys.stderr,
+    )
+    for row in comparison["cases"]:
+        print(
+            f"  {row['name']:<58} {row['baseline_p50_ms']:>10.3f} -> {row['current_p50_ms']:>10.3f} ms "
+            f"{row['change_pct']:>+7.1f}%  {row['verdict']}",
+            file=sys.stderr,
+        )
+
+
+def load_results(path: str | Path) -> dict[str, Any]:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Callable
+
+SUITES = ("decode", "pose", "angles", "api", "agents")
+DEFAULT_ROWS = (1_000, 10_000, 100_000)
+
+
+def _csv(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _rows(value: str) -> list[int]:
+    return [int(item.replace("_", "")) for item in _csv(value)]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.run",
+        description="Offline benchmarks for the posture pipeline, the agents and the API hot paths.",
+    )
+    parser.add_argument("--suite", type=_csv, default=list(SUITES), help=f"Comma separated: {','.join(SUITES)}.")
+    parser.add_argument(
+        "--rows", type=_rows, default=list(DEFAULT_ROWS), help="Student counts the API suite grows the database to."
+    )
+    parser.add_argument("--repeat", type=int, default=20, help="Timed samples per case.")
+    parser.add_argument("--warmup", type=int, default=2, help="Untimed runs before each case.")
+    parser.add_argument(
+        "--quick", action="store_true", help="Fewer samples, fewer resolutions and model complexities, 1k and 10k rows."
+    )
+    parser.add_argument("--image", help="Photo with a person in it, for representative pose and pipeline timings.")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated model round trip.")
+    parser.add_argument(
+        "--scrape-latency-ms", type=float, default=0.0, help="Simulated web scrape for EXERCISE_SOURCE=web."
+    )
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    parser.add_argument("--compare", help="Results JSON from an earlier run to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Slowdown fraction that counts as a regression.")
+    return parser
+
+
+# The API suite imports main, which creates its tables and migrations at import time, so the environment
+# has to point at a throwaway database before any backend module is loaded.
+def configure_environment(database_dir: str) -> None:
+    os.environ["DATABASE_URL"] = f"sqlite:///{Path(database_dir) / 'benchmark.db'}"
+    os.environ["POSE_POOL_WARM"] = "0"
+    os.environ.setdefault("ANALYSIS_CACHE_BACKEND", "memory")
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    unknown = sorted(set(options.suite) - set(SUITES))
+    if unknown:
+        print(f"Unknown suite(s): {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    if options.quick:
+        options.repeat = min(options.repeat, 5)
+        options.warmup = min(options.warmup, 1)
+        options.rows = [rows for rows in options.rows if rows <= 10_000] or options.rows[:1]
+
+    with tempfile.TemporaryDirectory(prefix="pilates-bench-") as database_dir:
+        configure_environment(database_dir)
+
+        from benchmarks.bench_agents import run_agents
+        from benchmarks.bench_api import run_api
+        from benchmarks.bench_vision import run_angles, run_decode, run_pose
+        from benchmarks.harness import Recorder, compare_results, load_results, print_comparison, run_metadata
+
+        runners: dict[str, Callable[[Recorder, argparse.Namespace], None]] = {
+            "decode": run_decode,
+            "pose": run_pose,
+            "angles": run_angles,
+            "api": run_api,
+            "agents": run_agents,
+        }
+        recorder = Recorder(options.repeat, options.warmup, options.quick)
+        for suite in SUITES:
+            if suite in options.suite:
+                print(f"[{suite}]", file=sys.stderr)
+                runners[suite](recorder, options)
+
+    report: dict[str, Any] = {"meta": run_metadata(options.suite, recorder), "results": recorder.results}
+    exit_code = 0
+    if options.compare:
+        comparison = compare_results(load_results(options.compare), report, options.threshold)
+        print_comparison(comparison)
+        report["comparison"] = comparison
+        if comparison["regressions"]:
+            print(f"\n{len(comparison['regressions'])} regression(s) above the threshold.", file=sys.stderr)
+            exit_code = 1
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if options.output:
+        Path(options.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
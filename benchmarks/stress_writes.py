@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.harness import percentile
+
+STRESS_SLOT_START = datetime(2050, 1, 3, 7)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.stress_writes",
+        description="Concurrent analysis saves and bookings against a throwaway SQLite database, with readers.",
+    )
+    parser.add_argument("--writers", type=int, default=8, help="Threads saving analyses and booking appointments.")
+    parser.add_argument("--readers", type=int, default=4, help="Threads running the GET endpoint queries meanwhile.")
+    parser.add_argument(
+        "--read-interval-ms", type=float, default=20.0, help="Pause between a reader's queries, like real traffic."
+    )
+    parser.add_argument("--writes", type=int, default=200, help="Writes per writer thread.")
+    parser.add_argument("--students", type=int, default=2000, help="Students seeded before the run.")
+    parser.add_argument("--journal-mode", help="Overrides SQLITE_JOURNAL_MODE (WAL, DELETE, ...).")
+    parser.add_argument("--synchronous", help="Overrides SQLITE_SYNCHRONOUS (NORMAL, FULL, ...).")
+    parser.add_argument("--busy-timeout-ms", type=int, help="Overrides SQLITE_BUSY_TIMEOUT_MS.")
+    parser.add_argument("--pool-size", type=int, help="Overrides DB_POOL_SIZE.")
+    parser.add_argument("--output", help="Write the results as JSON to this file.")
+    return parser
+
+
+def _summary(samples: list[float], seconds: float) -> dict[str, Any]:
+    if not samples:
+        return {"n": 0}
+    return {
+        "n": len(samples),
+        "per_second": round(len(samples) / seconds, 1),
+        "p50_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(percentile(samples, 0.95), 3),
+        "max_ms": round(max(samples), 3),
+    }
+
+
+class Tally:
+    def __init__(self) -> None:
+        self.samples: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def run(self, name: str, fn: Callable[[], object]) -> None:
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception as exc:
+            message = f"{name}: {type(exc).__name__}: {str(exc).splitlines()[0][:120]}"
+            with self._lock:
+                self.errors[message] = self.errors.get(message, 0) + 1
+            return
+        elapsed = (time.perf_counter() - started) * 1000.0
+        with self._lock:
+            self.samples.setdefault(name, []).append(elapsed)
+
+
+def run_stress(options: argparse.Namespace) -> dict[str, Any]:
+    from benchmarks.bench_agents import sample_posture_data
+    from benchmarks.bench_api import SCHEDULED_INSTRUCTORS, seed
+
+    import main
+    import models
+    import schemas
+    from calendar_view import build_calendar
+    from database import ReadSessionLocal, SessionLocal, database_stats
+
+    seed(main, 0, options.students)
+    posture_data = sample_posture_data()
+    analysis = {
+        **posture_data,
+        "detected_deviations": ["Forward Head Posture"],
+        "clinical_analysis": "Stress test analysis.",
+        "analysis_source": "rules",
+    }
+    slots = itertools.count()
+    tally = Tally()
+    writers_done = threading.Event()
+
+    def save_analysis(student_id: int) -> None:
+        main.save_latest_analysis_for(student_id, analysis)
+
+    def book_appointment(student_id: int) -> None:
+        slot = next(slots)
+        start_time = STRESS_SLOT_START + timedelta(hours=slot)
+        payload = schemas.AppointmentCreate(
+            student_id=student_id,
+            instructor_id=slot % SCHEDULED_INSTRUCTORS + 1,
+            start_time=start_time,
+            end_time=start_time + timedelta(minutes=50),
+        )
+        db = SessionLocal()
+        try:
+            main.create_appointment(payload, db)
+        finally:
+            db.close()
+
+    def writer(number: int) -> None:
+        for index in range(options.writes):
+            student_id = (number * options.writes + index) % options.students + 1
+            if index % 2:
+                tally.run("book_appointment", lambda: book_appointment(student_id))
+            else:
+                tally.run("save_analysis", lambda: save_analysis(student_id))
+
+    def read_calendar() -> None:
+        db = ReadSessionLocal()
+        try:
+            start = STRESS_SLOT_START
+            build_calendar(db, start, start + timedelta(days=7), None, None)
+        finally:
+            db.close()
+
+    def read_progress(student_id: int) -> None:
+        db = ReadSessionLocal()
+        try:
+            main.get_student_progress(student_id, metrics=None, series_limit=20, db=db)
+            db.query(models.Student).order_by(models.Student.id.desc()).limit(50).all()
+        finally:
+            db.close()
+
+    def reader(number: int) -> None:
+        for index in itertools.count():
+            if writers_done.wait(options.read_interval_ms / 1000.0):
+                return
+            if index % 2:
+                tally.run("read_calendar", read_calendar)
+            else:
+                tally.run("read_progress", lambda: read_progress((number * 7919 + index) % options.students + 1))
+
+    readers = [threading.Thread(target=reader, args=(number,)) for number in range(options.readers)]
+    writers = [threading.Thread(target=writer, args=(number,)) for number in range(options.writers)]
+    started = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    writes_seconds = time.perf_counter() - started
+    writers_done.set()
+    for thread in readers:
+        thread.join()
+
+    write_samples = tally.samples.get("save_analysis", []) + tally.samples.get("book_appointment", [])
+    return {
+        "settings": {
+            **database_stats(),
+            "writers": options.writers,
+            "readers": options.readers,
+            "read_interval_ms": options.read_interval_ms,
+            "writes_per_writer": options.writes,
+        },
+        "seconds": round(writes_seconds, 3),
+        "writes": _summary(write_samples, writes_seconds),
+        "operations": {name: _summary(samples, writes_seconds) for name, samples in sorted(tally.samples.items())},
+        "errors": tally.errors,
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = build_parser().parse_args(argv)
+    overrides = {
+        "SQLITE_JOURNAL_MODE": options.journal_mode,
+        "SQLITE_SYNCHRONOUS": options.synchronous,
+        "SQLITE_BUSY_TIMEOUT_MS": options.busy_timeout_ms,
+        "DB_POOL_SIZE": options.pool_size,
+    }
+    with tempfile.TemporaryDirectory(prefix="pilates-stress-") as database_dir:
+        from benchmarks.run import configure_environment
+
+        configure_environment(database_dir)
+        os.environ.update({name: str(value) for name, value in overrides.items() if value is not None})
+        report = run_stress(options)
+
+    text = json.dumps(report, indent=2, default=str)
+    if options.output:
+        Path(options.output).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    errors = sum(report["errors"].values())
+    print(
+        f"{report['writes'].get('n', 0)} writes in {report['seconds']} s "
+        f"({report['writes'].get('per_second', 0)}/s, p95 {report['writes'].get('p95_ms', '-')} ms), "
+        f"{errors} error(s)",
+        file=sys.stderr,
+    )
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
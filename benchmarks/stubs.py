@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import Any, Iterator
+
+from openai.types.chat import ChatCompletion
+
+STUB_DEVIATIONS = ["Forward Head Posture", "Shoulder Tilt"]
+STUB_ANALYSIS = {
+    "detected_deviations": STUB_DEVIATIONS,
+    "clinical_analysis": "Offline benchmark interpretation. " * 20,
+}
+STUB_PLAN = {
+    "workout_plan": [
+        {
+            "exercise_name": f"Benchmark exercise {index}",
+            "sets": "3",
+            "reps": "10",
+            "clinical_reason": "Offline benchmark prescription.",
+        }
+        for index in range(1, 6)
+    ]
+}
+STUB_SCRAPE = "Pilates exercise reference text used by the offline benchmarks. " * 200
+
+
+def _completion(content: str | None = None, tool_calls: list[dict[str, Any]] | None = None) -> ChatCompletion:
+    return ChatCompletion.model_validate(
+        {
+            "id": "bench",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "benchmark-stub",
+            "choices": [
+                {
+                    "index": 0,
+                    "finish_reason": "tool_calls" if tool_calls else "stop",
+                    "message": {"role": "assistant", "content": content, "tool_calls": tool_calls},
+                }
+            ],
+            "usage": {"prompt_tokens": 1200, "completion_tokens": 300, "total_tokens": 1500},
+        }
+    )
+
+
+# Answers the way the real model does for the two agents: a forced tool choice gets that tool call, any
+# other workout request gets a plan, and requests without tools get a posture analysis.
+def _stub_response(kwargs: dict[str, Any]) -> ChatCompletion:
+    tools = kwargs.get("tools") or []
+    tool_choice = kwargs.get("tool_choice")
+    if isinstance(tool_choice, dict):
+        name = tool_choice["function"]["name"]
+        arguments = {"deviations": STUB_DEVIATIONS} if name == "search_exercise_catalog" else {}
+        return _completion(
+            tool_calls=[
+                {"id": "call_bench", "type": "function", "function": {"name": name, "arguments": json.dumps(arguments)}}
+            ]
+        )
+    if tools or tool_choice == "none":
+        return _completion(json.dumps(STUB_PLAN))
+    return _completion(json.dumps(STUB_ANALYSIS))
+
+
+class StubOpenAI:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs: Any) -> ChatCompletion:
+        self.calls += 1
+        time.sleep(self.latency_s)
+        return _stub_response(kwargs)
+
+
+class StubAsyncOpenAI:
+    def __init__(self, latency_s: float) -> None:
+        self.latency_s = latency_s
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs: Any) -> ChatCompletion:
+        self.calls += 1
+        await asyncio.sleep(self.latency_s)
+        return _stub_response(kwargs)
+
+
+# Swaps the OpenAI clients and the web scraper for local stubs with fixed latency, forces the model
+# interpretation path, and optionally switches the workout agent to the web tool set. Everything is restored on exit.
+@contextmanager
+def offline_agents(
+    llm_latency_s: float, scrape_latency_s: float, exercise_source: str = "catalog"
+) -> Iterator[tuple[StubOpenAI, StubAsyncOpenAI]]:
+    from agents import pipeline, workout_agent
+
+    sync_client = StubOpenAI(llm_latency_s)
+    async_client = StubAsyncOpenAI(llm_latency_s)
+
+    def fetch_stub(urls: Any = None) -> str:
+        time.sleep(scrape_latency_s)
+        return STUB_SCRAPE
+
+    tools = [workout_agent.CATALOG_TOOL] if exercise_source == "catalog" else workout_agent.WEB_TOOLS
+    patches = [
+        (pipeline, "get_openai_client", lambda: sync_client),
+        (pipeline, "get_async_openai_client", lambda: async_client),
+        (pipeline, "ANALYSIS_MODE", "llm"),
+        (workout_agent, "get_openai_client", lambda: sync_client),
+        (workout_agent, "get_async_openai_client", lambda: async_client),
+        (workout_agent, "fetch_pilates_exercises", fetch_stub),
+        (workout_agent, "EXERCISE_SOURCE", exercise_source),
+        (workout_agent, "PLAN_TOOLS", tools),
+        (workout_agent, "FIRST_TOOL_NAME", tools[0]["function"]["name"]),
+    ]
+    saved = [(module, name, getattr(module, name)) for module, name, _ in patches]
+    saved_key = os.environ.get("OPENAI_API_KEY")
+    # The pipeline only takes the model path when a key is configured; the stub never sends it anywhere.
+    os.environ["OPENAI_API_KEY"] = saved_key or "offline-benchmark"
+    for module, name, value in patches:
+        setattr(module, name, value)
+    try:
+        yield sync_client, async_client
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+        if saved_key is None:
+            os.environ.pop("OPENAI_API_KEY", None)
+        else:
+            os.environ["OPENAI_API_KEY"] = saved_key
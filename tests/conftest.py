@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parents[1]
+
+# The backend modules read their settings and open the database at import time, so the environment has to
+# point at a throwaway database before any test imports them.
+_database_dir = tempfile.mkdtemp(prefix="pilates-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_database_dir) / 'tests.db'}"
+os.environ["POSE_POOL_WARM"] = "0"
+os.environ["ANALYSIS_CACHE_BACKEND"] = "memory"
+os.environ["ANALYSIS_MODE"] = "rules"
+os.environ.pop("OPENAI_API_KEY", None)
+
+for path in (ROOT_DIR, ROOT_DIR / "app" / "backend"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
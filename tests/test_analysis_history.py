@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import base64
+
+import numpy as np
+import pytest
+
+import models
+from analysis_history import (
+    build_analysis_record,
+    pack_landmarks,
+    record_analysis,
+    summarize_metric_stats,
+    unpack_landmarks,
+)
+from database import SessionLocal, engine
+from tools.posture_tools import NUM_POSE_LANDMARKS, encode_landmark_arrays, landmarks_payload
+
+
+@pytest.fixture
+def db():
+    models.Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.query(models.StudentMetricStats).delete()
+        session.query(models.PostureAnalysis).delete()
+        session.commit()
+        session.close()
+
+
+def _metric_summary(db, student_id: int, metric: str) -> dict[str, object]:
+    return summarize_metric_stats(db.get(models.StudentMetricStats, (student_id, metric)))
+
+
+def _landmark_arrays() -> tuple[np.ndarray, np.ndarray]:
+    rng = np.random.default_rng(7)
+    points_2d = rng.uniform(0, 1, (NUM_POSE_LANDMARKS, 4)).astype(np.float32)
+    points_3d = rng.uniform(-1, 1, (NUM_POSE_LANDMARKS, 4)).astype(np.float32)
+    points_3d[:, 3] = rng.uniform(0, 1, NUM_POSE_LANDMARKS)
+    return points_2d, points_3d
+
+
+def test_landmark_blob_keeps_full_precision_and_both_visibilities():
+    points_2d, points_3d = _landmark_arrays()
+    blob = base64.b64decode(encode_landmark_arrays(points_2d, points_3d))
+
+    stored = np.frombuffer(blob, dtype=np.float32).reshape(NUM_POSE_LANDMARKS, 7)
+    assert len(blob) == NUM_POSE_LANDMARKS * 7 * 4
+    np.testing.assert_array_equal(stored[:, :3], points_2d[:, [0, 1, 3]])
+    np.testing.assert_array_equal(stored[:, 3:], points_3d)
+
+    landmarks_2d, landmarks_3d = unpack_landmarks(blob)
+    assert landmarks_2d == landmarks_payload(points_2d, include_z=False)
+    assert landmarks_3d == landmarks_payload(points_3d, include_z=True)
+
+
+def test_legacy_landmark_blob_still_unpacks():
+    points_2d, points_3d = _landmark_arrays()
+    legacy = np.hstack([points_2d[:, :2], points_3d]).astype(np.float32).tobytes()
+
+    landmarks_2d, landmarks_3d = unpack_landmarks(legacy)
+
+    assert [point["visibility"] for point in landmarks_2d] == [point["visibility"] for point in landmarks_3d]
+    assert landmarks_3d == landmarks_payload(points_3d, include_z=True)
+
+
+def test_record_prefers_the_packed_landmarks_over_the_rounded_payload():
+    points_2d, points_3d = _landmark_arrays()
+    packed = encode_landmark_arrays(points_2d, points_3d)
+    result = {
+        "angles": {"shoulder_tilt_deg": 1.5},
+        "landmarks_2d": landmarks_payload(points_2d, include_z=False),
+        "landmarks_3d": landmarks_payload(points_3d, include_z=True),
+    }
+
+    assert build_analysis_record(1, result, packed).landmarks_blob == base64.b64decode(packed)
+    # Without the blob, only the 2-decimal payloads are left to store.
+    rounded = pack_landmarks(result["landmarks_2d"], result["landmarks_3d"])
+    assert build_analysis_record(1, result).landmarks_blob == rounded
+
+
+def test_single_analysis_has_no_last_delta(db):
+    record_analysis(db, 1, {"angles": {"shoulder_tilt_deg": 4.0}})
+    db.commit()
+
+    summary = _metric_summary(db, 1, "shoulder_tilt_deg")
+    assert summary["count"] == 1
+    assert (summary["first_value"], summary["last_value"], summary["ema"]) == (4.0, 4.0, 4.0)
+    assert summary["delta_last"] is None
+    assert summary["delta_total"] == 0.0
+
+
+def test_second_analysis_reports_the_change_since_the_first(db):
+    for value in (4.0, 2.5, 1.0):
+        record_analysis(db, 1, {"angles": {"shoulder_tilt_deg": value}})
+        db.commit()
+        if value == 2.5:
+            assert _metric_summary(db, 1, "shoulder_tilt_deg")["delta_last"] == -1.5
+
+    summary = _metric_summary(db, 1, "shoulder_tilt_deg")
+    assert (summary["count"], summary["delta_last"], summary["delta_total"]) == (3, -1.5, -3.0)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import models
+from appointment_index import InstructorSchedule, appointment_index
+from database import SessionLocal
+
+
+def test_incremental_changes_match_a_fresh_load():
+    rng = random.Random(7)
+    base = datetime(2031, 1, 1)
+    rows: dict[int, tuple[int, datetime, datetime]] = {}
+    schedule = InstructorSchedule.from_rows([])
+    for appointment_id in range(1, 300):
+        if rows and rng.random() < 0.3:
+            removed_id = rng.choice(sorted(rows))
+            schedule = schedule.without(removed_id, rows.pop(removed_id)[1])
+        start = base + timedelta(minutes=15 * rng.randrange(2000))
+        rows[appointment_id] = (appointment_id, start, start + timedelta(minutes=15 * rng.randrange(1, 40)))
+        schedule = schedule.with_added([rows[appointment_id]])
+
+        fresh = InstructorSchedule.from_rows(list(rows.values()))
+        assert schedule.starts == fresh.starts
+        assert schedule.max_ends == fresh.max_ends
+        assert sorted(schedule.ids) == sorted(fresh.ids)
+
+    for _ in range(200):
+        start = base + timedelta(minutes=15 * rng.randrange(2000))
+        end = start + timedelta(minutes=15 * rng.randrange(1, 8))
+        assert schedule.busy(start, end) == fresh.busy(start, end)
+        assert (schedule.find_overlap(start, end) is None) == (fresh.find_overlap(start, end) is None)
+
+
+@pytest.fixture(scope="module")
+def seeded():
+    with TestClient(main.app) as test_client:
+        instructor = test_client.post(
+            "/instructors",
+            json={"name": "Instrutor Agenda", "phone": "11977770000", "specialty": "Solo", "email": "agenda@x.com"},
+        ).json()
+        student = test_client.post(
+            "/students",
+            json={
+                "name": "Aluna Agenda",
+                "tax_id_cpf": "901.000.000-01",
+                "date_of_birth": "1991-01-01",
+                "phone": "11966660000",
+            },
+        ).json()
+        yield test_client, instructor["id"], student["id"]
+
+
+def book(client, instructor_id, student_id, start, minutes=50):
+    return client.post(
+        "/appointments",
+        json={
+            "student_id": student_id,
+            "instructor_id": instructor_id,
+            "start_time": start.isoformat(),
+            "end_time": (start + timedelta(minutes=minutes)).isoformat(),
+        },
+    )
+
+
+def test_writes_update_the_cached_schedule_without_reloading(seeded):
+    client, instructor_id, student_id = seeded
+    day = datetime(2032, 5, 3, 8)
+    first = book(client, instructor_id, student_id, day)
+    assert first.status_code == 201
+
+    loads = appointment_index.stats()["loads"]
+    second = book(client, instructor_id, student_id, day + timedelta(hours=2))
+    assert second.status_code == 201
+    assert book(client, instructor_id, student_id, day + timedelta(minutes=30)).status_code == 409
+
+    moved = client.put(
+        f"/appointments/{second.json()['id']}",
+        json={"start_time": (day + timedelta(hours=4)).isoformat(), "end_time": (day + timedelta(hours=5)).isoformat()},
+    )
+    assert moved.status_code == 200
+    assert client.delete(f"/appointments/{first.json()['id']}").status_code == 204
+    assert book(client, instructor_id, student_id, day + timedelta(minutes=30)).status_code == 201
+    assert book(client, instructor_id, student_id, day + timedelta(hours=2)).status_code == 201
+    assert appointment_index.stats()["loads"] == loads
+
+
+def test_writes_from_another_process_are_still_checked(seeded):
+    client, instructor_id, student_id = seeded
+    day = datetime(2032, 6, 7, 8)
+    assert book(client, instructor_id, student_id, day).status_code == 201
+
+    # Committed behind the index's back, the way another worker process would.
+    with SessionLocal() as db:
+        db.add(
+            models.Appointment(
+                student_id=student_id,
+                instructor_id=instructor_id,
+                start_time=day + timedelta(hours=2),
+                end_time=day + timedelta(hours=3),
+            )
+        )
+        db.query(models.Appointment).filter(
+            models.Appointment.instructor_id == instructor_id, models.Appointment.start_time == day
+        ).delete()
+        db.commit()
+
+    assert book(client, instructor_id, student_id, day + timedelta(hours=2, minutes=30)).status_code == 409
+    assert book(client, instructor_id, student_id, day + timedelta(minutes=10)).status_code == 201
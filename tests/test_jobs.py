@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import socket
+from datetime import datetime, timedelta
+
+import pytest
+
+import jobs
+import models
+from database import SessionLocal, engine
+
+
+def _resolving_to(address: str):
+    def getaddrinfo(host, port, *args, **kwargs):
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        return [(family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address, port))]
+
+    return getaddrinfo
+
+
+@pytest.fixture
+def job_table():
+    models.Base.metadata.create_all(bind=engine)
+    yield
+    db = SessionLocal()
+    try:
+        db.query(models.Job).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def _queue() -> jobs.JobQueue:
+    queue = jobs.JobQueue(workers=1, max_attempts=2, retry_backoff=0, lease_seconds=60)
+    queue.register("echo", lambda payload, _: payload)
+    return queue
+
+
+@pytest.mark.parametrize(
+    "callback_url",
+    ["ftp://example.com/hook", "file:///etc/passwd", "http:///no-host", "example.com/hook"],
+)
+def test_callback_url_rejects_other_schemes(callback_url):
+    with pytest.raises(ValueError):
+        jobs.validate_callback_url(callback_url)
+
+
+@pytest.mark.parametrize(
+    "address",
+    ["127.0.0.1", "10.0.0.5", "172.16.1.1", "192.168.0.10", "169.254.169.254", "100.64.0.1", "::1", "fd00::1"],
+)
+def test_callback_url_rejects_non_public_addresses(monkeypatch, address):
+    monkeypatch.setattr(jobs.socket, "getaddrinfo", _resolving_to(address))
+    with pytest.raises(ValueError, match="private, loopback or reserved"):
+        jobs.validate_callback_url("https://hooks.example.com/done")
+
+
+def test_callback_url_accepts_public_hosts(monkeypatch):
+    monkeypatch.setattr(jobs.socket, "getaddrinfo", _resolving_to("93.184.216.34"))
+    assert jobs.validate_callback_url("https://hooks.example.com/done") == "https://hooks.example.com/done"
+    assert jobs.validate_callback_url(None) is None
+
+
+def test_callback_url_allowlist(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_CALLBACK_ALLOWED_HOSTS", frozenset({"callbacks.internal"}))
+    assert jobs.validate_callback_url("http://callbacks.internal:8080/jobs")
+    with pytest.raises(ValueError, match="JOB_CALLBACK_ALLOWED_HOSTS"):
+        jobs.validate_callback_url("https://hooks.example.com/done")
+
+
+def test_submit_refuses_internal_callback(job_table):
+    with pytest.raises(ValueError):
+        _queue().submit("echo", {}, callback_url="http://127.0.0.1:8000/admin")
+
+
+def test_job_is_claimed_by_one_queue_only(job_table):
+    first, second = _queue(), _queue()
+    job_id = first.submit("echo", {"value": 1})["id"]
+
+    db = SessionLocal()
+    try:
+        assert first._claim(db, job_id)
+        assert not second._claim(db, job_id)
+        job = db.get(models.Job, job_id)
+        assert (job.status, job.owner, job.attempts) == ("running", first.owner, 1)
+    finally:
+        db.close()
+
+    second._run(job_id)
+    first._finish(job_id, "succeeded", result={"value": 1})
+    db = SessionLocal()
+    try:
+        job = db.get(models.Job, job_id)
+        assert (job.status, job.owner, job.attempts) == ("succeeded", None, 1)
+    finally:
+        db.close()
+
+
+def test_start_requeues_only_expired_leases(job_table):
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        for job_id, lease_expires_at in (("live", now + timedelta(minutes=5)), ("expired", now - timedelta(seconds=1))):
+            db.add(
+                models.Job(id=job_id, kind="echo", status="running", owner="other", lease_expires_at=lease_expires_at)
+            )
+        db.commit()
+    finally:
+        db.close()
+
+    queue = _queue()
+    queue.workers = 0
+    queue.start()
+
+    db = SessionLocal()
+    try:
+        assert db.get(models.Job, "live").status == "running"
+        assert db.get(models.Job, "expired").status == "queued"
+    finally:
+        db.close()
+    assert queue._pending.get_nowait() == "expired"
+    assert queue._pending.empty()
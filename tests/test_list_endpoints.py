@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        instructor = test_client.post(
+            "/instructors",
+            json={"name": "Instrutora Lista", "phone": "11999990000", "specialty": "Solo", "email": "lista@x.com"},
+        ).json()
+        start = datetime(2031, 3, 3, 7)
+        for index in range(5):
+            student = test_client.post(
+                "/students",
+                json={
+                    "name": f"Aluno Lista {index}",
+                    "tax_id_cpf": f"900.000.000-{index:02d}",
+                    "date_of_birth": "1990-01-01",
+                    "phone": f"1198888000{index}",
+                },
+            ).json()
+            appointment_start = start + timedelta(hours=index)
+            response = test_client.post(
+                "/appointments",
+                json={
+                    "student_id": student["id"],
+                    "instructor_id": instructor["id"],
+                    "start_time": appointment_start.isoformat(),
+                    "end_time": (appointment_start + timedelta(minutes=50)).isoformat(),
+                },
+            )
+            assert response.status_code == 201, response.text
+        yield test_client
+
+
+def test_appointment_projection_returns_only_requested_fields(client):
+    pages, cursor = [], None
+    while True:
+        params = {"fields": "status", "limit": 2, "date": "2031-03-03", **({"cursor": cursor} if cursor else {})}
+        response = client.get("/appointments", params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    items = [item for page in pages for item in page]
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert all(set(item) == {"id", "status"} for item in items)
+    assert len({item["id"] for item in items}) == 5
+
+
+def test_ranked_search_pages_cover_every_match_once(client):
+    everything = client.get("/students", params={"q": "Lista"}).json()
+    assert len(everything) == 5
+
+    pages, cursor = [], None
+    while True:
+        params = {"q": "Lista", "limit": 2, "fields": "name", **({"cursor": cursor} if cursor else {})}
+        response = client.get("/students", params=params)
+        assert response.status_code == 200
+        pages.append([item["id"] for item in response.json()])
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert [student_id for page in pages for student_id in page] == [item["id"] for item in everything]
+
+
+def test_ranked_search_cursor_without_limit_returns_the_rest(client):
+    first_page = client.get("/students", params={"q": "Lista", "limit": 2})
+    rest = client.get("/students", params={"q": "Lista", "cursor": first_page.headers["X-Next-Cursor"]}).json()
+    everything = client.get("/students", params={"q": "Lista"}).json()
+
+    assert [item["id"] for item in first_page.json() + rest] == [item["id"] for item in everything]
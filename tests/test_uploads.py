@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from uploads import MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD_BYTES
+
+REQUEST_LIMIT_DETAIL = (
+    f"Uploaded file exceeds the {(MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES) // (1024 * 1024)} MB limit."
+)
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as test_client:
+        yield test_client
+
+
+def multipart_body(size: int) -> tuple[bytes, dict[str, str]]:
+    boundary = "limit-test"
+    body = (
+        f'--{boundary}\r\nContent-Disposition: form-data; name="student_id"\r\n\r\n1\r\n'
+        f'--{boundary}\r\nContent-Disposition: form-data; name="image"; filename="a.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode() + b"\xff\xd8\xff" + bytes(size) + f"\r\n--{boundary}--\r\n".encode()
+    return body, {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+
+
+def test_declared_oversized_body_is_refused_before_parsing(client):
+    body, headers = multipart_body(MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
+    response = client.post("/analyze", content=body, headers=headers)
+    assert response.status_code == 413
+    # The request limit, not the per-file one read_upload would report after parsing.
+    assert response.json()["detail"] == REQUEST_LIMIT_DETAIL
+
+
+def test_body_without_content_length_is_counted(client):
+    body, headers = multipart_body(MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD_BYTES)
+
+    def chunks():
+        for offset in range(0, len(body), 1024 * 1024):
+            yield body[offset : offset + 1024 * 1024]
+
+    response = client.post("/analyze", content=chunks(), headers=headers)
+    assert response.status_code == 413
+    # The request limit, not the per-file one read_upload would report after parsing.
+    assert response.json()["detail"] == REQUEST_LIMIT_DETAIL
+
+
+@pytest.fixture(scope="module")
+def student_id(client):
+    response = client.post(
+        "/students",
+        json={
+            "name": "Aluna Quadros",
+            "tax_id_cpf": "903.000.000-01",
+            "date_of_birth": "1992-01-01",
+            "phone": "11944440000",
+        },
+    )
+    return response.json()["id"]
+
+
+def post_frames(client, student_id, files):
+    return client.post("/analyze/frames", data={"student_id": student_id}, files=[("files", file) for file in files])
+
+
+def test_frames_use_the_image_limit(client, student_id):
+    frame = ("frame.jpg", b"\xff\xd8\xff" + bytes(MAX_UPLOAD_BYTES), "image/jpeg")
+    response = post_frames(client, student_id, [frame])
+    assert response.status_code == 413
+    assert response.json()["detail"] == f"Uploaded file exceeds the {MAX_UPLOAD_BYTES // (1024 * 1024)} MB limit."
+
+
+def test_video_is_only_accepted_on_its_own(client, student_id):
+    video = ("clip.avi", b"RIFF\x00\x00\x00\x00AVI " + bytes(64), "video/avi")
+    frame = ("frame.jpg", b"\xff\xd8\xff" + bytes(64), "image/jpeg")
+    response = post_frames(client, student_id, [frame, video])
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Upload either a single video or a set of images."
+
+
+def test_empty_frame_is_reported_as_a_frame(client, student_id):
+    response = post_frames(client, student_id, [("frame.jpg", b"", "image/jpeg")])
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Uploaded frame or video is empty."
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+from agents import workout_agent
+
+
+def _exercise(name: str) -> dict[str, str]:
+    return {"exercise_name": name, "sets": "3", "reps": "10", "clinical_reason": "Test."}
+
+
+class _FakeCompletions:
+    def __init__(self, streamed: str, retried: str) -> None:
+        self.streamed = streamed
+        self.retried = retried
+
+    async def create(self, **kwargs):
+        if kwargs.get("stream"):
+            return self._stream()
+        message = SimpleNamespace(content=self.retried, tool_calls=None)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    async def _stream(self):
+        for start in range(0, len(self.streamed), 7):
+            delta = SimpleNamespace(content=self.streamed[start : start + 7])
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+
+
+def _collect(monkeypatch, streamed: str, retried: str = "") -> list[dict]:
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(streamed, retried)))
+    monkeypatch.setattr(workout_agent, "get_async_openai_client", lambda: client)
+
+    async def run() -> list[dict]:
+        profile = {"name": "Ana", "latest_detected_deviations": ["Forward Head Posture"], "medical_notes": ""}
+        return [event async for event in workout_agent.stream_workout_plan(profile, "Forward head posture.")]
+
+    return asyncio.run(run())
+
+
+def test_stream_resets_exercises_from_an_invalid_streamed_plan(monkeypatch):
+    partial = [_exercise("Swan Dive"), _exercise("Chest Lift")]
+    # The stream delivers two exercises and then breaks off, so the plan comes from the retry.
+    streamed = json.dumps({"workout_plan": partial})[:-2]
+    retried = json.dumps({"workout_plan": [_exercise(f"Retry exercise {index}") for index in range(5)]})
+
+    events = _collect(monkeypatch, streamed, retried)
+    names = [event["event"] for event in events]
+    reset = names.index("reset")
+    exercises_after = [event["data"] for event in events[reset + 1 :] if event["event"] == "exercise"]
+
+    assert names.count("exercise") == len(partial) + 5
+    assert [exercise["index"] for exercise in exercises_after] == list(range(5))
+    assert [exercise["exercise_name"] for exercise in exercises_after] == [
+        exercise["exercise_name"] for exercise in events[-1]["data"]["workout_plan"]
+    ]
+
+
+def test_stream_without_retry_sends_each_exercise_once(monkeypatch):
+    plan = [_exercise(f"Exercise {index}") for index in range(5)]
+
+    events = _collect(monkeypatch, json.dumps({"workout_plan": plan}))
+    exercises = [event["data"] for event in events if event["event"] == "exercise"]
+
+    assert "reset" not in [event["event"] for event in events]
+    assert [exercise["index"] for exercise in exercises] == list(range(5))
+    assert events[-1]["event"] == "done"
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable
+
+CATALOG_PATH = Path(
+    os.getenv("EXERCISE_CATALOG_PATH", str(Path(__file__).resolve().parent / "data" / "pilates_exercises.json"))
+)
+
+DEVIATION_TAGS = (
+    "head_protraction",
+    "head_tilt",
+    "shoulder_tilt",
+    "shoulder_rotation",
+    "pelvic_tilt",
+    "pelvic_rotation",
+    "trunk_inclination",
+)
+
+# Keywords are matched against accent-stripped, lower-cased text (deviation labels from the LLM in
+# pt or en, or metric keys such as "shoulder_tilt_deg").
+DEVIATION_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "head_protraction": (
+        "head_protraction", "forward head", "head protraction", "protracao", "anteriorizacao da cabeca",
+        "cabeca anteriorizada", "cabeca projetada", "ear_mid_z",
+    ),
+    "head_tilt": ("head_tilt", "head tilt", "lateral cervical", "inclinacao da cabeca", "inclinacao lateral da cabeca"),
+    "shoulder_tilt": (
+        "shoulder_tilt", "shoulder tilt", "shoulder elevation", "elevated shoulder", "inclinacao dos ombros",
+        "inclinacao do ombro", "elevacao do ombro", "ombro elevado", "desnivel dos ombros",
+    ),
+    "shoulder_rotation": (
+        "shoulder_rotation", "shoulder rotation", "torso rotation", "rotacao dos ombros", "rotacao de ombro",
+        "rotacao do ombro", "rotacao do tronco", "rounded shoulder", "ombros arredondados",
+    ),
+    "pelvic_tilt": (
+        "pelvic_tilt", "pelvic tilt", "pelvic obliquity", "hip hike", "inclinacao pelvica",
+        "obliquidade pelvica", "desnivel pelvico",
+    ),
+    "pelvic_rotation": ("pelvic_rotation", "pelvic rotation", "rotacao pelvica", "rotacao da pelve", "rotacao do quadril"),
+    "trunk_inclination": (
+        "trunk_inclination", "trunk inclination", "trunk lean", "inclinacao de tronco", "inclinacao do tronco",
+        "kyphosis", "cifose", "lordosis", "lordose", "shoulder_mid_z",
+    ),
+}
+
+CONTRAINDICATION_KEYWORDS: dict[str, tuple[str, ...]] = {
+    "osteoporosis": ("osteoporosis", "osteoporose", "osteopenia"),
+    "disc_herniation": ("herniat", "hernia", "protrusao discal"),
+    "neck_injury": ("neck injury", "neck pain", "cervicalgia", "lesao cervical", "dor no pescoco", "whiplash"),
+    "shoulder_injury": ("shoulder injury", "rotator cuff", "manguito", "bursite", "lesao no ombro", "dor no ombro"),
+    "low_back_pain": ("low back pain", "lombalgia", "dor lombar", "spondylolisthesis", "espondilolistese"),
+    "knee_injury": (
+        "knee injury", "knee pain", "menisco", "meniscus", "lesao no joelho", "dor no joelho", "ligamento cruzado",
+        "cruciate",
+    ),
+    "hip_replacement": ("hip replacement", "protese de quadril", "artroplastia de quadril"),
+    "wrist_injury": ("wrist", "punho", "carpal tunnel", "tunel do carpo"),
+    "pregnancy": ("pregnan", "gestante", "gravida", "gestacao"),
+}
+
+
+def normalize_text(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).lower()
+
+
+def deviation_tags(deviations: Iterable[str]) -> list[str]:
+    tags: list[str] = []
+    for deviation in deviations:
+        text = normalize_text(str(deviation))
+        for tag, keywords in DEVIATION_KEYWORDS.items():
+            if tag not in tags and any(keyword in text for keyword in keywords):
+                tags.append(tag)
+    return tags
+
+
+def contraindication_tags(medical_notes: str) -> set[str]:
+    text = normalize_text(medical_notes)
+    return {tag for tag, keywords in CONTRAINDICATION_KEYWORDS.items() if any(keyword in text for keyword in keywords)}
+
+
+@dataclass(frozen=True)
+class Exercise:
+    name: str
+    name_pt: str
+    level: str
+    target_regions: tuple[str, ...]
+    deviations: tuple[str, ...]
+    contraindications: tuple[str, ...]
+    summary: str
+    source_excerpt: str = ""
+
+
+@dataclass(frozen=True)
+class ExerciseCatalog:
+    version: int
+    built_at: str
+    sources: tuple[str, ...]
+    exercises: tuple[Exercise, ...]
+    by_deviation: dict[str, tuple[int, ...]]
+
+    def query(self, deviations: Iterable[str], medical_notes: str = "", limit: int = 12) -> list[Exercise]:
+        tags = deviation_tags(deviations) or ["general"]
+        excluded = contraindication_tags(medical_notes)
+
+        scores: dict[int, int] = {}
+        for tag in tags:
+            for position in self.by_deviation.get(tag, ()):
+                scores[position] = scores.get(position, 0) + 1
+
+        ranked = sorted(scores, key=lambda position: (-scores[position], position))
+        selected: list[Exercise] = []
+        for position in ranked:
+            exercise = self.exercises[position]
+            if excluded.intersection(exercise.contraindications):
+                continue
+            selected.append(exercise)
+            if len(selected) == limit:
+                break
+        return selected
+
+
+def _exercise_from_dict(item: dict[str, object]) -> Exercise:
+    name = str(item.get("name", "")).strip()
+    if not name:
+        raise ValueError("Every catalog exercise needs a name.")
+    deviations = tuple(str(tag) for tag in item.get("deviations", []))
+    unknown = set(deviations) - set(DEVIATION_TAGS) - {"general"}
+    if unknown:
+        raise ValueError(f"Exercise '{name}' uses unknown deviation tags: {', '.join(sorted(unknown))}")
+    return Exercise(
+        name=name,
+        name_pt=str(item.get("name_pt", "")).strip() or name,
+        level=str(item.get("level", "beginner")),
+        target_regions=tuple(str(region) for region in item.get("target_regions", [])),
+        deviations=deviations,
+        contraindications=tuple(str(tag) for tag in item.get("contraindications", [])),
+        summary=str(item.get("summary", "")).strip(),
+        source_excerpt=str(item.get("source_excerpt", "")).strip(),
+    )
+
+
+def build_catalog(raw: dict[str, object]) -> ExerciseCatalog:
+    exercises = tuple(_exercise_from_dict(item) for item in raw.get("exercises", []))
+    index: dict[str, list[int]] = {}
+    for position, exercise in enumerate(exercises):
+        for tag in exercise.deviations:
+            index.setdefault(tag, []).append(position)
+    return ExerciseCatalog(
+        version=int(raw.get("version", 1)),
+        built_at=str(raw.get("built_at", "")),
+        sources=tuple(str(url) for url in raw.get("sources", [])),
+        exercises=exercises,
+        by_deviation={tag: tuple(positions) for tag, positions in index.items()},
+    )
+
+
+_catalog: ExerciseCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> ExerciseCatalog:
+    global _catalog
+    if _catalog is None:
+        with _catalog_lock:
+            if _catalog is None:
+                if not CATALOG_PATH.exists():
+                    raise RuntimeError(f"Missing exercise catalog at {CATALOG_PATH}")
+                _catalog = build_catalog(json.loads(CATALOG_PATH.read_text(encoding="utf-8")))
+    return _catalog
+
+
+def format_exercises(exercises: Iterable[Exercise]) -> str:
+    lines = []
+    for exercise in exercises:
+        avoid = ", ".join(exercise.contraindications) or "none listed"
+        lines.append(
+            f"- {exercise.name} ({exercise.name_pt}) | level: {exercise.level} | "
+            f"targets: {', '.join(exercise.target_regions)} | addresses: {', '.join(exercise.deviations)} | "
+            f"avoid with: {avoid} | {exercise.summary}"
+        )
+    return "\n".join(lines)
+
+
+def search_exercise_catalog(deviations: Iterable[str] | None = None, medical_notes: str = "", limit: int = 12) -> str:
+    catalog = get_catalog()
+    exercises = catalog.query(deviations or [], medical_notes=medical_notes, limit=limit)
+    if not exercises:
+        return "No catalog exercises match these deviations."
+    return f"Exercise catalog v{catalog.version}:\n{format_exercises(exercises)}"
+
+
+def _source_excerpts(urls: Iterable[str]) -> dict[str, list[str]]:
+    from tools.web_tools import _fetch_url_text
+
+    lines_by_url: dict[str, list[str]] = {}
+    for url in urls:
+        lines_by_url[url] = _fetch_url_text(url, max_age=0).splitlines()
+    return lines_by_url
+
+
+def refresh_catalog(seed_path: Path, output_path: Path, fetch_sources: bool = True) -> ExerciseCatalog:
+    raw = json.loads(seed_path.read_text(encoding="utf-8"))
+    build_catalog(raw)
+
+    sources = [str(url) for url in raw.get("sources", [])]
+    if fetch_sources and sources:
+        lines_by_url = _source_excerpts(sources)
+        for item in raw.get("exercises", []):
+            names = [normalize_text(item.get("name", "")), normalize_text(item.get("name_pt", ""))]
+            for lines in lines_by_url.values():
+                match = next(
+                    (line for line in lines if any(name and name in normalize_text(line) for name in names)),
+                    None,
+                )
+                if match:
+                    item["source_excerpt"] = match.strip()[:240]
+                    break
+
+    raw["version"] = int(raw.get("version", 0)) + 1
+    raw["built_at"] = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    catalog = build_catalog(raw)
+    output_path.write_text(json.dumps(raw, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return catalog
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Manage the local Pilates exercise catalog.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    refresh = subcommands.add_parser("refresh", help="Rebuild the catalog and bump its version.")
+    refresh.add_argument("--seed", type=Path, default=CATALOG_PATH, help="Catalog JSON to rebuild from.")
+    refresh.add_argument("--output", type=Path, default=CATALOG_PATH, help="Where to write the rebuilt catalog.")
+    refresh.add_argument("--offline", action="store_true", help="Skip fetching source excerpts from the web.")
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        catalog = refresh_catalog(args.seed, args.output, fetch_sources=not args.offline)
+        print(f"Wrote catalog v{catalog.version} with {len(catalog.exercises)} exercises to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import os
+import tempfile
+import threading
+from collections import Counter
+from typing import Iterator
+
+import cv2
+import mediapipe as mp
+import numpy as np
+
+from tools.posture_tools import (
+    KEY_VISIBILITY_INDICES,
+    POSE_MAX_IMAGE_SIZE,
+    POSE_MODEL_COMPLEXITY,
+    POSE_POOL_TIMEOUT,
+    PosePoolSaturatedError,
+    _decode_image,
+    _landmark_array,
+    _resize_to_max,
+    _round2,
+    encode_landmark_arrays,
+    landmarks_payload,
+    posture_metrics,
+)
+
+SEQUENCE_MAX_FRAMES = max(1, int(os.getenv("SEQUENCE_MAX_FRAMES", "90")))
+SEQUENCE_MAX_READ_FRAMES = max(1, int(os.getenv("SEQUENCE_MAX_READ_FRAMES", "1800")))
+SEQUENCE_MAX_STRIDE = max(1, int(os.getenv("SEQUENCE_MAX_STRIDE", "8")))
+# Mean per-frame movement of the key landmarks, in normalised image units, below which the subject is
+# treated as holding still and frames start being skipped.
+SEQUENCE_STILL_MOTION = float(os.getenv("SEQUENCE_STILL_MOTION", "0.004"))
+SEQUENCE_MAX_CONCURRENT = max(1, int(os.getenv("SEQUENCE_MAX_CONCURRENT", "2")))
+SEQUENCE_RESULT_KEYS = ("angle_stats", "view_frames", "frames")
+
+# Container signatures accepted for clips; OpenCV reads them through its FFmpeg backend.
+VIDEO_SIGNATURES = (
+    (4, b"ftyp", "mp4"),
+    (0, b"\x1a\x45\xdf\xa3", "webm"),
+)
+
+_KEY_POINTS = np.array(KEY_VISIBILITY_INDICES)
+_sequence_slots = threading.BoundedSemaphore(SEQUENCE_MAX_CONCURRENT)
+
+
+def sequence_settings_signature() -> str:
+    return (
+        f"tracking:{POSE_MODEL_COMPLEXITY}:{POSE_MAX_IMAGE_SIZE}|frames={SEQUENCE_MAX_FRAMES}:{SEQUENCE_MAX_READ_FRAMES}"
+        f"|stride={SEQUENCE_MAX_STRIDE}|still={SEQUENCE_STILL_MOTION}"
+    )
+
+
+def sniff_video_type(header: bytes) -> str | None:
+    for offset, signature, video_type in VIDEO_SIGNATURES:
+        if header[offset : offset + len(signature)] == signature:
+            return video_type
+    if header[:4] == b"RIFF" and header[8:12] == b"AVI ":
+        return "avi"
+    return None
+
+
+# Tracking graphs keep state between frames, so each sequence gets its own instead of borrowing from the
+# still-image pool.
+def _create_tracking_pose(model_complexity: int) -> mp.solutions.pose.Pose:
+    return mp.solutions.pose.Pose(
+        static_image_mode=False,
+        model_complexity=model_complexity,
+        smooth_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+
+
+# A source hands out frames one at a time; skipped frames are never decoded into pixels.
+class VideoFrames:
+    def __init__(self, video_bytes: bytes) -> None:
+        handle = tempfile.NamedTemporaryFile(suffix=".video", delete=False)
+        with handle:
+            handle.write(video_bytes)
+        self.path = handle.name
+        self.capture = cv2.VideoCapture(self.path)
+        if not self.capture.isOpened():
+            self.close()
+            raise ValueError("Could not open the uploaded video.")
+        fps = self.capture.get(cv2.CAP_PROP_FPS)
+        self.fps = fps if fps and fps > 0 else None
+
+    def skip(self) -> bool:
+        return self.capture.grab()
+
+    def read(self) -> np.ndarray | None:
+        ok, frame = self.capture.read()
+        return frame if ok else None
+
+    def timestamp_ms(self, index: int) -> float | None:
+        return round(index * 1000.0 / self.fps, 1) if self.fps else None
+
+    def close(self) -> None:
+        if getattr(self, "capture", None) is not None:
+            self.capture.release()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class ImageFrames:
+    def __init__(self, images: list[bytes]) -> None:
+        self.images = images
+        self.position = 0
+
+    def skip(self) -> bool:
+        if self.position >= len(self.images):
+            return False
+        self.position += 1
+        return True
+
+    def read(self) -> np.ndarray | None:
+        if self.position >= len(self.images):
+            return None
+        image_bytes = self.images[self.position]
+        self.position += 1
+        return _decode_image(image_bytes, POSE_MAX_IMAGE_SIZE)
+
+    def timestamp_ms(self, index: int) -> float | None:
+        return None
+
+    def close(self) -> None:
+        self.images = []
+
+
+def open_frame_source(uploads: list[bytes]) -> VideoFrames | ImageFrames:
+    if len(uploads) == 1 and sniff_video_type(uploads[0][:12]):
+        return VideoFrames(uploads[0])
+    return ImageFrames(uploads)
+
+
+def _frame_event(
+    index: int, timestamp_ms: float | None, result: object
+) -> tuple[dict[str, object], np.ndarray | None]:
+    event: dict[str, object] = {"type": "frame", "index": index, "timestamp_ms": timestamp_ms}
+    if not result.pose_landmarks or not result.pose_world_landmarks:
+        event["status"] = "lost"
+        return event, None
+    points_2d = _landmark_array(result.pose_landmarks.landmark)
+    points_3d = _landmark_array(result.pose_world_landmarks.landmark)
+    angles, joint_angles, detected_view = posture_metrics(points_3d)
+    event.update(
+        status="tracked",
+        detected_view=detected_view,
+        key_visibility=_round2(points_2d[_KEY_POINTS, 3].min()),
+        angles=angles,
+        joint_angles=joint_angles,
+    )
+    return event, np.stack([points_2d, points_3d])
+
+
+def _metric_stats(values: list[float]) -> dict[str, float]:
+    array = np.array(values, dtype=np.float64)
+    return {
+        "median": _round2(np.median(array)),
+        "mean": _round2(array.mean()),
+        "variance": _round2(array.var()),
+        "min": _round2(array.min()),
+        "max": _round2(array.max()),
+        "frames": len(values),
+    }
+
+
+# Collapses the tracked frames into the same shape as a still-image posture result. Only frames in the
+# majority view are used, and every metric is the per-frame median, so a single bad frame cannot move it.
+def aggregate_frames(tracked: list[tuple[dict[str, object], np.ndarray]]) -> dict[str, object]:
+    if not tracked:
+        raise ValueError("No human posture landmarks were detected in any frame.")
+
+    view_counts = Counter(event["detected_view"] for event, _ in tracked)
+    detected_view = view_counts.most_common(1)[0][0]
+    in_view = [(event, points) for event, points in tracked if event["detected_view"] == detected_view]
+
+    angle_values: dict[str, list[float]] = {}
+    joint_values: dict[str, list[float]] = {}
+    for event, _ in in_view:
+        for key, value in event["angles"].items():
+            angle_values.setdefault(key, []).append(value)
+        for key, value in event["joint_angles"].items():
+            joint_values.setdefault(key, []).append(value)
+    angle_stats = {key: _metric_stats(values) for key, values in angle_values.items()}
+    joint_stats = {key: _metric_stats(values) for key, values in joint_values.items()}
+
+    median_points = np.median(np.stack([points for _, points in in_view]), axis=0)
+    return {
+        "angles": {key: stats["median"] for key, stats in angle_stats.items()},
+        "joint_angles": {key: stats["median"] for key, stats in joint_stats.items()},
+        "angle_stats": {**angle_stats, **joint_stats},
+        "detected_view": detected_view,
+        "view_frames": dict(view_counts),
+        "landmarks_2d": landmarks_payload(median_points[0], include_z=False),
+        "landmarks_3d": landmarks_payload(median_points[1], include_z=True),
+        "landmarks_blob": encode_landmark_arrays(median_points[0], median_points[1]),
+        "pose_tier": {
+            "name": "tracking",
+            "model_complexity": POSE_MODEL_COMPLEXITY,
+            "max_size": POSE_MAX_IMAGE_SIZE,
+            "escalated": False,
+            "min_key_visibility": min(event["key_visibility"] for event, _ in in_view),
+        },
+    }
+
+
+# Runs Pose in tracking mode over a frame source and yields one event per analysed frame, then a final
+# "aggregate" event whose posture data feeds the usual interpretation stage. While the subject holds
+# still the stride doubles up to SEQUENCE_MAX_STRIDE; movement or a lost track drops it back to 1.
+def analyze_pose_sequence(source: VideoFrames | ImageFrames) -> Iterator[dict[str, object]]:
+    if not _sequence_slots.acquire(timeout=POSE_POOL_TIMEOUT):
+        raise PosePoolSaturatedError("Timed out waiting for a free sequence analysis worker.")
+    pose = None
+    try:
+        pose = _create_tracking_pose(POSE_MODEL_COMPLEXITY)
+        analyzed = 0
+        tracked: list[tuple[dict[str, object], np.ndarray]] = []
+        previous_xy: np.ndarray | None = None
+        stride = 1
+        index = 0
+        skipped = 0
+        while analyzed < SEQUENCE_MAX_FRAMES and index < SEQUENCE_MAX_READ_FRAMES:
+            frame = source.read()
+            if frame is None:
+                break
+            rgb = cv2.cvtColor(_resize_to_max(frame, POSE_MAX_IMAGE_SIZE), cv2.COLOR_BGR2RGB)
+            event, points = _frame_event(index, source.timestamp_ms(index), pose.process(rgb))
+            event["stride"] = stride
+            analyzed += 1
+
+            if points is None:
+                stride, previous_xy = 1, None
+            else:
+                tracked.append((event, points))
+                key_xy = points[0, _KEY_POINTS, :2]
+                if previous_xy is not None:
+                    motion = float(np.abs(key_xy - previous_xy).mean()) / stride
+                    event["motion"] = round(motion, 4)
+                    if motion < SEQUENCE_STILL_MOTION:
+                        stride = min(stride * 2, SEQUENCE_MAX_STRIDE)
+                    elif motion > 2 * SEQUENCE_STILL_MOTION:
+                        stride = 1
+                previous_xy = key_xy
+            yield event
+
+            index += 1
+            for _ in range(stride - 1):
+                if index >= SEQUENCE_MAX_READ_FRAMES or not source.skip():
+                    break
+                index += 1
+                skipped += 1
+
+        posture_data = aggregate_frames(tracked)
+        posture_data["frames"] = {
+            "read": index,
+            "analyzed": analyzed,
+            "tracked": len(tracked),
+            "skipped": skipped,
+        }
+        yield {"type": "aggregate", "posture_data": posture_data}
+    finally:
+        if pose is not None:
+            pose.close()
+        source.close()
+        _sequence_slots.release()
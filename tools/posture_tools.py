@@ -1,6 +1,14 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
+from typing import Iterator
 
 import cv2
 import mediapipe as mp
@@ -16,17 +24,352 @@ class PoseLandmarkIndex:
     right_hip: int = 24
     left_ear: int = 7
     right_ear: int = 8
+    left_elbow: int = 13
+    right_elbow: int = 14
+    left_wrist: int = 15
+    right_wrist: int = 16
+    left_knee: int = 25
+    right_knee: int = 26
+    left_ankle: int = 27
+    right_ankle: int = 28
+    left_foot_index: int = 31
+    right_foot_index: int = 32
 
 
 POSE_IDX = PoseLandmarkIndex()
+NUM_POSE_LANDMARKS = 33
+# Bumped whenever the metric set or the posture payload changes so cached posture results are recomputed.
+METRICS_VERSION = 3
+# Stored landmark layout, one float32 row per landmark: image x, y and visibility, then world x, y, z and
+# visibility (33 x 7 x 4 = 924 bytes). MediaPipe reports visibility separately for the two landmark sets.
+LANDMARK_BLOB_COLUMNS = ("x", "y", "visibility", "world_x", "world_y", "world_z", "world_visibility")
+
+# Midpoints are appended after the 33 landmarks so every metric can be expressed as row indices.
+SHOULDER_MID = NUM_POSE_LANDMARKS
+HIP_MID = NUM_POSE_LANDMARKS + 1
+EAR_MID = NUM_POSE_LANDMARKS + 2
+X_AXIS, Y_AXIS, Z_AXIS = 0, 1, 2
+
+# Angle between (point - vertex) and a world axis, folded to the acute side: (metric, point, vertex, axis).
+ORIENTATION_SPECS = (
+    ("shoulder_tilt_deg", POSE_IDX.left_shoulder, POSE_IDX.right_shoulder, X_AXIS),
+    ("pelvic_tilt_deg", POSE_IDX.left_hip, POSE_IDX.right_hip, X_AXIS),
+    ("trunk_inclination_deg", SHOULDER_MID, HIP_MID, Y_AXIS),
+    ("head_protraction_deg", POSE_IDX.nose, SHOULDER_MID, Z_AXIS),
+    ("head_tilt_deg", POSE_IDX.nose, SHOULDER_MID, Y_AXIS),
+)
+
+# Interior joint angle at the vertex between two segments: (metric, point, vertex, point).
+JOINT_SPECS = (
+    ("left_elbow_deg", POSE_IDX.left_shoulder, POSE_IDX.left_elbow, POSE_IDX.left_wrist),
+    ("right_elbow_deg", POSE_IDX.right_shoulder, POSE_IDX.right_elbow, POSE_IDX.right_wrist),
+    ("left_knee_deg", POSE_IDX.left_hip, POSE_IDX.left_knee, POSE_IDX.left_ankle),
+    ("right_knee_deg", POSE_IDX.right_hip, POSE_IDX.right_knee, POSE_IDX.right_ankle),
+    ("left_ankle_deg", POSE_IDX.left_knee, POSE_IDX.left_ankle, POSE_IDX.left_foot_index),
+    ("right_ankle_deg", POSE_IDX.right_knee, POSE_IDX.right_ankle, POSE_IDX.right_foot_index),
+)
+
+_ORIENTATION_POINTS = np.array([spec[1] for spec in ORIENTATION_SPECS])
+_ORIENTATION_VERTICES = np.array([spec[2] for spec in ORIENTATION_SPECS])
+_ORIENTATION_AXES = np.eye(3)[[spec[3] for spec in ORIENTATION_SPECS]]
+_JOINT_POINTS = np.array([spec[1] for spec in JOINT_SPECS])
+_JOINT_VERTICES = np.array([spec[2] for spec in JOINT_SPECS])
+_JOINT_ENDS = np.array([spec[3] for spec in JOINT_SPECS])
+
+KEY_VISIBILITY_INDICES = (
+    POSE_IDX.left_shoulder,
+    POSE_IDX.right_shoulder,
+    POSE_IDX.left_hip,
+    POSE_IDX.right_hip,
+    POSE_IDX.left_ear,
+    POSE_IDX.right_ear,
+)
+
+POSE_POOL_SIZE = max(1, int(os.getenv("POSE_POOL_SIZE", str(min(4, os.cpu_count() or 1)))))
+POSE_POOL_TIMEOUT = float(os.getenv("POSE_POOL_TIMEOUT", "30"))
+POSE_POOL_MAX_WAITING = max(0, int(os.getenv("POSE_POOL_MAX_WAITING", "16")))
+
+# "fixed" runs a single pass with POSE_MODEL_COMPLEXITY; "adaptive" tries a cheaper pass first and
+# only escalates to complexity 2 when the key landmarks are not visible enough. The default tier matches
+# docker-compose, so local and container runs share the same model and escalation baseline.
+POSE_MODE = os.getenv("POSE_MODE", "fixed").strip().lower()
+POSE_MODEL_COMPLEXITY = min(2, max(0, int(os.getenv("POSE_MODEL_COMPLEXITY", "1"))))
+POSE_MAX_IMAGE_SIZE = int(os.getenv("POSE_MAX_IMAGE_SIZE", "800"))
+POSE_FAST_MODEL_COMPLEXITY = min(1, max(0, int(os.getenv("POSE_FAST_MODEL_COMPLEXITY", "1"))))
+POSE_FAST_MAX_IMAGE_SIZE = int(os.getenv("POSE_FAST_MAX_IMAGE_SIZE", "512"))
+POSE_VISIBILITY_THRESHOLD = float(os.getenv("POSE_VISIBILITY_THRESHOLD", "0.6"))
+# JPEGs much larger than the pose input are decoded at 1/2, 1/4 or 1/8 scale straight from the DCT data.
+POSE_REDUCED_DECODE = os.getenv("POSE_REDUCED_DECODE", "1") == "1"
+
+# Leading bytes of the image formats accepted for upload; all of them are decodable by OpenCV.
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"BM", "bmp"),
+    (b"II*\x00", "tiff"),
+    (b"MM\x00*", "tiff"),
+)
+IMAGE_SNIFF_BYTES = 12
+REDUCED_JPEG_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+# Start-of-frame markers carry the dimensions; C4, C8 and CC share the range but are not frames.
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class PosePoolSaturatedError(RuntimeError):
+    pass
+
+
+def _create_pose(model_complexity: int) -> mp.solutions.pose.Pose:
+    return mp.solutions.pose.Pose(
+        static_image_mode=True,
+        model_complexity=model_complexity,
+        smooth_landmarks=True,
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+    )
+
+
+# Pre-initialised Pose graphs lent out exclusively, so one graph never runs on two threads at once.
+# Callers queue for a free graph; past max_waiting queued callers the borrow fails fast (backpressure).
+class PosePool:
+    def __init__(self, size: int, model_complexity: int, acquire_timeout: float, max_waiting: int) -> None:
+        self.size = size
+        self.model_complexity = model_complexity
+        self.acquire_timeout = acquire_timeout
+        self.max_waiting = max_waiting
+        self._idle: queue.LifoQueue[mp.solutions.pose.Pose] = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._in_use = 0
+        self._waiting = 0
+        self._borrows = 0
+        self._rejected = 0
+        self._timeouts = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+
+    def _reserve_new_slot(self) -> bool:
+        with self._lock:
+            if self._created >= self.size:
+                return False
+            self._created += 1
+            return True
+
+    def warm(self) -> None:
+        while self._reserve_new_slot():
+            try:
+                self._idle.put(_create_pose(self.model_complexity))
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+    def _acquire(self) -> mp.solutions.pose.Pose:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        if self._reserve_new_slot():
+            try:
+                return _create_pose(self.model_complexity)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        with self._lock:
+            if self._waiting >= self.max_waiting:
+                self._rejected += 1
+                raise PosePoolSaturatedError("Posture analysis is at capacity. Please retry shortly.")
+            self._waiting += 1
+        try:
+            return self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty as exc:
+            with self._lock:
+                self._timeouts += 1
+            raise PosePoolSaturatedError("Timed out waiting for a free posture analysis worker.") from exc
+        finally:
+            with self._lock:
+                self._waiting -= 1
+
+    @contextmanager
+    def borrow(self) -> Iterator[mp.solutions.pose.Pose]:
+        started = time.perf_counter()
+        pose = self._acquire()
+        waited = time.perf_counter() - started
+        with self._lock:
+            self._in_use += 1
+            self._borrows += 1
+            self._wait_total_s += waited
+            self._wait_max_s = max(self._wait_max_s, waited)
+        try:
+            yield pose
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._idle.put(pose)
+
+    def close(self) -> None:
+        while True:
+            try:
+                pose = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            pose.close()
+            with self._lock:
+                self._created -= 1
+
+    def stats(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "model_complexity": self.model_complexity,
+                "size": self.size,
+                "created": self._created,
+                "in_use": self._in_use,
+                "idle": self._created - self._in_use,
+                "waiting": self._waiting,
+                "saturation": round(self._in_use / self.size, 4),
+                "borrows": self._borrows,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "wait_avg_ms": round((self._wait_total_s / self._borrows) * 1000.0, 3) if self._borrows else 0.0,
+                "wait_max_ms": round(self._wait_max_s * 1000.0, 3),
+            }
+
+
+@dataclass(frozen=True)
+class PoseTier:
+    name: str
+    model_complexity: int
+    max_size: int
+
+
+def _configured_tiers() -> tuple[PoseTier, ...]:
+    if POSE_MODE == "adaptive":
+        return (
+            PoseTier("fast", POSE_FAST_MODEL_COMPLEXITY, POSE_FAST_MAX_IMAGE_SIZE),
+            PoseTier("accurate", 2, POSE_MAX_IMAGE_SIZE),
+        )
+    return (PoseTier("fixed", POSE_MODEL_COMPLEXITY, POSE_MAX_IMAGE_SIZE),)
+
+
+POSE_TIERS = _configured_tiers()
+
+_pose_pools: dict[int, PosePool] = {}
+_pose_pool_lock = threading.Lock()
+_tier_counts: dict[str, int] = {tier.name: 0 for tier in POSE_TIERS}
+_escalations = 0
+_tier_counts_lock = threading.Lock()
+
+
+def get_pose_pool(model_complexity: int) -> PosePool:
+    pool = _pose_pools.get(model_complexity)
+    if pool is None:
+        with _pose_pool_lock:
+            pool = _pose_pools.get(model_complexity)
+            if pool is None:
+                pool = PosePool(
+                    size=POSE_POOL_SIZE,
+                    model_complexity=model_complexity,
+                    acquire_timeout=POSE_POOL_TIMEOUT,
+                    max_waiting=POSE_POOL_MAX_WAITING,
+                )
+                _pose_pools[model_complexity] = pool
+    return pool
+
+
+def warm_pose_pool() -> None:
+    for tier in POSE_TIERS:
+        get_pose_pool(tier.model_complexity).warm()
+
+
+def close_pose_pool() -> None:
+    with _pose_pool_lock:
+        for pool in _pose_pools.values():
+            pool.close()
+        _pose_pools.clear()
+
+
+def pose_pool_stats() -> dict[str, object]:
+    with _tier_counts_lock:
+        tier_counts = dict(_tier_counts)
+        escalations = _escalations
+    completed = sum(tier_counts.values())
+    return {
+        "mode": POSE_MODE,
+        "tiers": [
+            {"name": tier.name, "model_complexity": tier.model_complexity, "max_size": tier.max_size}
+            for tier in POSE_TIERS
+        ],
+        "results_by_tier": tier_counts,
+        "escalations": escalations,
+        "escalation_rate": round(escalations / completed, 4) if completed else 0.0,
+        "pools": {str(complexity): pool.stats() for complexity, pool in sorted(_pose_pools.items())},
+    }
 
 
-def _decode_image(image_bytes: bytes, max_size: int = 800) -> np.ndarray:
+def sniff_image_type(header: bytes) -> str | None:
+    for signature, image_type in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_type
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+# Reads (width, height) from the first start-of-frame segment without decoding any pixels.
+def jpeg_dimensions(data: bytes) -> tuple[int, int] | None:
+    if not data.startswith(b"\xff\xd8"):
+        return None
+    offset = 2
+    while offset + 4 <= len(data):
+        if data[offset] != 0xFF:
+            return None
+        marker = data[offset + 1]
+        if marker == 0xFF:
+            offset += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            offset += 2
+            continue
+        if marker == 0xDA:
+            return None
+        if marker in JPEG_SOF_MARKERS:
+            if offset + 9 > len(data):
+                return None
+            height = int.from_bytes(data[offset + 5 : offset + 7], "big")
+            width = int.from_bytes(data[offset + 7 : offset + 9], "big")
+            return (width, height) if width and height else None
+        offset += 2 + int.from_bytes(data[offset + 2 : offset + 4], "big")
+    return None
+
+
+def _decode_flag(image_bytes: bytes, max_size: int) -> int:
+    dimensions = jpeg_dimensions(image_bytes) if POSE_REDUCED_DECODE else None
+    if dimensions is None:
+        return cv2.IMREAD_COLOR
+    longest_edge = max(dimensions)
+    # Only scales that still leave at least max_size pixels, so the final resize never upsamples.
+    for factor, flag in REDUCED_JPEG_FLAGS:
+        if longest_edge // factor >= max_size:
+            return flag
+    return cv2.IMREAD_COLOR
+
+
+def _decode_image(image_bytes: bytes, max_size: int = POSE_MAX_IMAGE_SIZE) -> np.ndarray:
     arr = np.frombuffer(image_bytes, dtype=np.uint8)
-    image = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+    image = cv2.imdecode(arr, _decode_flag(image_bytes, max_size))
     if image is None:
         raise ValueError("Could not decode uploaded image.")
+    return _resize_to_max(image, max_size)
+
 
+def _resize_to_max(image: np.ndarray, max_size: int) -> np.ndarray:
     height, width = image.shape[:2]
     longest_edge = max(height, width)
 
@@ -39,122 +382,114 @@ def _decode_image(image_bytes: bytes, max_size: int = 800) -> np.ndarray:
     return image
 
 
-def _calculate_3d_angle(a: np.ndarray, b: np.ndarray, c: np.ndarray) -> float:
-    ba = a - b
-    bc = c - b
+# Loads MediaPipe landmarks into a (33, 4) float32 array of x, y, z, visibility.
+def _landmark_array(landmarks: object) -> np.ndarray:
+    return np.array([(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks], dtype=np.float32)
 
-    ba_norm = np.linalg.norm(ba)
-    bc_norm = np.linalg.norm(bc)
-    if ba_norm < 1e-9 or bc_norm < 1e-9:
-        return 0.0
 
-    cosine_angle = np.dot(ba, bc) / (ba_norm * bc_norm)
-    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-    angle_rad = np.arccos(cosine_angle)
-    return float(np.degrees(angle_rad))
+# Angle in degrees between each row of two (n, 3) vector arrays; 0 where a vector is degenerate.
+def _batched_angles(first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    first_norms = np.linalg.norm(first, axis=1)
+    second_norms = np.linalg.norm(second, axis=1)
+    valid = (first_norms >= 1e-9) & (second_norms >= 1e-9)
+    cosine = np.einsum("ij,ij->i", first, second) / np.where(valid, first_norms * second_norms, 1.0)
+    return np.where(valid, np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0))), 0.0)
 
 
 def _round2(value: float | int) -> float:
     return round(float(value), 2)
 
 
-def _to_xy(landmarks: list[mp.framework.formats.landmark_pb2.NormalizedLandmark], idx: int) -> tuple[float, float]:
-    lm = landmarks[idx]
-    return (lm.x, lm.y)
+def _min_key_visibility(result: object) -> float:
+    if not result.pose_landmarks or not result.pose_world_landmarks:
+        return 0.0
+    landmarks = result.pose_landmarks.landmark
+    return min(landmarks[idx].visibility for idx in KEY_VISIBILITY_INDICES)
+
+
+def _run_pose_tiers(image: np.ndarray) -> tuple[object, PoseTier, float]:
+    global _escalations
+    result = None
+    visibility = 0.0
+    for position, tier in enumerate(POSE_TIERS):
+        tier_image = _resize_to_max(image, tier.max_size)
+        rgb = cv2.cvtColor(tier_image, cv2.COLOR_BGR2RGB)
+        with get_pose_pool(tier.model_complexity).borrow() as pose:
+            result = pose.process(rgb)
+        visibility = _min_key_visibility(result)
 
+        is_last = position == len(POSE_TIERS) - 1
+        if is_last or visibility >= POSE_VISIBILITY_THRESHOLD:
+            with _tier_counts_lock:
+                _tier_counts[tier.name] += 1
+                if position > 0:
+                    _escalations += 1
+            return result, tier, visibility
+    raise RuntimeError("No pose tiers are configured.")
 
-def _to_xyz(landmarks: list[mp.framework.formats.landmark_pb2.Landmark], idx: int) -> np.ndarray:
-    lm = landmarks[idx]
-    return np.array([lm.x, lm.y, lm.z], dtype=np.float64)
 
+def prepare_image(image_bytes: bytes) -> np.ndarray:
+    return _decode_image(image_bytes, max_size=max(tier.max_size for tier in POSE_TIERS))
 
-def _acute_angle(angle_deg: float) -> float:
-    return min(angle_deg, 180.0 - angle_deg)
+
+def image_fingerprint(image: np.ndarray) -> str:
+    digest = hashlib.sha256()
+    digest.update(repr(image.shape).encode("ascii"))
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+
+def pose_settings_signature() -> str:
+    tiers = ",".join(f"{tier.name}:{tier.model_complexity}:{tier.max_size}" for tier in POSE_TIERS)
+    return f"{POSE_MODE}|{tiers}|vis={POSE_VISIBILITY_THRESHOLD}|metrics={METRICS_VERSION}"
 
 
 def extract_landmarks_and_angles(image_bytes: bytes) -> dict[str, object]:
-    image = _decode_image(image_bytes)
-    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+    return extract_landmarks_and_angles_from_image(prepare_image(image_bytes))
 
-    pose = mp.solutions.pose.Pose(
-        static_image_mode=True,
-        model_complexity=2,
-        smooth_landmarks=True,
-        min_detection_confidence=0.5,
-        min_tracking_confidence=0.5,
-    )
-    try:
-        result = pose.process(rgb)
-    finally:
-        pose.close()
 
-    if not result.pose_landmarks:
-        raise ValueError("No human posture landmarks were detected in the image.")
-    if not result.pose_world_landmarks:
-        raise ValueError("No 3D posture landmarks were detected in the image.")
+# Returns (view-filtered angles, joint angles, detected view) for a (33, 4) world-landmark array.
+def posture_metrics(points_3d: np.ndarray) -> tuple[dict[str, float], dict[str, float], str]:
+    xyz = points_3d[:, :3].astype(np.float64)
 
-    landmarks_2d = result.pose_landmarks.landmark
-    landmarks_3d = result.pose_world_landmarks.landmark
-
-    left_shoulder_3d = _to_xyz(landmarks_3d, POSE_IDX.left_shoulder)
-    right_shoulder_3d = _to_xyz(landmarks_3d, POSE_IDX.right_shoulder)
-    left_hip_3d = _to_xyz(landmarks_3d, POSE_IDX.left_hip)
-    right_hip_3d = _to_xyz(landmarks_3d, POSE_IDX.right_hip)
-    nose_3d = _to_xyz(landmarks_3d, POSE_IDX.nose)
-    left_ear_3d = _to_xyz(landmarks_3d, POSE_IDX.left_ear)
-    right_ear_3d = _to_xyz(landmarks_3d, POSE_IDX.right_ear)
-
-    shoulder_mid_3d = (left_shoulder_3d + right_shoulder_3d) / 2.0
-    hip_mid_3d = (left_hip_3d + right_hip_3d) / 2.0
-    ear_mid_3d = (left_ear_3d + right_ear_3d) / 2.0
-
-    x_axis = np.array([1.0, 0.0, 0.0], dtype=np.float64)
-    y_axis = np.array([0.0, 1.0, 0.0], dtype=np.float64)
-    z_axis = np.array([0.0, 0.0, 1.0], dtype=np.float64)
-
-    shoulder_tilt_raw = _calculate_3d_angle(
-        left_shoulder_3d,
-        right_shoulder_3d,
-        right_shoulder_3d + x_axis,
-    )
-    pelvic_tilt_raw = _calculate_3d_angle(
-        left_hip_3d,
-        right_hip_3d,
-        right_hip_3d + x_axis,
-    )
-    trunk_inclination_raw = _calculate_3d_angle(
-        shoulder_mid_3d,
-        hip_mid_3d,
-        hip_mid_3d + y_axis,
+    midpoints = np.stack(
+        [
+            xyz[[POSE_IDX.left_shoulder, POSE_IDX.right_shoulder]].mean(axis=0),
+            xyz[[POSE_IDX.left_hip, POSE_IDX.right_hip]].mean(axis=0),
+            xyz[[POSE_IDX.left_ear, POSE_IDX.right_ear]].mean(axis=0),
+        ]
     )
-    head_protraction_raw = _calculate_3d_angle(
-        nose_3d,
-        shoulder_mid_3d,
-        shoulder_mid_3d + z_axis,
-    )
-    head_tilt_raw = _calculate_3d_angle(
-        nose_3d,
-        shoulder_mid_3d,
-        shoulder_mid_3d + y_axis,
+    extended = np.vstack([xyz, midpoints])
+
+    # Orientation and joint angles are evaluated together in a single batched pass.
+    first = np.vstack(
+        [
+            extended[_ORIENTATION_POINTS] - extended[_ORIENTATION_VERTICES],
+            extended[_JOINT_POINTS] - extended[_JOINT_VERTICES],
+        ]
     )
+    second = np.vstack([_ORIENTATION_AXES, extended[_JOINT_ENDS] - extended[_JOINT_VERTICES]])
+    all_angles = _batched_angles(first, second)
+    orientation = all_angles[: len(ORIENTATION_SPECS)]
+    orientation = np.minimum(orientation, 180.0 - orientation)
+    joints = all_angles[len(ORIENTATION_SPECS) :]
 
-    shoulder_rotation_cm = abs(left_shoulder_3d[2] - right_shoulder_3d[2]) * 100.0
-    pelvic_rotation_cm = abs(left_hip_3d[2] - right_hip_3d[2]) * 100.0
+    left_z = extended[[POSE_IDX.left_shoulder, POSE_IDX.left_hip], 2]
+    right_z = extended[[POSE_IDX.right_shoulder, POSE_IDX.right_hip], 2]
+    shoulder_rotation_cm, pelvic_rotation_cm = np.abs(left_z - right_z) * 100.0
+    shoulder_mid_z_cm, ear_mid_z_cm = extended[[SHOULDER_MID, EAR_MID], 2] * 100.0
 
     raw_angles = {
-        "shoulder_tilt_deg": _round2(_acute_angle(shoulder_tilt_raw)),
-        "pelvic_tilt_deg": _round2(_acute_angle(pelvic_tilt_raw)),
+        **{spec[0]: _round2(value) for spec, value in zip(ORIENTATION_SPECS, orientation)},
         "shoulder_rotation_cm": _round2(shoulder_rotation_cm),
         "pelvic_rotation_cm": _round2(pelvic_rotation_cm),
-        "head_protraction_deg": _round2(_acute_angle(head_protraction_raw)),
-        "head_tilt_deg": _round2(_acute_angle(head_tilt_raw)),
-        "trunk_inclination_deg": _round2(_acute_angle(trunk_inclination_raw)),
-        "shoulder_mid_z_cm": _round2(shoulder_mid_3d[2] * 100.0),
-        "ear_mid_z_cm": _round2(ear_mid_3d[2] * 100.0),
+        "shoulder_mid_z_cm": _round2(shoulder_mid_z_cm),
+        "ear_mid_z_cm": _round2(ear_mid_z_cm),
     }
+    joint_angles = {spec[0]: _round2(value) for spec, value in zip(JOINT_SPECS, joints)}
 
-    shoulder_width_x = abs(left_shoulder_3d[0] - right_shoulder_3d[0])
-    shoulder_depth_z = abs(left_shoulder_3d[2] - right_shoulder_3d[2])
+    shoulder_width_x = abs(xyz[POSE_IDX.left_shoulder, 0] - xyz[POSE_IDX.right_shoulder, 0])
+    shoulder_depth_z = abs(xyz[POSE_IDX.left_shoulder, 2] - xyz[POSE_IDX.right_shoulder, 2])
     # Margin helps reduce false "profile" classifications in noisy frontal captures.
     detected_view = "frontal" if shoulder_width_x > (shoulder_depth_z * 1.15) else "profile"
 
@@ -176,18 +511,53 @@ def extract_landmarks_and_angles(image_bytes: bytes) -> dict[str, object]:
             "ear_mid_z_cm": raw_angles["ear_mid_z_cm"],
         }
 
-    landmarks2d_payload = [
-        {"id": idx, "x": _round2(lm.x), "y": _round2(lm.y), "visibility": _round2(lm.visibility)}
-        for idx, lm in enumerate(landmarks_2d)
-    ]
-    landmarks3d_payload = [
-        {"id": idx, "x": _round2(lm.x), "y": _round2(lm.y), "z": _round2(lm.z), "visibility": _round2(lm.visibility)}
-        for idx, lm in enumerate(landmarks_3d)
-    ]
+    return angles, joint_angles, detected_view
+
+
+def landmarks_payload(points: np.ndarray, include_z: bool) -> list[dict[str, float]]:
+    rounded = np.round(points.astype(np.float64), 2).tolist()
+    if include_z:
+        return [
+            {"id": idx, "x": x, "y": y, "z": z, "visibility": visibility}
+            for idx, (x, y, z, visibility) in enumerate(rounded)
+        ]
+    return [{"id": idx, "x": x, "y": y, "visibility": visibility} for idx, (x, y, _, visibility) in enumerate(rounded)]
+
+
+# Packs (33, 4) image and world landmark arrays at full float32 precision, unlike the 2-decimal payloads.
+# Base64 keeps the posture data JSON-serialisable for the analysis cache.
+def encode_landmark_arrays(points_2d: np.ndarray, points_3d: np.ndarray) -> str:
+    packed = np.hstack([points_2d[:, [0, 1, 3]], points_3d]).astype(np.float32)
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+
+def extract_landmarks_and_angles_from_image(image: np.ndarray) -> dict[str, object]:
+    result, tier, key_visibility = _run_pose_tiers(image)
+
+    if not result.pose_landmarks:
+        raise ValueError("No human posture landmarks were detected in the image.")
+    if not result.pose_world_landmarks:
+        raise ValueError("No 3D posture landmarks were detected in the image.")
+
+    # Protobuf landmarks are float32, so the arrays hold them exactly; the geometry runs in float64.
+    points_2d = _landmark_array(result.pose_landmarks.landmark)
+    points_3d = _landmark_array(result.pose_world_landmarks.landmark)
+    angles, joint_angles, detected_view = posture_metrics(points_3d)
+    landmarks2d_payload = landmarks_payload(points_2d, include_z=False)
+    landmarks3d_payload = landmarks_payload(points_3d, include_z=True)
 
     return {
         "angles": angles,
+        "joint_angles": joint_angles,
         "detected_view": detected_view,
         "landmarks_2d": landmarks2d_payload,
         "landmarks_3d": landmarks3d_payload,
+        "landmarks_blob": encode_landmark_arrays(points_2d, points_3d),
+        "pose_tier": {
+            "name": tier.name,
+            "model_complexity": tier.model_complexity,
+            "max_size": tier.max_size,
+            "escalated": tier != POSE_TIERS[0],
+            "min_key_visibility": _round2(key_visibility),
+        },
     }
@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator
+
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") == "1"
+# Server-Timing exposes stage durations to every client, so it can be switched off separately.
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "1") == "1"
+METRICS_PREFIX = "pilates_"
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = tuple[tuple[str, str], ...]
+
+
+def _label_key(labels: dict[str, Any]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: LabelKey, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = METRICS_PREFIX + name
+        self.help_text = help_text
+        self._values: dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        if not TELEMETRY_ENABLED or not amount:
+            return
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        lines.extend(f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in values)
+        return lines
+
+
+# Cumulative buckets are only built at render time; an observation is one bisect and three additions.
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: tuple[float, ...] = DURATION_BUCKETS) -> None:
+        self.name = METRICS_PREFIX + name
+        self.help_text = help_text
+        self.buckets = buckets
+        self._series: dict[LabelKey, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not TELEMETRY_ENABLED:
+            return
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # One slot per bucket, one for +Inf, then the running sum.
+                series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self) -> dict[LabelKey, dict[str, float]]:
+        with self._lock:
+            return {
+                key: {"count": sum(series[:-1]), "sum": series[-1]} for key, series in self._series.items()
+            }
+
+    def render(self) -> list[str]:
+        with self._lock:
+            series_items = sorted((key, list(series)) for key, series in self._series.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for key, series in series_items:
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), series):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(key, (('le', _format_value(bound)),))} {int(cumulative)}"
+                )
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(round(series[-1], 6))}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {int(cumulative)}")
+        return lines
+
+
+stage_duration = Histogram("stage_duration_seconds", "Duration of instrumented pipeline and agent stages.")
+http_request_duration = Histogram("http_request_duration_seconds", "HTTP request duration by route template.")
+llm_tokens = Counter("llm_tokens_total", "Tokens reported by the model, by agent and kind.")
+llm_requests = Counter("llm_requests_total", "Model completions requested, by agent.")
+llm_retries = Counter("llm_retries_total", "Completions retried after an invalid answer, by agent.")
+stage_errors = Counter("stage_errors_total", "Instrumented stages that raised, by stage and exception type.")
+
+_METRICS = (stage_duration, http_request_duration, llm_tokens, llm_requests, llm_retries, stage_errors)
+
+# Spans finished while handling a request, collected for its Server-Timing header. Threadpool and
+# asyncio.to_thread calls copy the context, so spans recorded there land in the same list.
+_request_spans: ContextVar[list[tuple[str, float]] | None] = ContextVar("request_spans", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    if not TELEMETRY_ENABLED:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as exc:
+        stage_errors.inc(stage=stage, error=type(exc).__name__)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        stage_duration.observe(elapsed, stage=stage)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((stage, elapsed))
+
+
+def record_llm_usage(agent: str, usage: Any) -> None:
+    if usage is None:
+        return
+    llm_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, agent=agent, kind="prompt")
+    llm_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, agent=agent, kind="completion")
+
+
+def start_request_spans() -> list[tuple[str, float]]:
+    spans: list[tuple[str, float]] = []
+    _request_spans.set(spans)
+    return spans
+
+
+# Repeated stages (several model calls or tool iterations) are summed, in the order they first ran.
+def server_timing_header(spans: list[tuple[str, float]], total_seconds: float) -> str:
+    totals: dict[str, list[float]] = {}
+    for stage, elapsed in spans:
+        entry = totals.setdefault(stage, [0.0, 0])
+        entry[0] += elapsed
+        entry[1] += 1
+    parts = [
+        f"{stage};dur={elapsed * 1000.0:.1f}" + (f';desc="x{count}"' if count > 1 else "")
+        for stage, (elapsed, count) in totals.items()
+    ]
+    parts.append(f"total;dur={total_seconds * 1000.0:.1f}")
+    return ", ".join(parts)
+
+
+def telemetry_stats() -> dict[str, object]:
+    stages = {
+        dict(key)["stage"]: {
+            "count": int(values["count"]),
+            "avg_ms": round(values["sum"] / values["count"] * 1000.0, 3),
+        }
+        for key, values in stage_duration.snapshot().items()
+        if values["count"]
+    }
+    return {"enabled": TELEMETRY_ENABLED, "server_timing": SERVER_TIMING_ENABLED, "stages": stages}
+
+
+def _flatten(prefix: str, value: Any, out: list[tuple[str, float]]) -> None:
+    if isinstance(value, bool):
+        out.append((prefix, float(value)))
+    elif isinstance(value, (int, float)):
+        if math.isfinite(value):
+            out.append((prefix, float(value)))
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            name = "".join(char if char.isalnum() else "_" for char in str(key).lower())
+            _flatten(f"{prefix}_{name}", item, out)
+
+
+# Renders the registered metrics plus the numeric leaves of `gauges` (nested dicts, such as the /stats
+# payload) as Prometheus text exposition format; strings and lists are skipped.
+def render_metrics(gauges: dict[str, Any]) -> str:
+    lines: list[str] = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    flattened: list[tuple[str, float]] = []
+    for source, value in gauges.items():
+        _flatten(METRICS_PREFIX + source, value, flattened)
+    for name, value in flattened:
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
@@ -1,9 +1,20 @@
 from __future__ import annotations
 
-from typing import Iterable
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Iterable
 
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+from tools.telemetry import span
 
 
 PILATES_SOURCE_URLS = [
@@ -11,6 +22,90 @@ PILATES_SOURCE_URLS = [
     "https://blogpilates.com.br/lista-exercicios-de-pilates/",
 ]
 
+WEB_CACHE_DIR = Path(os.getenv("WEB_CACHE_DIR", str(Path(tempfile.gettempdir()) / "pilates_web_cache")))
+WEB_CACHE_TTL = float(os.getenv("WEB_CACHE_TTL", "86400"))
+WEB_FETCH_CONCURRENCY = max(1, int(os.getenv("WEB_FETCH_CONCURRENCY", "4")))
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {
+    "fresh_hits": 0,
+    "revalidated": 0,
+    "downloads": 0,
+    "stale_served": 0,
+    "errors": 0,
+    "fetches": 0,
+    "fetch_seconds_total": 0.0,
+    "fetch_seconds_max": 0.0,
+}
+
+
+def _get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=WEB_FETCH_CONCURRENCY)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers["User-Agent"] = "PilatesVisionProgressBot/1.0"
+                _session = session
+    return _session
+
+
+def _record(counter: str, fetch_seconds: float | None = None) -> None:
+    with _stats_lock:
+        _stats[counter] += 1
+        if fetch_seconds is not None:
+            _stats["fetches"] += 1
+            _stats["fetch_seconds_total"] += fetch_seconds
+            _stats["fetch_seconds_max"] = max(_stats["fetch_seconds_max"], fetch_seconds)
+
+
+def web_cache_stats() -> dict[str, object]:
+    with _stats_lock:
+        stats = dict(_stats)
+    served = stats["fresh_hits"] + stats["revalidated"] + stats["downloads"] + stats["stale_served"]
+    cached = stats["fresh_hits"] + stats["revalidated"] + stats["stale_served"]
+    return {
+        "cache_dir": str(WEB_CACHE_DIR),
+        "ttl_seconds": WEB_CACHE_TTL,
+        "fresh_hits": stats["fresh_hits"],
+        "revalidated": stats["revalidated"],
+        "downloads": stats["downloads"],
+        "stale_served": stats["stale_served"],
+        "errors": stats["errors"],
+        "hit_ratio": round(cached / served, 4) if served else 0.0,
+        "fetches": stats["fetches"],
+        "fetch_avg_ms": round(stats["fetch_seconds_total"] / stats["fetches"] * 1000.0, 3) if stats["fetches"] else 0.0,
+        "fetch_max_ms": round(stats["fetch_seconds_max"] * 1000.0, 3),
+    }
+
+
+def _cache_file(url: str) -> Path:
+    return WEB_CACHE_DIR / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+
+def _read_cache_entry(url: str) -> dict[str, Any] | None:
+    try:
+        entry = json.loads(_cache_file(url).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return entry if entry.get("url") == url else None
+
+
+def _write_cache_entry(entry: dict[str, Any]) -> None:
+    try:
+        WEB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        target = _cache_file(entry["url"])
+        temp_path = target.with_suffix(f".{threading.get_ident()}.tmp")
+        temp_path.write_text(json.dumps(entry, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, target)
+    except OSError:
+        pass
+
 
 def _extract_relevant_lines(text: str, max_lines: int = 90) -> str:
     lines = [line.strip() for line in text.splitlines() if line.strip()]
@@ -18,11 +113,8 @@ def _extract_relevant_lines(text: str, max_lines: int = 90) -> str:
     return "\n".join(cleaned[:max_lines])
 
 
-def _fetch_url_text(url: str, timeout: int = 20) -> str:
-    response = requests.get(url, timeout=timeout, headers={"User-Agent": "PilatesVisionProgressBot/1.0"})
-    response.raise_for_status()
-
-    soup = BeautifulSoup(response.text, "html.parser")
+def _html_to_text(html: str) -> str:
+    soup = BeautifulSoup(html, "html.parser")
     for tag in soup(["script", "style", "noscript"]):
         tag.extract()
 
@@ -30,18 +122,65 @@ def _fetch_url_text(url: str, timeout: int = 20) -> str:
     return _extract_relevant_lines(raw_text)
 
 
+def _fetch_url_text(url: str, timeout: int = 20, max_age: float | None = None) -> str:
+    ttl = WEB_CACHE_TTL if max_age is None else max_age
+    entry = _read_cache_entry(url)
+    now = time.time()
+    if entry and now - float(entry.get("fetched_at", 0)) < ttl:
+        _record("fresh_hits")
+        return entry["text"]
+
+    headers: dict[str, str] = {}
+    if entry and entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry and entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+
+    started = time.perf_counter()
+    try:
+        response = _get_session().get(url, timeout=timeout, headers=headers)
+        if response.status_code == 304 and entry:
+            entry["fetched_at"] = now
+            _write_cache_entry(entry)
+            _record("revalidated", time.perf_counter() - started)
+            return entry["text"]
+        response.raise_for_status()
+        text = _html_to_text(response.text)
+    except Exception:
+        if entry:
+            _record("stale_served", time.perf_counter() - started)
+            return entry["text"]
+        _record("errors", time.perf_counter() - started)
+        raise
+
+    _write_cache_entry(
+        {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+            "text": text,
+        }
+    )
+    _record("downloads", time.perf_counter() - started)
+    return text
+
+
+def _fetch_chunk(url: str) -> str:
+    try:
+        content = _fetch_url_text(url)
+        return f"Source: {url}\n{content}"
+    except Exception as exc:
+        return f"Source: {url}\nError fetching content: {exc}"
+
+
 def fetch_pilates_exercises(urls: Iterable[str] | None = None) -> str:
     target_urls = list(urls) if urls else PILATES_SOURCE_URLS
     if not target_urls:
         return "No URLs provided."
 
-    chunks: list[str] = []
-    for url in target_urls:
-        try:
-            content = _fetch_url_text(url)
-            chunks.append(f"Source: {url}\n{content}")
-        except Exception as exc:
-            chunks.append(f"Source: {url}\nError fetching content: {exc}")
+    with span("scrape"), ThreadPoolExecutor(max_workers=min(WEB_FETCH_CONCURRENCY, len(target_urls))) as executor:
+        chunks = list(executor.map(_fetch_chunk, target_urls))
 
     combined = "\n\n".join(chunks)
     max_chars = 14000